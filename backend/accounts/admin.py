@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin
-from .models import UserProfile
+from .models import ExternalIdentity, UserProfile
 
 class UserProfileInline(admin.StackedInline):
     """
@@ -39,6 +39,17 @@ class CustomUserAdmin(UserAdmin):
             return ''
     get_department.short_description = 'Department'
 
+@admin.register(ExternalIdentity)
+class ExternalIdentityAdmin(admin.ModelAdmin):
+    """
+    Microsoft Entra accounts linked to users.
+    Created automatically on first SSO login; deleting
+    one makes the next login link by email again.
+    """
+    list_display = ['user', 'object_id', 'tenant_id', 'created_at']
+    search_fields = ['user__username', 'user__email', 'object_id']
+    raw_id_fields = ['user']
+
 # Unregister the default User admin
 # and replace with our custom version
 admin.site.unregister(User)
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import VERSION_CLAIM, current_token_version
+
+
+# Stateless alternative to SimpleJWT's JWTAuthentication, enabled with
+# JWT_STATELESS_AUTH=True (see settings.py). Instead of loading the User row
+# and then querying groups for every permission check, request.user is built
+# from the token's claims (accounts/tokens.py). The only per-request check
+# is the token_version comparison, which is served from the cache, so the
+# usual GET endpoints authenticate with zero queries.
+#
+# request.user is a real User instance (so it can be assigned to foreign keys
+# and compared with other users) holding only the claimed fields; any other
+# field is deferred and loaded from the database if a view reads it. Tokens
+# issued before the claims existed fall back to the normal row lookup.
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        # SimpleJWT writes the id claim as a string; the pk must have the
+        # model's type or the user never equals the real row.
+        user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        if validated_token[VERSION_CLAIM] != current_token_version(user_id):
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+
+        claims = {
+            'id': user_id,
+            'username': validated_token['username'],
+            'is_active': True,
+            'is_staff': validated_token['is_staff'],
+            'is_superuser': validated_token['is_superuser'],
+        }
+        fields = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+        user = User.from_db(None, fields, [claims[name] for name in fields])
+        user._group_names = frozenset(validated_token['groups'])
+        return user
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .models import ExternalIdentity
+
+# Group every new SSO account starts in: read-only Office & Events.
+DEFAULT_SSO_GROUP = 'office_viewer'
+
+# Group ids hardly ever change, so they are cached instead of looked up on
+# every first login. Deleting a group clears its entry (accounts/signals.py).
+GROUP_ID_CACHE_TTL = 60 * 60
+
+
+def group_cache_key(name):
+    return f'accounts:group_id:{name}'
+
+
+def group_id(name):
+    return cache.get_or_set(
+        group_cache_key(name),
+        lambda: Group.objects.get(name=name).pk,
+        GROUP_ID_CACHE_TTL,
+    )
+
+
+# Case-insensitive email match written as lower(email) = ..., the expression
+# indexed by migration 0004. (email__iexact compiles to UPPER(...) or LIKE,
+# which no index on the column can serve.)
+def user_by_email(email):
+    return User.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).first()
+
+
+def _link_or_create_user(tenant_id, object_id, email, payload):
+    with transaction.atomic():
+        user = user_by_email(email)
+        if user is None:
+            user = User.objects.create(
+                username=email,
+                email=email,
+                first_name=payload.get('given_name', ''),
+                last_name=payload.get('family_name', ''),
+            )
+            user.groups.add(group_id(DEFAULT_SSO_GROUP))
+        if object_id:
+            ExternalIdentity.objects.create(user=user, tenant_id=tenant_id, object_id=object_id)
+    return user
+
+
+# Returns the local User for a verified Microsoft token payload, creating it
+# on first login.
+# Returning users are found by their Entra object id: one indexed lookup.
+# Users without a linked identity yet (accounts created before SSO, or by an
+# admin) are matched by email once and linked. A brand-new user is created
+# with the default group, and user plus identity are written in one
+# transaction. If two first logins for the same person race, the loser's
+# transaction fails on the unique constraints (identity, or username) and
+# it picks up the winner's rows instead of creating a duplicate account.
+def resolve_sso_user(payload, email):
+    tenant_id, object_id = payload.get('tid', ''), payload.get('oid')
+    if object_id:
+        identity = ExternalIdentity.objects.select_related('user').filter(
+            tenant_id=tenant_id, object_id=object_id
+        ).first()
+        if identity is not None:
+            return identity.user
+
+    try:
+        return _link_or_create_user(tenant_id, object_id, email, payload)
+    except IntegrityError:
+        identity = ExternalIdentity.objects.select_related('user').filter(
+            tenant_id=tenant_id, object_id=object_id
+        ).first() if object_id else None
+        user = identity.user if identity is not None else user_by_email(email)
+        if user is None:
+            raise
+        return user
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from accounts.tokens import revoke_tokens
+
+
+class Command(BaseCommand):
+    help = 'Revokes every access and refresh token issued to the given users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Usernames whose tokens to revoke')
+        parser.add_argument('--all', action='store_true', help='Revoke the tokens of every user')
+
+    def handle(self, *args, **options):
+        """
+        Bumps each user's token_version (see accounts/tokens.py), so any token
+        issued before is rejected and the user has to log in again.
+        Use after a leaked token or a lost device.
+        """
+        if options['all']:
+            user_ids = list(User.objects.values_list('pk', flat=True))
+        elif options['usernames']:
+            found = dict(User.objects.filter(username__in=options['usernames']).values_list('username', 'pk'))
+            missing = sorted(set(options['usernames']) - set(found))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(missing)}")
+            user_ids = list(found.values())
+        else:
+            raise CommandError('Give one or more usernames, or --all.')
+
+        revoke_tokens(user_ids)
+        self.stdout.write(self.style.SUCCESS(f'Tokens revoked! {len(user_ids)} user(s) must log in again.'))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped to revoke every token issued to this user (see accounts/tokens.py)'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 02:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_token_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.CharField(max_length=64)),
+                ('object_id', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='external_identities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'External Identity',
+                'verbose_name_plural': 'External Identities',
+                'constraints': [models.UniqueConstraint(fields=('tenant_id', 'object_id'), name='unique_external_identity')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+# Functional index on auth_user (lower(email)) for SSO logins that fall back
+# to matching by email. auth.User belongs to Django, so the index can't be
+# declared in a model Meta; the expression is the one
+# accounts.identities.user_by_email filters on. The same SQL works on
+# PostgreSQL and SQLite.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_externalidentity'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX accounts_user_email_lower ON auth_user (LOWER(email))',
+            reverse_sql='DROP INDEX accounts_user_email_lower',
+        ),
+    ]
@@ -18,10 +18,58 @@ class UserProfile(models.Model):
         help_text="User's World Aquatics department"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped to revoke every token issued to this user (see accounts/tokens.py)"
+    )
 
     def __str__(self):
         return f"{self.user.username} — {self.department}"
 
+    def save(self, *args, **kwargs):
+        """
+        token_version only ever changes through accounts.tokens.revoke_tokens(),
+        so an existing profile never writes it back — a copy loaded before a
+        revocation (e.g. in the admin inline) would otherwise undo it.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'token_version'
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
+
+
+class ExternalIdentity(models.Model):
+    """
+    Links a Microsoft Entra ID account to a local User.
+    Keyed by the token's immutable object id (oid) within its
+    tenant (tid), so SSO login finds the user with one indexed
+    lookup and keeps working if the person's email changes.
+    Created on first SSO login (see accounts/identities.py).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='external_identities'
+    )
+    tenant_id = models.CharField(max_length=64)
+    object_id = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} — {self.object_id}"
+
+    class Meta:
+        verbose_name = "External Identity"
+        verbose_name_plural = "External Identities"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant_id', 'object_id'],
+                name='unique_external_identity'
+            ),
+        ]
@@ -3,8 +3,19 @@ from rest_framework.permissions import BasePermission
 SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
 
 
+# Names of the user's groups, read once per request and kept on the user
+# object, so stacked permission checks don't each query. Users authenticated
+# from token claims (accounts/authentication.py) arrive with them already set.
+def group_names(user):
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        user._group_names = names
+    return names
+
+
 def is_admin(user):
-    return user.is_superuser or user.groups.filter(name='admin').exists()
+    return user.is_superuser or 'admin' in group_names(user)
 
 
 # HasGiftsAccess: read-only for gifts_viewer, full access for gifts_access or admin.
@@ -14,10 +25,10 @@ class HasGiftsAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='gifts_access').exists():
+        if 'gifts_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='gifts_viewer').exists()
+            return 'gifts_viewer' in group_names(request.user)
         return False
 
 
@@ -28,10 +39,10 @@ class HasApparelAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='apparel_access').exists():
+        if 'apparel_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='apparel_viewer').exists()
+            return 'apparel_viewer' in group_names(request.user)
         return False
 
 
@@ -42,10 +53,10 @@ class HasExecutiveAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='executive_access').exists():
+        if 'executive_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='executive_viewer').exists()
+            return 'executive_viewer' in group_names(request.user)
         return False
 
 
@@ -56,10 +67,10 @@ class HasITAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='it_access').exists():
+        if 'it_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='it_viewer').exists()
+            return 'it_viewer' in group_names(request.user)
         return False
 
 
@@ -70,10 +81,10 @@ class HasOfficeAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='office_access').exists():
+        if 'office_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='office_viewer').exists()
+            return 'office_viewer' in group_names(request.user)
         return False
 
 
@@ -84,10 +95,10 @@ class HasMiscellaneousAccess(BasePermission):
             return False
         if is_admin(request.user):
             return True
-        if request.user.groups.filter(name='misc_access').exists():
+        if 'misc_access' in group_names(request.user):
             return True
         if request.method in SAFE_METHODS:
-            return request.user.groups.filter(name='misc_viewer').exists()
+            return 'misc_viewer' in group_names(request.user)
         return False
 
 
@@ -108,5 +119,16 @@ class HasRequestsAccess(BasePermission):
             request.user and
             request.user.is_authenticated and
             (is_admin(request.user) or
-             request.user.groups.filter(name='requests_access').exists())
+             'requests_access' in group_names(request.user))
+        )
+
+
+# HasDashboardAccess: reporting endpoints — admin, superuser, or dashboard_access group.
+class HasDashboardAccess(BasePermission):
+    def has_permission(self, request, view):
+        return bool(
+            request.user and
+            request.user.is_authenticated and
+            (is_admin(request.user) or
+             'dashboard_access' in group_names(request.user))
         )
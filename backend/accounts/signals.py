@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
-from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.contrib.auth.models import Group, User
 from django.dispatch import receiver
 from .models import UserProfile
+from .identities import group_cache_key
+from .tokens import revoke_tokens
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -21,3 +24,70 @@ def save_user_profile(sender, instance, **kwargs):
     """
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+# ============================================
+# TOKEN REVOCATION
+# ============================================
+# Tokens carry the user's username, flags and group names as claims
+# (accounts/tokens.py). Whenever one of those changes, or the password
+# does, every token already issued to that user is revoked so the next
+# request has to log in again with fresh claims.
+
+TOKEN_CLAIM_FIELDS = ('username', 'password', 'is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def detect_token_claim_changes(sender, instance, update_fields=None, **kwargs):
+    """
+    Notes whether a saved User changes anything tokens depend on.
+    Skips the lookup for new users and for saves that only touch
+    other fields (e.g. last_login).
+    """
+    fields = set(TOKEN_CLAIM_FIELDS) - instance.get_deferred_fields()
+    if update_fields is not None:
+        fields &= set(update_fields)
+    if instance._state.adding or not fields:
+        return
+    previous = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._revoke_tokens = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_claim_change(sender, instance, created, **kwargs):
+    if getattr(instance, '_revoke_tokens', False):
+        instance._revoke_tokens = False
+        revoke_tokens([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def revoke_tokens_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Revokes tokens when group membership changes, from either side:
+    user.groups.add(...) or group.user_set.add(...).
+    """
+    if reverse and action == 'pre_clear':
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            revoke_tokens([instance.pk])
+        elif action == 'post_clear':
+            revoke_tokens(getattr(instance, '_cleared_user_ids', []))
+        else:
+            revoke_tokens(pk_set)
+
+
+@receiver(pre_delete, sender=Group)
+def revoke_tokens_on_group_delete(sender, instance, **kwargs):
+    revoke_tokens(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def forget_cached_group_id(sender, instance, **kwargs):
+    """
+    Drops the cached id used for SSO sign-ups (accounts/identities.py),
+    so a group recreated by setup_groups is picked up.
+    """
+    cache.delete(group_cache_key(instance.name))
@@ -1,3 +1,213 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from accounts.authentication import ClaimsJWTAuthentication
+from accounts.identities import DEFAULT_SSO_GROUP, resolve_sso_user
+from accounts.models import ExternalIdentity, UserProfile
+from accounts.tokens import current_token_version, revoke_tokens, tokens_for
+from core.models import Department, TakeReason
+from gifts.models import Gift, GiftCategory
+from item_requests.models import ItemRequest, ItemRequestItem
+from item_requests.views import cancel_request, submit_request
+
+
+# ============================================
+# CLAIMS AUTHENTICATION
+# ============================================
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = Group.objects.create(name='gifts_viewer')
+        cls.user = User.objects.create_user('requester')
+        cls.user.groups.add(cls.staff)
+        cls.other = User.objects.create_user('colleague')
+
+    def setUp(self):
+        cache.clear()
+
+    # Authenticates a request carrying the access token the way the API does
+    # with JWT_STATELESS_AUTH=True. Returns request.user.
+    def authenticate(self, access_token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def assertRevoked(self, access_token):
+        cache.clear()  # as another process would see it once its cache entry expires
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access_token)
+
+    def test_user_is_built_from_the_claims(self):
+        access_token = tokens_for(self.user).access_token
+        current_token_version(self.user.pk)  # cached, as after the first request
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(access_token)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.username, 'requester')
+        self.assertEqual(user._group_names, frozenset({'gifts_viewer'}))
+
+    # Ownership checks compare request.user with a loaded User, so the
+    # claims user must be equal to the real row.
+    def test_claims_user_acts_on_their_own_request(self):
+        gift = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=5, unit_price=1,
+        )
+        item_request = ItemRequest.objects.create(
+            requested_by=self.user,
+            department=Department.objects.create(name='Events'),
+            reason=TakeReason.objects.create(reason_name='Gift'),
+            date_needed=date(2026, 12, 1),
+        )
+        ItemRequestItem.objects.create(request=item_request, item_type='gift', item_id=gift.pk, quantity_requested=2)
+
+        def call(view, user):
+            request = APIRequestFactory().patch('/')
+            force_authenticate(request, user=user)
+            return view(request, pk=item_request.pk)
+
+        owner = self.authenticate(tokens_for(self.user).access_token)
+        stranger = self.authenticate(tokens_for(self.other).access_token)
+        self.assertEqual(call(submit_request, stranger).status_code, 403)
+        self.assertEqual(call(submit_request, owner).status_code, 200)
+        self.assertEqual(call(cancel_request, stranger).status_code, 403)
+        self.assertEqual(call(cancel_request, owner).status_code, 200)
+
+    def test_claim_changes_revoke_tokens(self):
+        changes = {
+            'group added': lambda user: user.groups.add(Group.objects.create(name='office_viewer')),
+            'group removed': lambda user: user.groups.remove(self.staff),
+            'removed from the group side': lambda user: self.staff.user_set.remove(user),
+            'group cleared': lambda user: self.staff.user_set.clear(),
+            'group deleted': lambda user: self.staff.delete(),
+            'password changed': lambda user: (user.set_password('new-password'), user.save()),
+            'deactivated': lambda user: (setattr(user, 'is_active', False), user.save()),
+            'renamed': lambda user: (setattr(user, 'username', 'renamed'), user.save()),
+            'made staff': lambda user: (setattr(user, 'is_staff', True), user.save()),
+        }
+        for number, (change, apply) in enumerate(changes.items()):
+            with self.subTest(change=change):
+                user = User.objects.create_user(f'user-{number}')
+                user.groups.add(self.staff)
+                access_token = tokens_for(user).access_token
+                self.assertEqual(self.authenticate(access_token), user)
+
+                apply(User.objects.get(pk=user.pk))
+
+                self.assertRevoked(access_token)
+                self.staff, _ = Group.objects.get_or_create(name='gifts_viewer')
+
+    def test_unrelated_saves_keep_tokens(self):
+        access_token = tokens_for(self.user).access_token
+        self.user.first_name = 'Ria'
+        self.user.save()
+        User.objects.get(pk=self.user.pk).save(update_fields=['last_login'])
+        cache.clear()
+        self.assertEqual(self.authenticate(access_token), self.user)
+
+    def test_revoke_tokens(self):
+        no_profile = User.objects.create_user('legacy')
+        UserProfile.objects.filter(user=no_profile).delete()
+        tokens = {user: tokens_for(user).access_token for user in (self.user, no_profile, self.other)}
+        for user in tokens:
+            current_token_version(user.pk)
+
+        revoke_tokens([self.user.pk, no_profile.pk])
+
+        # The cache is cleared for the revoked users, so this process sees it at once
+        for user in (self.user, no_profile):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(tokens[user])
+        self.assertEqual(self.authenticate(tokens[self.other]), self.other)
+        self.assertEqual(UserProfile.objects.get(user=no_profile).token_version, 1)
+
+    def test_stale_refresh_token_is_rejected(self):
+        client = APIClient()
+        refresh = str(tokens_for(self.user))
+
+        response = client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        new_access = response.json()['access']
+        self.assertEqual(self.authenticate(new_access), self.user)
+
+        self.user.groups.remove(self.staff)
+        response = client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertRevoked(new_access)
+
+        # A fresh login carries the new claims
+        user = self.authenticate(tokens_for(User.objects.get(pk=self.user.pk)).access_token)
+        self.assertEqual(user._group_names, frozenset())
+
+
+# ============================================
+# SSO USERS
+# ============================================
+
+class SsoUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewers = Group.objects.create(name=DEFAULT_SSO_GROUP)
+
+    def setUp(self):
+        cache.clear()
+
+    def payload(self, oid='oid-1', **claims):
+        return {'tid': 'tenant', 'oid': oid, 'given_name': 'Ria', 'family_name': 'Okafor', **claims}
+
+    def test_returning_user_is_found_by_identity(self):
+        user = User.objects.create_user('ria', email='ria@example.com')
+        ExternalIdentity.objects.create(user=user, tenant_id='tenant', object_id='oid-1')
+
+        # The email may have changed since; the identity still finds the user
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_sso_user(self.payload(), 'ria.okafor@example.com'), user)
+
+    def test_existing_account_is_linked_by_email(self):
+        user = User.objects.create_user('ria', email='Ria@Example.com')
+
+        self.assertEqual(resolve_sso_user(self.payload(), 'ria@example.com'), user)
+
+        self.assertEqual(
+            list(user.external_identities.values_list('tenant_id', 'object_id')), [('tenant', 'oid-1')],
+        )
+        self.assertFalse(user.groups.exists())  # an existing account keeps its own groups
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_first_login_creates_a_viewer(self):
+        user = resolve_sso_user(self.payload(), 'ria@example.com')
+
+        self.assertEqual(
+            (user.username, user.email, user.first_name, user.last_name),
+            ('ria@example.com', 'ria@example.com', 'Ria', 'Okafor'),
+        )
+        self.assertEqual(list(user.groups.all()), [self.viewers])
+        self.assertEqual(resolve_sso_user(self.payload(), 'ria@example.com'), user)
+
+    def test_losing_a_first_login_race_uses_the_winners_account(self):
+        def won_elsewhere(tenant_id, object_id, email, payload):
+            winner = User.objects.create_user(email, email=email)
+            if object_id:
+                ExternalIdentity.objects.create(user=winner, tenant_id=tenant_id, object_id=object_id)
+            raise IntegrityError('duplicate key')
+
+        for number, oid in enumerate(['oid-1', None]):
+            with self.subTest(oid=oid):
+                email = f'user-{number}@example.com'
+                with mock.patch('accounts.identities._link_or_create_user', side_effect=won_elsewhere):
+                    user = resolve_sso_user(self.payload(oid=oid), email)
+                self.assertEqual(user, User.objects.get(username=email))
+
+        with mock.patch('accounts.identities._link_or_create_user', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                resolve_sso_user(self.payload(oid='oid-3'), 'nobody@example.com')
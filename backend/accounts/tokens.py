@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserProfile
+from .permissions import group_names
+
+
+# Claims carried by every token this app issues, on top of SimpleJWT's own.
+# They let accounts.authentication.ClaimsJWTAuthentication build request.user
+# without reading the database:
+#   username, is_superuser, is_staff - copied from the User row
+#   groups                           - the user's group names, i.e. everything
+#                                      accounts/permissions.py checks
+#   token_version                    - UserProfile.token_version when issued
+#
+# Revocation: bumping a user's token_version (revoke_tokens) invalidates
+# every token issued before, access and refresh alike. It is bumped
+# automatically whenever a claim would go stale: group membership changes,
+# the account is deactivated, the password or username changes
+# (accounts/signals.py), or explicitly with `manage.py revoke_tokens`.
+VERSION_CLAIM = 'token_version'
+
+# How long a user's current token_version is cached per process. Revocation
+# is immediate in the process that made the change (and everywhere, with a
+# shared cache backend); other processes notice within this many seconds.
+TOKEN_VERSION_CACHE_TTL = 60
+
+# Stored in the cache for users who no longer exist or are inactive, so
+# their tokens fail the version check too.
+NO_VERSION = -1
+
+
+def _cache_key(user_id):
+    return f'accounts:token_version:{user_id}'
+
+
+def _stored_version(user_id):
+    row = User.objects.filter(pk=user_id).values_list('is_active', 'profile__token_version').first()
+    if row is None or not row[0]:
+        return NO_VERSION
+    return row[1] or 0
+
+
+# The user's current token_version, from the cache when possible.
+def current_token_version(user_id):
+    key = _cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _stored_version(user_id)
+        cache.set(key, version, TOKEN_VERSION_CACHE_TTL)
+    return version
+
+
+# Invalidates every token issued so far to the given users.
+def revoke_tokens(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    with_profile = set(
+        UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    UserProfile.objects.filter(user_id__in=with_profile).update(token_version=F('token_version') + 1)
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_id, token_version=1) for user_id in user_ids - with_profile],
+        ignore_conflicts=True,
+    )
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again after commit, in case a concurrent request cached the old value meanwhile
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_claims(token, user):
+    token['username'] = user.get_username()
+    token['is_superuser'] = user.is_superuser
+    token['is_staff'] = user.is_staff
+    token['groups'] = sorted(group_names(user))
+    token[VERSION_CLAIM] = _stored_version(user.pk)
+    return token
+
+
+# Refresh/access pair for a user, with the claims above. Used by every login
+# path (/api/token/ and Microsoft SSO) so all tokens look the same.
+def tokens_for(user):
+    return add_claims(RefreshToken.for_user(user), user)
+
+
+# POST /api/token/ — username/password login.
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return tokens_for(user)
+
+
+# POST /api/token/refresh/ — rejects revoked refresh tokens and re-reads the
+# claims, so a new access token always reflects current group membership.
+# Refresh tokens issued before token_version existed count as version 0.
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM), is_active=True).first()
+        if user is None or refresh.get(VERSION_CLAIM, 0) != _stored_version(user.pk):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        return {'access': str(add_claims(refresh.access_token, user))}
@@ -2,9 +2,9 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.contrib.auth.models import User, Group
-from rest_framework_simplejwt.tokens import RefreshToken
+from .identities import resolve_sso_user
 from .microsoft_auth import verify_microsoft_token
+from .tokens import tokens_for
 
 # Create your views here.
 
@@ -30,19 +30,12 @@ class MicrosoftLoginView(APIView):
         if not email:
             return Response({'error': 'No email in token'}, status=400)
 
-        # Look up an existing user by email (case-insensitive).
-        user = User.objects.filter(email__iexact=email).first()
-
-        if not user:
-            # No account yet — create one and give it read-only access to
-            # Office & Events by default.
-            first_name = payload.get('given_name', '')
-            last_name = payload.get('family_name', '')
-            user = User.objects.create(username=email, email=email, first_name=first_name, last_name=last_name)
-            office_viewer_group = Group.objects.get(name='office_viewer')
-            user.groups.add(office_viewer_group)
+        # Find the user by their Entra object id, linking an existing account
+        # by email or creating one with read-only access to Office & Events
+        # on first login (see accounts/identities.py).
+        user = resolve_sso_user(payload, email)
 
         # Issue our own JWT pair for this user, the same way /api/token/ does for
         # normal username/password login, so the frontend can treat both the same way.
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for(user)
         return Response({'access': str(refresh.access_token), 'refresh': str(refresh)}, status=200)
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apparel', '0004_apparel_transaction_reason_fk_to_stockadjustmentreason'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apparelsize',
+            index=models.Index(fields=['size_type', 'display_order'], name='apparelsize_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appareltransaction',
+            index=models.Index(fields=['variant', '-created_at'], name='apparel_txn_history_idx'),
+        ),
+    ]
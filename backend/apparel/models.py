@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User
 from core.models import StockAdjustmentReason
 
@@ -36,6 +37,9 @@ class ApparelSize(models.Model):
     class Meta:
         ordering = ['size_type', 'display_order']
         unique_together = ['size_value', 'size_type']
+        indexes = [
+            models.Index(fields=['size_type', 'display_order'], name='apparelsize_order_idx'),
+        ]
         verbose_name = "Apparel Size"
         verbose_name_plural = "Apparel Sizes"
 
@@ -209,6 +213,10 @@ class ApparelProduct(models.Model):
         help_text="Internal notes for staff reference"
     )
 
+    # PDFs attached through documents.Document. Lets list views count them in
+    # one grouped subquery, and deletes an item's documents along with it.
+    documents = GenericRelation('documents.Document')
+
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         User,
@@ -404,6 +412,10 @@ class ApparelTransaction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Apparel Transaction"
         verbose_name_plural = "Apparel Transactions"
+        indexes = [
+            # One item's history, newest first
+            models.Index(fields=['variant', '-created_at'], name='apparel_txn_history_idx'),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type.upper()}: {self.quantity}x {self.variant} by {self.created_by}"
@@ -4,7 +4,7 @@ from apparel.models import (
     ApparelSize, ApparelColor, ApparelCategory,
     ApparelProduct, ApparelVariant, ApparelTransaction
 )
-from core.serializers import StockAdjustmentReasonSerializer
+from core.serializers import StockAdjustmentReasonSerializer, ImageDerivativesField
 
 
 # ============================================
@@ -119,6 +119,9 @@ class ApparelProductSerializer(serializers.ModelSerializer):
 
     variants = ApparelVariantSerializer(many=True, read_only=True)
 
+    product_image_derivatives = ImageDerivativesField(source='product_image')
+    document_count = serializers.IntegerField(read_only=True)  # only with ?include=document_count
+
     class Meta:
         model = ApparelProduct
         fields = [
@@ -126,7 +129,7 @@ class ApparelProductSerializer(serializers.ModelSerializer):
             'material', 'description', 'hs_code',
             'merchant_product_id', 'manufacturer_product_id', 'standardised_product_id',
             'supplier_name', 'supplier_email', 'supplier_phone', 'supplier_address',
-            'unit_price', 'country_of_origin', 'product_image', 'notes', 'variants',
+            'unit_price', 'country_of_origin', 'product_image', 'product_image_derivatives', 'document_count', 'notes', 'variants',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -1,3 +1,94 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+
+from accounts.tokens import tokens_for
+from apparel.models import (
+    ApparelCategory, ApparelColor, ApparelProduct, ApparelSize, ApparelTransaction, ApparelVariant,
+)
+from core.models import StockAdjustmentReason
+
+
+# ============================================
+# VARIANT MATRIX
+# ============================================
+
+class VariantMatrixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('apparel')
+        cls.product = ApparelProduct.objects.create(
+            product_name='Team polo', category=ApparelCategory.objects.create(name='Polos'), unit_price=Decimal('12.00'),
+        )
+        cls.small = ApparelSize.objects.create(size_value='S', size_type='clothing')
+        cls.medium = ApparelSize.objects.create(size_value='M', size_type='clothing')
+        cls.navy = ApparelColor.objects.create(color_name='Navy')
+        cls.white = ApparelColor.objects.create(color_name='White')
+        cls.restock = StockAdjustmentReason.objects.create(name='Restock')
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def post(self, body):
+        return self.client.post(
+            f'/api/apparel/products/{self.product.pk}/variants/matrix/', body,
+            content_type='application/json', **self.auth,
+        )
+
+    def ledger(self):
+        return sorted(
+            (row.variant.size_id, row.variant.color_id, row.variant.gender, row.quantity, row.stock_after)
+            for row in ApparelTransaction.objects.filter(notes='Initial stock', reason=self.restock)
+        )
+
+    def test_grid_is_created_with_opening_stock(self):
+        response = self.post({
+            'sizes': [self.small.pk, self.medium.pk], 'colors': [str(self.navy.pk)], 'genders': ['M', 'W'],
+            'qty_stock': 3,
+            'cells': [{'size_id': self.small.pk, 'color_id': self.navy.pk, 'gender': 'W', 'qty_stock': 0}],
+        })
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()['variants']), 4)
+        self.assertEqual(self.ledger(), [
+            (self.small.pk, self.navy.pk, 'M', 3, 3),
+            (self.medium.pk, self.navy.pk, 'M', 3, 3),
+            (self.medium.pk, self.navy.pk, 'W', 3, 3),
+        ])
+
+    def test_existing_cells_are_left_alone(self):
+        ApparelVariant.objects.create(product=self.product, size=self.small, color=self.navy, qty_stock=9)
+
+        response = self.post({'sizes': [self.small.pk], 'colors': [self.navy.pk, self.white.pk], 'qty_stock': 2})
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.ledger(), [(self.small.pk, self.white.pk, 'U', 2, 2)])
+        self.assertEqual(ApparelVariant.objects.get(size=self.small, color=self.navy).qty_stock, 9)
+
+        # Repeating the request creates nothing and writes no ledger rows
+        response = self.post({'sizes': [self.small.pk], 'colors': [self.navy.pk, self.white.pk], 'qty_stock': 2})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(self.ledger()), 1)
+
+    def test_malformed_lists_are_rejected(self):
+        valid = {'sizes': [self.small.pk], 'colors': [self.navy.pk], 'genders': ['U']}
+        for field, value in [
+            ('sizes', str(self.small.pk)),
+            ('sizes', [[self.small.pk]]),
+            ('sizes', [1.5]),
+            ('sizes', [True]),
+            ('colors', {str(self.navy.pk): 1}),
+            ('colors', ['navy']),
+            ('genders', 'U'),
+            ('genders', [['U']]),
+            ('genders', [{'code': 'U'}]),
+            ('genders', ['X']),
+        ]:
+            with self.subTest(field=field, value=value):
+                response = self.post({**valid, field: value})
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn('error', response.json())
+        self.assertFalse(ApparelVariant.objects.exists())
@@ -26,6 +26,10 @@ urlpatterns = [
     # DELETE cascades to remove all variants for that product
     path("products/<int:pk>/", views.ApparelProductDetail.as_view(), name="apparel-product-detail"),
 
+    # POST create all size x colour x gender variants of a product in one request
+    # Returns the product's full variant grid
+    path("products/<int:pk>/variants/matrix/", views.create_variant_matrix, name="apparel-variant-matrix"),
+
     # ============================================
     # VARIANTS
     # ============================================
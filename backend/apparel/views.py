@@ -1,3 +1,5 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import HasApparelAccess
@@ -15,6 +17,9 @@ from apparel.models import (
     ApparelProduct, ApparelVariant, ApparelTransaction
 )
 from core.models import StockAdjustmentReason
+from core.replicas import ReplicaReadMixin
+from core.identifiers import sync_identifiers
+from documents.includes import DocumentCountMixin
 
 
 # ============================================
@@ -52,15 +57,25 @@ class ApparelCategoryList(generics.ListAPIView):
 # APPAREL PRODUCT VIEWS
 # ============================================
 
+# Products with their category, primary colour and every variant (with its
+# size and colour) loaded up front: three queries however many products and
+# variants are listed. The variants' product is set from the prefetch, so
+# product_name costs nothing either.
+def _product_queryset():
+    return ApparelProduct.objects.select_related('category', 'primary_color').prefetch_related(
+        Prefetch('variants', queryset=ApparelVariant.objects.select_related('size', 'color'))
+    )
+
+
 # Lists all products or creates a new one.
 # GET  /api/apparel/products/  - returns every product with its nested variants.
 # POST /api/apparel/products/  - creates a new product, setting created_by automatically.
 # Each product record is the base item (name, price, image, customs data).
 # Stock is tracked per variant, not at the product level.
-class ApparelProductListCreate(generics.ListCreateAPIView):
+class ApparelProductListCreate(DocumentCountMixin, generics.ListCreateAPIView):
     serializer_class = ApparelProductSerializer
     permission_classes = [HasApparelAccess]
-    queryset = ApparelProduct.objects.all()
+    queryset = _product_queryset()
 
     def perform_create(self, serializer):
         if serializer.is_valid():
@@ -77,7 +92,7 @@ class ApparelProductListCreate(generics.ListCreateAPIView):
 class ApparelProductDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ApparelProductSerializer
     permission_classes = [HasApparelAccess]
-    queryset = ApparelProduct.objects.all()
+    queryset = _product_queryset()
 
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user)
@@ -98,7 +113,7 @@ class ApparelVariantListCreate(generics.ListCreateAPIView):
     permission_classes = [HasApparelAccess]
 
     def get_queryset(self):
-        queryset = ApparelVariant.objects.all()
+        queryset = ApparelVariant.objects.select_related('product', 'size', 'color')
         product_id = self.request.query_params.get('product_id')
         if product_id:
             queryset = queryset.filter(product_id=product_id)
@@ -119,12 +134,150 @@ class ApparelVariantListCreate(generics.ListCreateAPIView):
 class ApparelVariantDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ApparelVariantSerializer
     permission_classes = [HasApparelAccess]
-    queryset = ApparelVariant.objects.all()
+    queryset = ApparelVariant.objects.select_related('product', 'size', 'color')
 
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user)
 
 
+# Creates every size x colour x gender variant of a product in one request.
+# POST /api/apparel/products/{id}/variants/matrix/
+# Body:
+#   sizes, colors        - lists of ApparelSize / ApparelColor IDs
+#   genders              - list of gender codes (U, M, W, Y); defaults to ["U"]
+#   qty_stock            - initial stock for every cell (default 0)
+#   minimum_stock_level  - low-stock threshold for every cell (default 5)
+#   cells                - optional per-cell overrides:
+#                          [{"size_id", "color_id", "gender", "qty_stock", "minimum_stock_level", "sku"}]
+#
+# Sizes and colours are checked against reference tables loaded once, so
+# validation does not query per cell. Combinations that already exist are
+# left untouched. Matrix requests for the same product take turns (the
+# product row is locked), so the cells inserted are exactly the ones this
+# request created; a variant added meanwhile through another endpoint hits
+# the product/size/color/gender unique_together and the request is refused
+# with 409 rather than claiming it. New cells with initial stock get an
+# opening 'Restock' transaction so their stock has an audit trail.
+# Returns the product's full variant grid.
+@api_view(['POST'])
+@permission_classes([HasApparelAccess])
+def create_variant_matrix(request, pk):
+    try:
+        product = ApparelProduct.objects.get(pk=pk)
+    except ApparelProduct.DoesNotExist:
+        return Response(
+            {"error": "Product not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    size_ids = set(ApparelSize.objects.values_list('pk', flat=True))
+    color_ids = set(ApparelColor.objects.values_list('pk', flat=True))
+    gender_codes = {code for code, _ in ApparelVariant.VARIANT_GENDER_CHOICES}
+
+    def whole_number(value, default):
+        if value in (None, ''):
+            return default
+        number = int(value)
+        if number < 0:
+            raise ValueError
+        return number
+
+    def id_list(value):
+        if not isinstance(value, list):
+            raise TypeError
+        if any(isinstance(entry, bool) or not isinstance(entry, (int, str)) for entry in value):
+            raise TypeError
+        return [int(entry) for entry in value]
+
+    try:
+        sizes = id_list(request.data.get('sizes') or [])
+        colors = id_list(request.data.get('colors') or [])
+        default_qty = whole_number(request.data.get('qty_stock'), 0)
+        default_minimum = whole_number(request.data.get('minimum_stock_level'), 5)
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "sizes and colors must be lists of IDs; quantities must be whole numbers (0 or more)."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    genders = request.data.get('genders') or ['U']
+    if not isinstance(genders, list) or not all(isinstance(gender, str) for gender in genders):
+        return Response(
+            {"error": "genders must be a list of gender codes."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    errors = []
+    if not sizes or not colors:
+        errors.append("At least one size and one colour are required.")
+    errors += [f"Size #{size} does not exist." for size in sizes if size not in size_ids]
+    errors += [f"Colour #{color} does not exist." for color in colors if color not in color_ids]
+    errors += [f"Invalid gender '{gender}'." for gender in genders if gender not in gender_codes]
+    if errors:
+        return Response({"error": " ".join(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+    cells = {
+        (size, color, gender): {'qty_stock': default_qty, 'minimum_stock_level': default_minimum, 'sku': ''}
+        for size in sizes for color in colors for gender in genders
+    }
+    for override in request.data.get('cells') or []:
+        try:
+            key = (int(override.get('size_id')), int(override.get('color_id')), override.get('gender', 'U'))
+            if key not in cells:
+                errors.append(f"Cell {key} is not part of the requested sizes, colours and genders.")
+                continue
+            cells[key] = {
+                'qty_stock': whole_number(override.get('qty_stock'), cells[key]['qty_stock']),
+                'minimum_stock_level': whole_number(override.get('minimum_stock_level'), cells[key]['minimum_stock_level']),
+                'sku': str(override.get('sku') or '')[:100],
+            }
+        except (AttributeError, TypeError, ValueError):
+            errors.append(f"Invalid cell override: {override}")
+    if errors:
+        return Response({"error": " ".join(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with transaction.atomic():
+            ApparelProduct.objects.select_for_update().filter(pk=product.pk).first()
+            existing = set(product.variants.values_list('size_id', 'color_id', 'gender'))
+            created = ApparelVariant.objects.bulk_create([
+                ApparelVariant(
+                    product=product, size_id=size, color_id=color, gender=gender,
+                    created_by=request.user, updated_by=request.user, **values,
+                )
+                for (size, color, gender), values in cells.items()
+                if (size, color, gender) not in existing
+            ])
+
+            sync_identifiers(ApparelVariant, created)  # bulk_create skips the post_save signal
+
+            restock_reason = StockAdjustmentReason.objects.filter(name='Restock').first()
+            ApparelTransaction.objects.bulk_create([
+                ApparelTransaction(
+                    variant=variant,
+                    transaction_type='return',
+                    quantity=variant.qty_stock,
+                    reason=restock_reason,
+                    notes='Initial stock',
+                    created_by=request.user,
+                    stock_before=0,
+                    stock_after=variant.qty_stock,
+                )
+                for variant in created
+                if variant.qty_stock > 0
+            ])
+    except IntegrityError:
+        return Response(
+            {"error": "Some of these variants were just created by someone else. Reload and try again."},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    grid = list(product.variants.select_related('product', 'size', 'color'))
+    return Response({
+        "message": f"{len(created)} variants created, {len(cells) - len(created)} already existed.",
+        "variants": ApparelVariantSerializer(grid, many=True).data,
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
 # Handles manual stock adjustments from the admin stock adjust modal.
 # PATCH /api/apparel/variants/update-stock/{id}/
 #
@@ -223,12 +376,14 @@ def update_apparel_stock(request, pk):
 #   ?variant_id=5    - history for a single size/colour variant
 #   ?product_id=3    - history for all variants of a product (used by the History modal)
 # Results are ordered newest first (from model's Meta.ordering).
-class ApparelTransactionList(generics.ListAPIView):
+class ApparelTransactionList(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ApparelTransactionSerializer
     permission_classes = [HasApparelAccess]
 
     def get_queryset(self):
-        queryset = ApparelTransaction.objects.all()
+        queryset = ApparelTransaction.objects.select_related(
+            'variant__product', 'variant__size', 'variant__color', 'reason', 'created_by'
+        )
 
         variant_id = self.request.query_params.get('variant_id')
         if variant_id:
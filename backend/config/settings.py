@@ -1,7 +1,9 @@
 from pathlib import Path
+import copy
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv()
 
@@ -23,9 +25,14 @@ CSRF_TRUSTED_ORIGINS = [
     'https://inventory.worldaquatics.com',
 ]
 
+# Set JWT_STATELESS_AUTH=True to authenticate API requests from the token's
+# claims alone, without loading the user row (see accounts/authentication.py).
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'False') == 'True'
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication" if JWT_STATELESS_AUTH
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -35,6 +42,9 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=8),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    # Adds username, groups and token_version claims and checks revocation on refresh
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.tokens.ClaimsTokenRefreshSerializer",
 }
 
 
@@ -56,8 +66,10 @@ INSTALLED_APPS = [
     "miscellaneous",
     "documents",
     "executive",
+    "reports",
     "rest_framework",
     'import_export',
+    "django_tasks_db",
 ]
 
 # Edit 7.5 — WhiteNoiseMiddleware added directly after SecurityMiddleware
@@ -103,8 +115,46 @@ if 'AZURE_POSTGRESQL_HOST' in os.environ:
             'USER': os.environ['AZURE_POSTGRESQL_USER'],
             'PASSWORD': os.environ['AZURE_POSTGRESQL_PASSWORD'],
             'PORT': '5432',
+            'OPTIONS': {
+                # Abort any single statement that runs longer than this (ms) instead
+                # of letting it hold locks and a worker indefinitely; 0 disables it.
+                # startup.sh runs migrations with it disabled, and the batch
+                # management commands lift it themselves (core/db.py).
+                'options': f"-c statement_timeout={os.environ.get('DB_STATEMENT_TIMEOUT_MS', '30000')}",
+            },
         }
     }
+
+    # Connections to Azure cost a TCP + TLS handshake and authentication, so
+    # they are reused rather than opened per request. By default each Gunicorn
+    # worker keeps a small psycopg connection pool (Django's native pooling);
+    # DB_POOL=False switches to Django's persistent connections instead, which
+    # also works behind an external pooler such as PgBouncer.
+    # Either way each connection is checked before use, so one dropped by
+    # Azure (idle timeout, failover) is replaced instead of failing a request.
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    if os.environ.get('DB_POOL', 'True') == 'True':
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+            'timeout': 10,        # seconds to wait for a free connection before failing
+            'max_idle': 300,      # close connections idle for 5 minutes
+            'max_lifetime': 1800, # and recycle every connection after 30 minutes
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+
+    # Optional read replica for reporting and history endpoints (see
+    # core/replicas.py). Same credentials and connection settings as the
+    # primary; AZURE_POSTGRESQL_REPLICA_NAME only matters for local testing
+    # against a second database.
+    if 'AZURE_POSTGRESQL_REPLICA_HOST' in os.environ:
+        DATABASES['replica'] = copy.deepcopy(DATABASES['default'])
+        DATABASES['replica']['HOST'] = os.environ['AZURE_POSTGRESQL_REPLICA_HOST']
+        DATABASES['replica']['NAME'] = os.environ.get('AZURE_POSTGRESQL_REPLICA_NAME', DATABASES['default']['NAME'])
+        DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+        DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+        MIDDLEWARE.append('core.replicas.ReplicaPinMiddleware')
 else:
     DATABASES = {
         'default': {
@@ -113,6 +163,29 @@ else:
         }
     }
 
+    # Production profile for small deployments running on SQLite. Out of the
+    # box SQLite uses a rollback journal, where a writer blocks every reader,
+    # and Django's deferred transactions read first and only then ask for the
+    # write lock, which SQLite refuses straight away ("database is locked")
+    # if another connection wrote in between: waiting could deadlock.
+    # - transaction_mode IMMEDIATE: atomic() blocks, i.e. the stock and admin
+    #   writes, take the write lock up front and queue for it instead.
+    # - WAL: readers and the writer no longer block each other.
+    # - synchronous=NORMAL: safe with WAL (a power cut can lose only the last
+    #   commits, never corrupt the file) and avoids an fsync per commit.
+    # - busy_timeout: how long a writer waits for the lock before failing.
+    # - mmap_size: reads served from memory-mapped pages instead of read().
+    # The PRAGMAs are applied to every new connection by core/signals.py.
+    # SQLITE_TUNING=False restores SQLite's defaults (e.g. for benchmarking).
+    if os.environ.get('SQLITE_TUNING', 'True') == 'True':
+        DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+        SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,  # ms
+            'mmap_size': 128 * 1024 * 1024,
+        }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -184,6 +257,21 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background tasks (django.tasks) — used to normalise uploaded product images
+# and to render document previews and extract their text after the request
+# returns. Tasks are queued in the database (django-tasks-db) and run by
+# `python manage.py db_worker`, which startup.sh starts next to Gunicorn in
+# the same container: IMAGE_SPOOL_DIR must be on a disk the worker can read.
+# For local development without a worker, set TASKS_BACKEND to
+# django.tasks.backends.immediate.ImmediateBackend to run tasks in-process
+# right after the transaction commits.
+TASKS = {
+    "default": {
+        "BACKEND": os.environ.get('TASKS_BACKEND', 'django_tasks_db.DatabaseBackend'),
+    },
+}
+IMAGE_SPOOL_DIR = os.environ.get('IMAGE_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'image-spool'))
+
 # Email (SMTP) settings — used to send real emails via an SMTP server
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # Address of the SMTP server to connect to
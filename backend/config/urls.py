@@ -7,7 +7,9 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.views import View
-from django.http import FileResponse, Http404
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from core.spa import load_shell, negotiate_encoding
 from core.views import CreateUserView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
@@ -17,15 +19,41 @@ import os
 
 # Serves the React build's index.html for any URL not matched by the API.
 # React Router then takes over and renders the correct page client-side.
+# The file is held in memory with its ETag and gzip/brotli variants (see
+# core/spa.py), so a revisit is usually a 304 with no body at all.
+# no-cache makes browsers revalidate every time: the shell names the hashed
+# JS/CSS bundles, so a stale copy would keep loading an old build.
 # Raises 404 if the frontend hasn't been built yet (run npm run build first).
 class ReactAppView(View):
     def get(self, request, *args, **kwargs):
         index_path = settings.BASE_DIR / 'frontend' / 'dist' / 'index.html'
         try:
-            return FileResponse(open(index_path, 'rb'), content_type='text/html')
+            shell = load_shell(index_path)
         except FileNotFoundError:
             raise Http404("Frontend build not found. Run 'npm run build' in the frontend directory.")
 
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Compare weakly: proxies that re-compress turn the tag into W/"..."
+            tags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+            if '*' in tags or shell.etag in tags:
+                response = HttpResponseNotModified()
+                self._set_cache_headers(response, shell)
+                return response
+
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'), shell.variants)
+        response = HttpResponse(shell.variants[encoding], content_type='text/html; charset=utf-8')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = len(shell.variants[encoding])
+        self._set_cache_headers(response, shell)
+        return response
+
+    def _set_cache_headers(self, response, shell):
+        response['ETag'] = shell.etag
+        response['Cache-Control'] = 'no-cache'
+        response['Vary'] = 'Accept-Encoding'
+
 
 urlpatterns = [
     # Django admin panel — manage users, groups, and model data through the browser
@@ -53,6 +81,7 @@ urlpatterns = [
     path("api/documents/", include("documents.urls")),       # shared file attachments
     path("api/executive/", include("executive.urls")),       # executive office inventory
     path("api/auth/", include("accounts.urls")),             # Microsoft SSO login
+    path("api/reports/", include("reports.urls")),           # stock snapshots and reporting
 
     # Catch-all — must be last. Serves React's index.html for all non-API routes.
     re_path(r'^(?!api/).*$', ReactAppView.as_view(), name='react-app'),
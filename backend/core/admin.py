@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TakeReason, Department, StockAdjustmentReason
+from .models import TakeReason, Department, StockAdjustmentReason, Stocktake, ItemIdentifier
 
 @admin.register(TakeReason)
 class TakeReasonAdmin(admin.ModelAdmin):
@@ -31,3 +31,24 @@ class StockAdjustmentReasonAdmin(admin.ModelAdmin):
     """
     list_display = ['name', 'created_at']
     search_fields = ['name']
+
+@admin.register(Stocktake)
+class StocktakeAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Stocktake sessions.
+    Read-mostly: sessions are started, counted and applied
+    through the /api/stocktakes/ endpoints.
+    """
+    list_display = ['name', 'status', 'created_at', 'created_by', 'applied_at']
+    list_filter = ['status']
+
+@admin.register(ItemIdentifier)
+class ItemIdentifierAdmin(admin.ModelAdmin):
+    """
+    Admin view of the scan code index.
+    Rows are maintained automatically when items are saved;
+    run rebuild_identifier_index to regenerate them.
+    """
+    list_display = ['code', 'item_type', 'item_id', 'source']
+    list_filter = ['item_type', 'source']
+    search_fields = ['code']
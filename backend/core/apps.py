@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """
+        Imports signals so the item identifier index is kept up to date
+        whenever an inventory item is saved or deleted.
+        """
+        import core.signals
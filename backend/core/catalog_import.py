@@ -0,0 +1,486 @@
+import csv
+import io
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.identifiers import sync_identifiers
+from core.models import Department, StockAdjustmentReason
+from gifts.models import Gift, GiftCategory, InventoryTransaction
+from gifts.serializers import GiftSerializer
+from apparel.models import (
+    ApparelProduct, ApparelVariant, ApparelTransaction, ApparelCategory, ApparelColor, ApparelSize,
+)
+from apparel.serializers import ApparelProductSerializer, ApparelVariantSerializer
+from office.models import OfficeItem, OfficeCategory, OfficeTransaction
+from office.serializers import OfficeItemSerializer
+from miscellaneous.models import MiscellaneousItem, MiscellaneousCategory, MiscellaneousTransaction
+from miscellaneous.serializers import MiscellaneousItemSerializer
+from executive.models import ExecutiveItem, ExecutiveCategory, ExecutiveTransaction
+from executive.serializers import ExecutiveItemSerializer
+
+
+# Rows are validated and written this many at a time, so memory stays flat
+# however long the spreadsheet is.
+BATCH_SIZE = 500
+
+# Caps on how many per-row errors and dry-run changes are returned.
+MAX_REPORTED = 200
+
+# Notes written on the opening-stock ledger entry for newly imported items.
+OPENING_STOCK_NOTES = 'Opening stock from catalog import'
+
+
+# IMPORTERS describes how spreadsheet rows map onto each inventory.
+#
+#   model             - the product model rows are matched against by
+#                       merchant_product_id (for apparel this is the product;
+#                       variants are handled separately)
+#   serializer        - the serializer whose field rules rows are validated with
+#   transaction_model - ledger the opening stock entry is written to
+#   transaction_fk    - name of the FK on the transaction pointing at the item
+#   lookups           - spreadsheet columns given by name instead of ID:
+#                       column -> (model, name field, serializer write field)
+#
+# Columns use the serializer field names (product_name, unit_price,
+# supplier_email, ...). Relations are given by name (category, department,
+# primary_color) and resolved from maps loaded once per import.
+IMPORTERS = {
+    'gift': {
+        'model': Gift,
+        'serializer': GiftSerializer,
+        'transaction_model': InventoryTransaction,
+        'transaction_fk': 'gift',
+        'lookups': {
+            'category': (GiftCategory, 'name', 'category_id'),
+        },
+    },
+    'apparel': {
+        'model': ApparelProduct,
+        'serializer': ApparelProductSerializer,
+        'transaction_model': ApparelTransaction,
+        'transaction_fk': 'variant',
+        'lookups': {
+            'category': (ApparelCategory, 'name', 'category_id'),
+            'primary_color': (ApparelColor, 'color_name', 'primary_color_id'),
+        },
+    },
+    'executive': {
+        'model': ExecutiveItem,
+        'serializer': ExecutiveItemSerializer,
+        'transaction_model': ExecutiveTransaction,
+        'transaction_fk': 'item',
+        'lookups': {
+            'category': (ExecutiveCategory, 'name', 'category_id'),
+        },
+    },
+    'office': {
+        'model': OfficeItem,
+        'serializer': OfficeItemSerializer,
+        'transaction_model': OfficeTransaction,
+        'transaction_fk': 'item',
+        'lookups': {
+            'category': (OfficeCategory, 'name', 'category_id'),
+            'department': (Department, 'name', 'department_id'),
+        },
+    },
+    'miscellaneous': {
+        'model': MiscellaneousItem,
+        'serializer': MiscellaneousItemSerializer,
+        'transaction_model': MiscellaneousTransaction,
+        'transaction_fk': 'item',
+        'lookups': {
+            'category': (MiscellaneousCategory, 'name', 'category_id'),
+            'department': (Department, 'name', 'department_id'),
+        },
+    },
+}
+
+# Variant columns on apparel rows, alongside the product columns.
+VARIANT_FIELDS = ['gender', 'qty_stock', 'minimum_stock_level', 'weight', 'sku']
+
+# Fields an upsert may change on an existing variant. Stock is never
+# overwritten by an import — it only changes through the ledger.
+VARIANT_UPDATE_FIELDS = ['minimum_stock_level', 'weight', 'sku']
+
+
+# Raised for problems with the file as a whole (wrong type, no header row,
+# unreadable contents).
+class ImportFileError(Exception):
+    pass
+
+
+# Returns a function that starts reading the CSV's raw rows from the top.
+# The text wrapper is detached once read, so it never closes the upload.
+def _csv_rows(file):
+    def rows():
+        file.seek(0)
+        wrapper = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            yield from csv.reader(wrapper)
+        finally:
+            wrapper.detach()
+    return rows
+
+
+# Returns a function that starts reading the workbook's first sheet from the
+# top. openpyxl raises many different exceptions for damaged workbooks
+# (BadZipFile, InvalidFileException, KeyError, XML parse errors, ...).
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import needs the openpyxl package. Upload a CSV instead.")
+    try:
+        sheet = load_workbook(file, read_only=True, data_only=True).active
+    except Exception:
+        raise ImportFileError("The file is not a readable .xlsx workbook.")
+    return lambda: sheet.iter_rows(values_only=True)
+
+
+# Streams rows from a CSV or XLSX file as (row_number, {column: value}).
+# Column names are lower-cased; empty cells are left out so optional fields
+# fall back to their defaults. row_number matches the spreadsheet (the
+# header is row 1). XLSX is read with openpyxl in read-only mode, which
+# loads one row at a time.
+#
+# The whole file is read through once before the first row is returned, so
+# a file that turns out to be undecodable part-way through (not UTF-8, a
+# damaged workbook) is rejected before any batch has been written, instead
+# of leaving half an import behind.
+def read_rows(file, filename):
+    if filename.lower().endswith('.xlsx'):
+        open_rows = _xlsx_rows(file)
+        read_errors = Exception
+        unreadable = "The workbook is damaged and could not be read."
+    elif filename.lower().endswith('.csv'):
+        open_rows = _csv_rows(file)
+        read_errors = (UnicodeDecodeError, csv.Error)
+        unreadable = "The file could not be read as UTF-8 CSV. Save it as 'CSV UTF-8' and upload it again."
+    else:
+        raise ImportFileError("Unsupported file type. Upload a .csv or .xlsx file.")
+
+    try:
+        for _ in open_rows():
+            pass
+    except read_errors:
+        raise ImportFileError(unreadable)
+
+    rows = open_rows()
+    header = next(rows, None)
+    if not header:
+        raise ImportFileError("The file is empty.")
+    columns = [str(column or '').strip().lower() for column in header]
+
+    for row_number, values in enumerate(rows, start=2):
+        row = {}
+        for column, value in zip(columns, values):
+            if isinstance(value, str):
+                value = value.strip()
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)  # Excel stores whole numbers (and numeric SKUs) as floats
+            if column and value not in (None, ''):
+                row[column] = value
+        if row:
+            yield row_number, row
+
+
+# Runs one import. Reference data (categories, departments, sizes, colours)
+# is loaded into dictionaries once; each batch then costs a fixed handful of
+# queries — one to find existing items by merchant_product_id, one insert,
+# one update and one ledger insert — regardless of batch size.
+#
+# Products are matched on merchant_product_id, our own SKU. New items are
+# created with the sheet's qty_stock and an opening 'Restock' ledger entry;
+# existing items have their details updated but keep their stock.
+# With dry_run=True nothing is written and the summary lists what would
+# change, field by field.
+class CatalogImporter:
+
+    def __init__(self, item_type, user=None, dry_run=False, batch_size=BATCH_SIZE):
+        self.item_type = item_type
+        self.config = IMPORTERS[item_type]
+        self.user = user
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.now = timezone.now()
+
+        self.maps = {
+            column: {
+                str(name).lower(): pk
+                for pk, name in model.objects.values_list('pk', name_field)
+            }
+            for column, (model, name_field, _) in self.config['lookups'].items()
+        }
+        if item_type == 'apparel':
+            self.colors = self.maps['primary_color']
+            self.sizes = {}
+            for pk, size_value, size_type in ApparelSize.objects.values_list('pk', 'size_value', 'size_type'):
+                self.sizes.setdefault(size_value.lower(), {})[size_type.lower()] = pk
+
+        self.restock_reason = StockAdjustmentReason.objects.filter(name='Restock').first()
+
+        self.summary = {
+            'item_type': item_type,
+            'dry_run': dry_run,
+            'rows': 0,
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'failed': 0,
+            'errors': [],
+            'changes': [],
+        }
+        if item_type == 'apparel':
+            self.summary.update(variants_created=0, variants_updated=0)
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.summary['rows'] += len(batch)
+            with transaction.atomic():
+                self._import_batch(batch)
+        self.summary['errors'].sort(key=lambda error: error['row'])
+        return self.summary
+
+    # --- Reporting helpers ---
+
+    def _error(self, row_number, errors):
+        self.summary['failed'] += 1
+        if len(self.summary['errors']) < MAX_REPORTED:
+            self.summary['errors'].append({'row': row_number, 'errors': errors})
+
+    def _change(self, row_number, sku, action, fields):
+        if self.dry_run and len(self.summary['changes']) < MAX_REPORTED:
+            self.summary['changes'].append({
+                'row': row_number,
+                'merchant_product_id': sku,
+                'action': action,
+                'fields': fields,
+            })
+
+    # Validates rows with one serializer instance, dropping the ID-based
+    # relation fields (they are resolved from the in-memory maps instead, so
+    # validation doesn't query per row). Returns [(entry, validated_data)].
+    def _validate(self, serializer_class, entries, partial, drop_fields):
+        serializer = serializer_class(partial=partial)
+        for name in drop_fields:
+            serializer.fields.pop(name, None)
+        serializer.validators = []
+
+        valid = []
+        for entry in entries:
+            row_number, row = entry[0], entry[1]
+            try:
+                valid.append((entry, serializer.run_validation(row)))
+            except ValidationError as exc:
+                self._error(row_number, exc.detail)
+        return valid
+
+    # Resolves named relation columns to IDs. Returns (relations, errors).
+    def _resolve(self, row, required):
+        relations, errors = {}, {}
+        for column, (_, _, id_field) in self.config['lookups'].items():
+            name = row.get(column)
+            if name is None:
+                if column == 'category' and required:
+                    errors[column] = ["This field is required."]
+                continue
+            pk = self.maps[column].get(str(name).lower())
+            if pk is None:
+                errors[column] = [f"Unknown {column.replace('_', ' ')} '{name}'."]
+            else:
+                relations[id_field] = pk
+        return relations, errors
+
+    # --- Products (and non-apparel items) ---
+
+    # Creates or updates the product rows for one batch, one row per SKU.
+    # Returns {sku: product}; new products only have a primary key when
+    # not in dry-run mode.
+    def _upsert_products(self, entries):
+        model = self.config['model']
+        skus = {str(row['merchant_product_id']) for _, row in entries}
+        existing = {}
+        for item in model.objects.filter(merchant_product_id__in=skus).order_by('-pk'):
+            existing[item.merchant_product_id] = item  # oldest item wins if a SKU is duplicated
+
+        new_entries, existing_entries = [], []
+        for row_number, row in entries:
+            sku = str(row['merchant_product_id'])
+            relations, errors = self._resolve(row, required=sku not in existing)
+            if errors:
+                self._error(row_number, errors)
+            elif sku in existing:
+                existing_entries.append((row_number, row, relations, sku))
+            else:
+                new_entries.append((row_number, row, relations, sku))
+
+        drop_fields = [id_field for _, _, id_field in self.config['lookups'].values()]
+        serializer_class = self.config['serializer']
+        products = {}
+
+        to_create = []
+        for (row_number, _, relations, sku), data in self._validate(serializer_class, new_entries, False, drop_fields):
+            item = model(**data, **relations, created_by=self.user, updated_by=self.user)
+            to_create.append(item)
+            products[sku] = item
+            self.summary['created'] += 1
+            self._change(row_number, sku, 'create', {
+                field: value for field, value in {**data, **relations}.items()
+            })
+
+        to_update, update_fields = [], set()
+        for (row_number, _, relations, sku), data in self._validate(serializer_class, existing_entries, True, drop_fields):
+            item = existing[sku]
+            products[sku] = item
+            changes = {}
+            for field, value in {**data, **relations}.items():
+                if field == 'qty_stock':
+                    continue
+                if getattr(item, field) != value:
+                    changes[field] = [getattr(item, field), value]
+                    setattr(item, field, value)
+            if changes:
+                item.updated_by = self.user
+                item.updated_at = self.now
+                to_update.append(item)
+                update_fields.update(changes)
+                self.summary['updated'] += 1
+                self._change(row_number, sku, 'update', changes)
+            else:
+                self.summary['unchanged'] += 1
+
+        if not self.dry_run:
+            model.objects.bulk_create(to_create)
+            if to_update:
+                model.objects.bulk_update(to_update, [*update_fields, 'updated_by', 'updated_at'])
+            sync_identifiers(model, to_create + to_update)
+            if self.item_type != 'apparel':
+                self._write_opening_stock(to_create)
+
+        return products
+
+    # Writes the opening 'Restock' ledger entry for newly created stock rows.
+    def _write_opening_stock(self, items):
+        transaction_model = self.config['transaction_model']
+        transaction_model.objects.bulk_create([
+            transaction_model(**{
+                self.config['transaction_fk']: item,
+                'transaction_type': 'return',
+                'quantity': item.qty_stock,
+                'reason': self.restock_reason,
+                'notes': OPENING_STOCK_NOTES,
+                'created_by': self.user,
+                'stock_before': 0,
+                'stock_after': item.qty_stock,
+            })
+            for item in items
+            if item.qty_stock > 0
+        ])
+
+    # --- Batches ---
+
+    def _import_batch(self, batch):
+        entries = []
+        for row_number, row in batch:
+            if 'merchant_product_id' not in row:
+                self._error(row_number, {'merchant_product_id': ["This field is required."]})
+            else:
+                entries.append((row_number, row))
+
+        if self.item_type != 'apparel':
+            # A SKU repeated within the batch: the last row wins.
+            latest = {}
+            for row_number, row in entries:
+                sku = str(row['merchant_product_id'])
+                if sku in latest:
+                    self._error(latest[sku][0], {'merchant_product_id': ["Duplicate in file; a later row replaces this one."]})
+                latest[sku] = (row_number, row)
+            self._upsert_products(list(latest.values()))
+            return
+
+        # Apparel rows are one per variant. Product columns are read from the
+        # first row for each SKU; every row then describes one variant.
+        first_rows = {}
+        for row_number, row in entries:
+            first_rows.setdefault(str(row['merchant_product_id']), (row_number, row))
+        products = self._upsert_products(list(first_rows.values()))
+        self._upsert_variants(entries, products)
+
+    # Creates or updates the variant rows for one apparel batch with a single
+    # bulk_create(update_conflicts=True) on (product, size, color, gender).
+    def _upsert_variants(self, entries, products):
+        existing = {}
+        product_ids = [product.pk for product in products.values() if product.pk]
+        for variant in ApparelVariant.objects.filter(product_id__in=product_ids):
+            existing[(variant.product_id, variant.size_id, variant.color_id, variant.gender)] = variant
+
+        resolved = []
+        for row_number, row in entries:
+            product = products.get(str(row['merchant_product_id']))
+            if product is None:
+                continue  # product row failed validation; already reported
+            errors = {}
+            size_options = self.sizes.get(str(row.get('size', '')).lower(), {})
+            size_type = str(row.get('size_type', '')).lower()
+            size_id = size_options.get(size_type) if size_type else (
+                next(iter(size_options.values())) if len(size_options) == 1 else None
+            )
+            if size_id is None:
+                errors['size'] = [f"Unknown size '{row.get('size', '')}'" + (f" ({size_type})." if size_type else ".")]
+            color_id = self.colors.get(str(row.get('color', '')).lower())
+            if color_id is None:
+                errors['color'] = [f"Unknown color '{row.get('color', '')}'."]
+            if errors:
+                self._error(row_number, errors)
+                continue
+            variant_row = {field: row[field] for field in VARIANT_FIELDS if field in row}
+            resolved.append((row_number, variant_row, product, size_id, color_id))
+
+        variants, new_variants = [], []
+        validated = self._validate(
+            ApparelVariantSerializer, resolved, False, ['size_id', 'color_id', 'product_id']
+        )
+        for (row_number, _, product, size_id, color_id), data in validated:
+            key = (product.pk, size_id, color_id, data.get('gender', 'U'))
+            current = existing.get(key) if product.pk else None
+            if current is None:
+                variant = ApparelVariant(
+                    product=product, size_id=size_id, color_id=color_id,
+                    created_by=self.user, updated_by=self.user, **data,
+                )
+                new_variants.append(variant)
+                self.summary['variants_created'] += 1
+            else:
+                changes = {
+                    field: [getattr(current, field), data[field]]
+                    for field in VARIANT_UPDATE_FIELDS
+                    if field in data and getattr(current, field) != data[field]
+                }
+                if not changes:
+                    continue
+                variant = ApparelVariant(
+                    product=product, size_id=size_id, color_id=color_id,
+                    gender=current.gender, qty_stock=current.qty_stock,
+                    updated_by=self.user, updated_at=self.now,
+                    **{field: data.get(field, getattr(current, field)) for field in VARIANT_UPDATE_FIELDS},
+                )
+                self.summary['variants_updated'] += 1
+                self._change(row_number, str(product.merchant_product_id), 'update variant', changes)
+            variants.append(variant)
+
+        if not self.dry_run and variants:
+            ApparelVariant.objects.bulk_create(
+                variants,
+                update_conflicts=True,
+                unique_fields=['product', 'size', 'color', 'gender'],
+                update_fields=[*VARIANT_UPDATE_FIELDS, 'updated_by', 'updated_at'],
+            )
+            sync_identifiers(ApparelVariant, variants)
+            self._write_opening_stock(new_variants)
@@ -0,0 +1,22 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+# DB_STATEMENT_TIMEOUT_MS stops a runaway request query from holding locks
+# and a worker, but batch commands (snapshots, ledger checks, backfills)
+# scan whole tables on purpose and would be cancelled part-way.
+# Called at the start of such a command, this lifts the timeout for the
+# current connection and for every connection the process opens afterwards,
+# including those of forked worker processes. PostgreSQL only.
+def disable_statement_timeout():
+    connection_created.connect(_disable_statement_timeout, dispatch_uid='core.db.disable_statement_timeout')
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _disable_statement_timeout(type(connection), connection)
+
+
+def _disable_statement_timeout(sender, connection, **kwargs):
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SET statement_timeout = 0')
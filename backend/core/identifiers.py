@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import ItemIdentifier
+from gifts.models import Gift
+from apparel.models import ApparelProduct, ApparelVariant
+from office.models import OfficeItem
+from miscellaneous.models import MiscellaneousItem
+from executive.models import ExecutiveItem
+
+
+PRODUCT_CODE_FIELDS = ['standardised_product_id', 'merchant_product_id', 'manufacturer_product_id']
+
+# Which code fields are indexed on each model, and the item_type they resolve to.
+IDENTIFIER_SOURCES = {
+    Gift: ('gift', PRODUCT_CODE_FIELDS),
+    ExecutiveItem: ('executive', PRODUCT_CODE_FIELDS),
+    OfficeItem: ('office', PRODUCT_CODE_FIELDS),
+    MiscellaneousItem: ('miscellaneous', PRODUCT_CODE_FIELDS),
+    ApparelProduct: ('apparel_product', PRODUCT_CODE_FIELDS),
+    ApparelVariant: ('apparel', ['sku']),
+}
+
+# Upper limit on codes in one scan session.
+MAX_SCAN_CODES = 5000
+
+# Placeholder values staff enter when a product has no such code
+# (standardised_product_id asks for "NO" if not applicable).
+PLACEHOLDER_CODES = {'NO', 'N/A', 'NA', 'NONE', '-'}
+
+
+# Scanner input and stored codes are compared trimmed and upper-cased.
+def normalize_code(code):
+    return str(code or '').strip().upper()
+
+
+def _rows_for(instance, item_type, fields):
+    rows = []
+    for field in fields:
+        code = normalize_code(getattr(instance, field))
+        if code and code not in PLACEHOLDER_CODES:
+            rows.append(ItemIdentifier(code=code, item_type=item_type, item_id=instance.pk, source=field))
+    return rows
+
+
+# Brings the index rows for a list of saved items of one model up to date.
+# The current rows are read with one query; only if they differ are they
+# replaced (one delete, one insert), so ordinary saves that don't touch a
+# code cost a single SELECT. Used by the post_save signal and by code paths
+# that write items with bulk_create/bulk_update (which don't send signals).
+def sync_identifiers(model, instances):
+    item_type, fields = IDENTIFIER_SOURCES[model]
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return
+    rows = [row for instance in instances for row in _rows_for(instance, item_type, fields)]
+    current = ItemIdentifier.objects.filter(
+        item_type=item_type, item_id__in=[instance.pk for instance in instances]
+    )
+    if set(current.values_list('code', 'item_id', 'source')) == {(row.code, row.item_id, row.source) for row in rows}:
+        return
+    with transaction.atomic():
+        current.delete()
+        ItemIdentifier.objects.bulk_create(rows)
+
+
+def remove_identifiers(model, item_id):
+    item_type, _ = IDENTIFIER_SOURCES[model]
+    ItemIdentifier.objects.filter(item_type=item_type, item_id=item_id).delete()
+
+
+# Rebuilds the whole index from the item tables, reading only the code
+# columns in chunks. Returns a dict of item_type -> rows written.
+def rebuild_identifier_index(chunk_size=2000):
+    counts = {}
+    with transaction.atomic():
+        ItemIdentifier.objects.all().delete()
+        for model, (item_type, fields) in IDENTIFIER_SOURCES.items():
+            has_code = Q()
+            for field in fields:
+                has_code |= ~Q(**{field: ''})
+            rows = []
+            counts[item_type] = 0
+            for instance in model.objects.filter(has_code).only('pk', *fields).iterator(chunk_size=chunk_size):
+                rows += _rows_for(instance, item_type, fields)
+                if len(rows) >= chunk_size:
+                    ItemIdentifier.objects.bulk_create(rows)
+                    counts[item_type] += len(rows)
+                    rows = []
+            ItemIdentifier.objects.bulk_create(rows)
+            counts[item_type] += len(rows)
+    return counts
+
+
+# Resolves many codes with a single query.
+# Returns {normalised_code: [matches]}; codes with no match are absent.
+def resolve_codes(codes):
+    resolved = {}
+    rows = (
+        ItemIdentifier.objects
+        .filter(code__in={normalize_code(code) for code in codes})
+        .values_list('code', 'item_type', 'item_id')
+        .distinct()
+    )
+    for code, item_type, item_id in rows:
+        match = {'item_type': item_type, 'id': item_id}
+        if match not in resolved.setdefault(code, []):
+            resolved[code].append(match)
+    return resolved
+
+
+# Resolves one code (e.g. GET /api/scan/<code>/). Usually one match; more than
+# one means the same code was entered on several items.
+def resolve_code(code):
+    return resolve_codes([code]).get(normalize_code(code), [])
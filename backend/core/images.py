@@ -0,0 +1,166 @@
+import os
+import posixpath
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+# Uploads are normalised before they reach storage: rotated upright, scaled
+# to fit inside this many pixels, stripped of EXIF/GPS and other metadata and
+# re-encoded (JPEG, or PNG when the image has transparency).
+MAX_IMAGE_DIMENSION = 2400
+NORMALIZED_JPEG_OPTIONS = {'quality': 85, 'optimize': True, 'progressive': True}
+
+
+# Derivative sizes: each is scaled to fit inside a square of this many
+# pixels (never enlarged). thumb covers 80px grid tiles at 2x, card the
+# catalog cards, full the detail view.
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+
+# Output formats: extension -> (Pillow format, save options).
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Models whose product_image gets derivatives, as 'app_label.ModelName'.
+IMAGE_MODELS = [
+    'gifts.Gift',
+    'apparel.ApparelProduct',
+    'office.OfficeItem',
+    'miscellaneous.MiscellaneousItem',
+    'executive.ExecutiveItem',
+]
+
+
+# Name of one derivative, stored next to the original and keeping its full
+# name so mug.png and mug.jpg in the same folder don't share derivatives:
+# gift_images/mug.png -> gift_images/mug.png.thumb.webp
+def derivative_name(name, size, extension):
+    return f'{name}.{size}.{extension}'
+
+
+def derivative_names(name):
+    return [
+        derivative_name(name, size, extension)
+        for size in DERIVATIVE_SIZES
+        for extension in DERIVATIVE_FORMATS
+    ]
+
+
+# URLs of every derivative of a stored image, as
+# {'thumb': {'webp': url, 'jpg': url}, 'card': {...}, 'full': {...}}.
+# Built from the name alone, so listing a catalog never touches storage.
+def derivative_urls(name, storage=default_storage):
+    if not name:
+        return None
+    return {
+        size: {extension: storage.url(derivative_name(name, size, extension)) for extension in DERIVATIVE_FORMATS}
+        for size in DERIVATIVE_SIZES
+    }
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _flatten(image):
+    # JPEG has no alpha channel: composite transparent images onto white.
+    if _has_alpha(image):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+# Writes an uploaded file to settings.IMAGE_SPOOL_DIR and returns its path.
+# The directory must be readable by whatever runs the normalisation task
+# (the web process with the immediate backend, or a worker on the same host).
+# Large uploads Django already streamed to a temp file are moved rather than
+# copied; small in-memory ones are written out in chunks.
+def spool_upload(upload):
+    os.makedirs(settings.IMAGE_SPOOL_DIR, exist_ok=True)
+    extension = posixpath.splitext(upload.name)[1].lower()
+    path = os.path.join(settings.IMAGE_SPOOL_DIR, f'{uuid.uuid4().hex}{extension}')
+    if hasattr(upload, 'temporary_file_path'):
+        file_move_safe(upload.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as spooled:
+            for chunk in upload.chunks():
+                spooled.write(chunk)
+    return path
+
+
+# Normalises an uploaded image (a path or an open file).
+# Returns (bytes, extension). Metadata is dropped simply by re-encoding
+# without passing exif/icc data through.
+def normalize_image(source):
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+        buffer = BytesIO()
+        if _has_alpha(image):
+            image.convert('RGBA').save(buffer, 'PNG', optimize=True)
+            return buffer.getvalue(), '.png'
+        image.convert('RGB').save(buffer, 'JPEG', **NORMALIZED_JPEG_OPTIONS)
+        return buffer.getvalue(), '.jpg'
+
+
+# Generates every derivative of one stored image and saves them through the
+# storage backend, replacing any previous ones. The original is read once,
+# rotated upright from its EXIF orientation, and each size is scaled down
+# from the next larger one rather than from the full original.
+# Returns the list of names written.
+def generate_derivatives(name, storage=default_storage):
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image = _flatten(ImageOps.exif_transpose(image))
+
+    written = []
+    for size, bound in sorted(DERIVATIVE_SIZES.items(), key=lambda entry: -entry[1]):
+        image.thumbnail((bound, bound), Image.LANCZOS)
+        for extension, (image_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, image_format, **options)
+            target = derivative_name(name, size, extension)
+            if storage.exists(target):
+                storage.delete(target)
+            written.append(storage.save(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+# Removes every derivative of an image that has been replaced or whose
+# record was deleted.
+def delete_derivatives(name, storage=default_storage):
+    for target in derivative_names(name):
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def has_derivatives(name, storage=default_storage):
+    return all(storage.exists(target) for target in derivative_names(name))
+
+
+# Process pool entry point for the backfill command: takes only a name so it
+# pickles cheaply, and reports failures instead of raising so one corrupt
+# upload doesn't stop the pool. Images that already have every derivative
+# are skipped unless force is set.
+# Returns (name, 'created' | 'skipped' | 'failed', error message or None).
+def generate_derivatives_for(name, force=False):
+    try:
+        if not force and has_derivatives(name):
+            return name, 'skipped', None
+        generate_derivatives(name)
+    except Exception as error:
+        return name, 'failed', str(error)
+    return name, 'created', None
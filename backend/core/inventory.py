@@ -0,0 +1,94 @@
+from gifts.models import Gift, InventoryTransaction
+from apparel.models import ApparelVariant, ApparelTransaction
+from office.models import OfficeItem, OfficeTransaction
+from miscellaneous.models import MiscellaneousItem, MiscellaneousTransaction
+from executive.models import ExecutiveItem, ExecutiveTransaction
+
+
+# INVENTORY_TYPES maps the item_type identifier used across the API
+# (the same keys as ItemRequestItem.ITEM_TYPE_CHOICES) to the models that
+# hold stock for that inventory and its ledger.
+#
+#   model             - the model that carries qty_stock (for apparel this is
+#                       the variant, not the product)
+#   transaction_model - the *Transaction ledger for that inventory
+#   transaction_fk    - name of the FK on the transaction pointing at model
+#   unit_price        - ORM path to the unit price from model (apparel
+#                       prices live on the parent product)
+#   name              - ORM path to the item's display name
+#   supplier_name /   - ORM paths to the supplier contact details
+#   supplier_email
+#   minimum_stock     - low-stock threshold field, or None for inventories
+#                       that don't track one
+#   label             - human-readable inventory name used in reports
+#   access_group      - group that grants write access to this inventory
+#                       (see accounts/permissions.py)
+#
+# Reporting and bulk stock code iterates this mapping instead of repeating
+# one if/elif branch per inventory. New inventory modules just need one
+# entry added here.
+INVENTORY_TYPES = {
+    'gift': {
+        'model': Gift,
+        'transaction_model': InventoryTransaction,
+        'transaction_fk': 'gift',
+        'unit_price': 'unit_price',
+        'name': 'product_name',
+        'supplier_name': 'supplier_name',
+        'supplier_email': 'supplier_email',
+        'minimum_stock': 'minimum_stock_level',
+        'label': 'Gifts',
+        'access_group': 'gifts_access',
+    },
+    'apparel': {
+        'model': ApparelVariant,
+        'transaction_model': ApparelTransaction,
+        'transaction_fk': 'variant',
+        'unit_price': 'product__unit_price',
+        'name': 'product__product_name',
+        'supplier_name': 'product__supplier_name',
+        'supplier_email': 'product__supplier_email',
+        'minimum_stock': 'minimum_stock_level',
+        'label': 'Apparel',
+        'access_group': 'apparel_access',
+    },
+    'executive': {
+        'model': ExecutiveItem,
+        'transaction_model': ExecutiveTransaction,
+        'transaction_fk': 'item',
+        'unit_price': 'unit_price',
+        'name': 'item_name',
+        'supplier_name': 'supplier_name',
+        'supplier_email': 'supplier_email',
+        'minimum_stock': None,
+        'label': 'Executive Office',
+        'access_group': 'executive_access',
+    },
+    'office': {
+        'model': OfficeItem,
+        'transaction_model': OfficeTransaction,
+        'transaction_fk': 'item',
+        'unit_price': 'unit_price',
+        'name': 'item_name',
+        'supplier_name': 'supplier_name',
+        'supplier_email': 'supplier_email',
+        'minimum_stock': None,
+        'label': 'Office',
+        'access_group': 'office_access',
+    },
+    'miscellaneous': {
+        'model': MiscellaneousItem,
+        'transaction_model': MiscellaneousTransaction,
+        'transaction_fk': 'item',
+        'unit_price': 'unit_price',
+        'name': 'item_name',
+        'supplier_name': 'supplier_name',
+        'supplier_email': 'supplier_email',
+        'minimum_stock': None,
+        'label': 'Miscellaneous',
+        'access_group': 'misc_access',
+    },
+}
+
+# Choices for model fields that store one of the keys above.
+ITEM_TYPE_CHOICES = [(key, config['label']) for key, config in INVENTORY_TYPES.items()]
@@ -0,0 +1,87 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+
+from accounts.tokens import tokens_for
+
+# The endpoints every page load of the app hits.
+DEFAULT_PATHS = [
+    '/api/user/me/',
+    '/api/stock-adjustment-reasons/',
+    '/api/gifts/',
+    '/api/apparel/products/',
+    '/api/office/',
+    '/api/miscellaneous/',
+    '/api/executive/',
+    '/api/requests/',
+]
+
+
+def connection_mode():
+    settings_dict = connection.settings_dict
+    pool = settings_dict.get('OPTIONS', {}).get('pool')
+    if pool:
+        options = pool if isinstance(pool, dict) else {}
+        return f"psycopg pool (min_size={options.get('min_size', 4)}, max_size={options.get('max_size')})"
+    if settings_dict['CONN_MAX_AGE']:
+        return f"persistent connections (CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']})"
+    return 'new connection per request'
+
+
+class Command(BaseCommand):
+    help = 'Measures p50/p95/p99 latency of the main API endpoints with the current database settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint first')
+        parser.add_argument('--username', help='User to authenticate as (default: the first superuser)')
+        parser.add_argument('--path', action='append', dest='paths', help='Endpoint to measure (repeatable)')
+
+    def handle(self, *args, **options):
+        """
+        Requests go through the full Django stack in-process, and the
+        database connections are released after each one exactly as the
+        WSGI handler does at the end of a request. So the numbers include
+        whatever connecting costs under the current DATABASES settings.
+        Run it once per configuration against the same database, e.g.:
+
+            DB_POOL=False DB_CONN_MAX_AGE=0 python manage.py benchmark_endpoints
+            DB_POOL=False python manage.py benchmark_endpoints
+            python manage.py benchmark_endpoints
+        """
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2.')
+        users = User.objects.filter(is_active=True)
+        user = (
+            users.filter(username=options['username']).first() if options['username']
+            else users.filter(is_superuser=True).order_by('pk').first()
+        )
+        if user is None:
+            raise CommandError('No such active user. Pass --username.')
+
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(user).access_token}'}
+        close_old_connections()
+
+        self.stdout.write(f'Database: {connection.vendor}, {connection_mode()}')
+        self.stdout.write(f"{'endpoint':<34} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for path in options['paths'] or DEFAULT_PATHS:
+            timings, errors = [], 0
+            for i in range(options['warmup'] + options['requests']):
+                started = time.perf_counter()
+                response = client.get(path, **auth)
+                elapsed = (time.perf_counter() - started) * 1000
+                close_old_connections()  # what request_finished does under a real server
+                if i < options['warmup']:
+                    continue
+                timings.append(elapsed)
+                errors += response.status_code >= 400
+            cuts = statistics.quantiles(timings, n=100, method='inclusive')
+            self.stdout.write(f'{path:<34} {cuts[49]:>8.1f} {cuts[94]:>8.1f} {cuts[98]:>8.1f} {errors:>7}')
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete!'))
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+
+from accounts.tokens import tokens_for
+from core.models import StockAdjustmentReason
+from gifts.models import Gift
+
+
+def sqlite_profile():
+    with connection.cursor() as cursor:
+        values = {
+            name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')
+        }
+    values['transactions'] = connection.transaction_mode or 'DEFERRED'
+    return ', '.join(f'{name}={value}' for name, value in values.items())
+
+
+class Command(BaseCommand):
+    help = 'Measures stock write throughput and "database is locked" errors under concurrent requests on SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Threads posting stock adjustments')
+        parser.add_argument('--readers', type=int, default=2, help='Threads reading transaction history meanwhile')
+        parser.add_argument('--seconds', type=float, default=10, help='How long to run')
+        parser.add_argument('--items', type=int, default=5, help='Gifts the writers share (fewer = more contention)')
+        parser.add_argument('--username', help='User to authenticate as (default: the first superuser)')
+
+    def handle(self, *args, **options):
+        """
+        Writer threads post single-line adjustments to the bulk-adjust
+        endpoint (alternately returning and taking one unit, so stock ends
+        where it started) while reader threads load the same items'
+        transaction history. Every thread has its own database connection,
+        like separate Gunicorn workers. The adjustments are real ledger
+        rows, so run it against a copy of the database, once per profile:
+
+            SQLITE_TUNING=False python manage.py benchmark_sqlite_writes
+            python manage.py benchmark_sqlite_writes
+
+        journal_mode is stored in the database file, so the untuned run
+        switches the file back to SQLite's default rollback journal first;
+        the next tuned connection switches it to WAL again.
+        """
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark is for SQLite databases only.')
+        users = User.objects.filter(is_active=True)
+        user = (
+            users.filter(username=options['username']).first() if options['username']
+            else users.filter(is_superuser=True).order_by('pk').first()
+        )
+        if user is None:
+            raise CommandError('No such active user. Pass --username.')
+        item_ids = list(Gift.objects.order_by('pk').values_list('pk', flat=True)[:options['items']])
+        reason = StockAdjustmentReason.objects.order_by('pk').first()
+        if not item_ids or reason is None:
+            raise CommandError('Needs at least one gift and one stock adjustment reason.')
+
+        if not getattr(settings, 'SQLITE_PRAGMAS', None):
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = DELETE')
+        self.stdout.write(f'SQLite: {sqlite_profile()}')
+        close_old_connections()
+        connection.close()
+
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(user).access_token}'}
+        deadline = time.monotonic() + options['seconds']
+        lock = threading.Lock()
+        counts = {'writes': 0, 'locked': 0, 'conflicts': 0, 'failed': 0, 'reads': 0, 'read_errors': 0}
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def writer(number):
+            client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            i = 0
+            try:
+                while time.monotonic() < deadline:
+                    line = {
+                        'item_type': 'gift',
+                        'id': item_ids[(number + i // 2) % len(item_ids)],
+                        'action': 'return' if i % 2 == 0 else 'take',
+                        'quantity': 1,
+                        'reason': reason.pk,
+                    }
+                    try:
+                        response = client.post('/api/stock/bulk-adjust/', [line], content_type='application/json', **auth)
+                    except OperationalError as exc:
+                        count('locked' if 'locked' in str(exc) else 'failed')
+                    else:
+                        if response.status_code < 400:
+                            count('writes')
+                            i += 1
+                        else:
+                            count('conflicts' if response.status_code == 409 else 'failed')
+                    close_old_connections()
+            finally:
+                connection.close()
+
+        def reader(number):
+            client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            try:
+                while time.monotonic() < deadline:
+                    item_id = item_ids[number % len(item_ids)]
+                    try:
+                        response = client.get(f'/api/gifts/{item_id}/transactions/', **auth)
+                        count('reads' if response.status_code < 400 else 'read_errors')
+                    except OperationalError:
+                        count('read_errors')
+                    close_old_connections()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(options['readers'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        attempts = counts['writes'] + counts['locked'] + counts['conflicts'] + counts['failed']
+        self.stdout.write(f"{'writes/s':>10} {'writes':>8} {'locked':>8} {'lock %':>7} {'409s':>6} {'other':>6} {'reads/s':>8} {'read err':>8}")
+        self.stdout.write(
+            f"{counts['writes'] / elapsed:>10.1f} {counts['writes']:>8} {counts['locked']:>8} "
+            f"{100 * counts['locked'] / max(attempts, 1):>6.1f}% {counts['conflicts']:>6} {counts['failed']:>6} "
+            f"{counts['reads'] / elapsed:>8.1f} {counts['read_errors']:>8}"
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete!'))
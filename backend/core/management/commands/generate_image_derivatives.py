@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.db import disable_statement_timeout
+from core.images import IMAGE_MODELS, generate_derivatives_for
+
+
+class Command(BaseCommand):
+    help = 'Generates thumb/card/full WebP and JPEG derivatives for existing product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives that already exist',
+        )
+
+    def handle(self, *args, **options):
+        """
+        New uploads get their derivatives automatically; run this once to
+        backfill images uploaded before derivatives existed, or with --force
+        after changing the sizes in core/images.py. Image names are read
+        from the database up front and resized in a process pool, so the
+        work spreads across every CPU. Failures are listed and don't stop
+        the run.
+        """
+        disable_statement_timeout()
+        names = set()
+        for label in IMAGE_MODELS:
+            model = apps.get_model(label)
+            names.update(
+                model.objects
+                .exclude(product_image__isnull=True)
+                .exclude(product_image='')
+                .values_list('product_image', flat=True)
+            )
+
+        counts = {'created': 0, 'skipped': 0, 'failed': 0}
+        work = partial(generate_derivatives_for, force=options['force'])
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1), initializer=django.setup) as pool:
+            for name, outcome, error in pool.map(work, sorted(names), chunksize=8):
+                counts[outcome] += 1
+                if error:
+                    self.stderr.write(f'  {name}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Image derivatives done! {counts['created']} generated, "
+            f"{counts['skipped']} already present, {counts['failed']} failed."
+        ))
@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_import import BATCH_SIZE, IMPORTERS, CatalogImporter, ImportFileError, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports a supplier catalog (CSV or XLSX) into one inventory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('item_type', choices=list(IMPORTERS), help='Inventory to import into')
+        parser.add_argument('path', help='Path to the .csv or .xlsx file')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report what would change without writing anything',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows validated and written per batch (default {BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--username',
+            help='User recorded as created_by on new items and their opening stock entries',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Rows are matched to existing items on merchant_product_id. New items
+        get an opening 'Restock' ledger entry for their qty_stock; existing
+        items are updated in place and keep their current stock.
+        Prints the JSON summary (errors by row, and field-level changes in
+        dry-run mode) to stdout.
+        """
+        user = None
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f"User '{options['username']}' not found.")
+
+        importer = CatalogImporter(
+            options['item_type'],
+            user=user,
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+        )
+        try:
+            with open(options['path'], 'rb') as file:
+                summary = importer.run(read_rows(file, options['path']))
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(json.dumps(summary, indent=2, default=str))
+        # Human-readable summary goes to stderr so stdout stays valid JSON.
+        self.stderr.write(
+            f"{summary['rows']} rows: {summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['failed']} failed"
+            f"{' (dry run, nothing written)' if summary['dry_run'] else ''}."
+        )
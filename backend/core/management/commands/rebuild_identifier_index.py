@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.db import disable_statement_timeout
+from core.identifiers import rebuild_identifier_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the scan code index from the product IDs and variant SKUs of every inventory'
+
+    def handle(self, *args, **options):
+        """
+        The index is normally kept current by signals on every save and by
+        the bulk import and variant matrix code paths. Run this once after
+        deploying the index, and after data changed outside Django
+        (raw SQL, database restores).
+        """
+        disable_statement_timeout()
+        counts = rebuild_identifier_index()
+        for item_type, count in counts.items():
+            self.stdout.write(f'  {item_type}: {count} codes')
+        self.stdout.write(self.style.SUCCESS(f'Identifier index rebuilt! {sum(counts.values())} codes written.'))
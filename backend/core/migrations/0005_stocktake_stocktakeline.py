@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-19 02:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_stockadjustmentreason_applies_to'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stocktake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Label for the count (e.g. 'Year-end 2026 warehouse count')", max_length=200)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('applied', 'Applied')], default='open', help_text='Open while counting; applied once corrections have been written', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('applied_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktakes_applied', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktakes_created', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Stocktake',
+                'verbose_name_plural': 'Stocktakes',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StocktakeLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(help_text='Which inventory category this item comes from', max_length=20)),
+                ('item_id', models.PositiveIntegerField(help_text='Primary key of the item in its respective inventory model')),
+                ('baseline_qty', models.IntegerField(help_text='Stock on record when the stocktake started')),
+                ('counted_qty', models.IntegerField(blank=True, help_text='Physically counted quantity', null=True)),
+                ('counted_at', models.DateTimeField(blank=True, null=True)),
+                ('counted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktake_counts', to=settings.AUTH_USER_MODEL)),
+                ('stocktake', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.stocktake')),
+            ],
+            options={
+                'verbose_name': 'Stocktake Line',
+                'verbose_name_plural': 'Stocktake Lines',
+                'ordering': ['item_type', 'item_id'],
+                'unique_together': {('stocktake', 'item_type', 'item_id')},
+            },
+        ),
+    ]
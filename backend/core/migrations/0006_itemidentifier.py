@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_stocktake_stocktakeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Normalised code (trimmed, upper-case)', max_length=100)),
+                ('item_type', models.CharField(help_text='Which inventory category the item comes from', max_length=20)),
+                ('item_id', models.PositiveIntegerField(help_text='Primary key of the item in its respective inventory model')),
+                ('source', models.CharField(help_text='Field the code was read from (e.g. merchant_product_id, sku)', max_length=30)),
+            ],
+            options={
+                'verbose_name': 'Item Identifier',
+                'verbose_name_plural': 'Item Identifiers',
+                'indexes': [models.Index(fields=['code'], name='core_itemid_code_4b80fa_idx')],
+                'unique_together': {('item_type', 'item_id', 'source')},
+            },
+        ),
+    ]
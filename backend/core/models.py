@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 
 
 # TakeReason holds the list of reasons a staff member can select when submitting
@@ -92,3 +93,150 @@ class StockAdjustmentReason(models.Model):
 
     def __str__(self):
         return self.name
+
+
+# Stocktake is one physical count session across any of the inventories.
+#
+# When the session is created the current qty_stock of every item in scope
+# is frozen into a StocktakeLine as baseline_qty. Counters then submit what
+# they physically counted for whichever items they get to. Takes and returns
+# keep working during the count; when the session is applied each counted
+# item is corrected by (counted - baseline), on top of whatever moved since
+# the baseline was frozen, and all corrections are written to the ledgers
+# in one transaction with the 'Stock Correction' reason.
+class Stocktake(models.Model):
+    STATUS_CHOICES = [
+        ('open',    'Open'),
+        ('applied', 'Applied'),
+    ]
+
+    name = models.CharField(
+        max_length=200,
+        help_text="Label for the count (e.g. 'Year-end 2026 warehouse count')"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='open',
+        help_text="Open while counting; applied once corrections have been written"
+    )
+
+    # created_at is also the moment the baseline was frozen.
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='stocktakes_created'
+    )
+
+    applied_at = models.DateTimeField(null=True, blank=True)
+    applied_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stocktakes_applied'
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Stocktake"
+        verbose_name_plural = "Stocktakes"
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+# StocktakeLine is one item in a stocktake: its frozen baseline and, once
+# counted, the physical count. item_type + item_id follow the same generic
+# pattern as ItemRequestItem (item_type is one of the keys in
+# core/inventory.py; for apparel item_id is the variant ID).
+class StocktakeLine(models.Model):
+    stocktake = models.ForeignKey(
+        Stocktake,
+        on_delete=models.CASCADE,
+        related_name='lines'
+    )
+
+    item_type = models.CharField(
+        max_length=20,
+        help_text="Which inventory category this item comes from"
+    )
+
+    item_id = models.PositiveIntegerField(
+        help_text="Primary key of the item in its respective inventory model"
+    )
+
+    baseline_qty = models.IntegerField(
+        help_text="Stock on record when the stocktake started"
+    )
+
+    # Null until the item has been counted.
+    counted_qty = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Physically counted quantity"
+    )
+    counted_at = models.DateTimeField(null=True, blank=True)
+    counted_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stocktake_counts'
+    )
+
+    class Meta:
+        ordering = ['item_type', 'item_id']
+        unique_together = ['stocktake', 'item_type', 'item_id']
+        verbose_name = "Stocktake Line"
+        verbose_name_plural = "Stocktake Lines"
+
+    def __str__(self):
+        return f"{self.item_type} #{self.item_id}: {self.baseline_qty} -> {self.counted_qty}"
+
+
+# ItemIdentifier is a lookup table of every barcode / product code in the
+# inventories, so a scanned code resolves to an item with one indexed query
+# instead of searching free-text columns on five models.
+#
+# Rows are derived data, kept in sync by signals in core/signals.py
+# whenever an item is saved or deleted (see core/identifiers.py), and can be
+# rebuilt from scratch with the rebuild_identifier_index command.
+#
+# item_type is one of the keys in core/inventory.py, plus 'apparel_product'
+# for codes held on an ApparelProduct (the stock-bearing apparel item is the
+# variant, whose own code is its sku). code is stored upper-cased and
+# trimmed so scanner input matches regardless of case.
+class ItemIdentifier(models.Model):
+    code = models.CharField(
+        max_length=100,
+        help_text="Normalised code (trimmed, upper-case)"
+    )
+
+    item_type = models.CharField(
+        max_length=20,
+        help_text="Which inventory category the item comes from"
+    )
+
+    item_id = models.PositiveIntegerField(
+        help_text="Primary key of the item in its respective inventory model"
+    )
+
+    source = models.CharField(
+        max_length=30,
+        help_text="Field the code was read from (e.g. merchant_product_id, sku)"
+    )
+
+    class Meta:
+        unique_together = ['item_type', 'item_id', 'source']
+        indexes = [
+            models.Index(fields=['code']),
+        ]
+        verbose_name = "Item Identifier"
+        verbose_name_plural = "Item Identifiers"
+
+    def __str__(self):
+        return f"{self.code} -> {self.item_type} #{self.item_id}"
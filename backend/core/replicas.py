@@ -0,0 +1,118 @@
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Read-replica routing.
+#
+# When a `replica` database is configured (settings.py), views can opt in
+# to reading from it with ReplicaReadMixin or @read_from_replica. Nothing
+# else ever touches the replica: every write, and every read outside those
+# views (other endpoints, management commands, tasks), uses `default`.
+#
+# Read-your-writes: replicas lag slightly behind the primary, so a user who
+# just changed something must not be shown the old data. Any request that
+# writes sets a short-lived cookie (ReplicaPinMiddleware), and while it is
+# present that browser's reads all go to the primary. Reads later in the
+# same request as a write go to the primary as well.
+
+REPLICA_ALIAS = 'replica'
+
+# How long a client stays on the primary after writing. Comfortably above
+# the replication lag Azure reports under normal load.
+REPLICA_PIN_SECONDS = 5
+PIN_COOKIE = 'pin_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)  # pin cookie present
+_wrote = ContextVar('wrote', default=False)  # this request has written
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not (_pinned.get() or _wrote.get()):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return None
+
+    # Both aliases hold the same data.
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # The replica is a copy of the primary made by the database server;
+    # migrations only ever run against the primary.
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+# Resets the per-request routing state and sets the pin cookie after a write.
+class ReplicaPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned, wrote = _pinned.set(PIN_COOKIE in request.COOKIES), _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                    secure=request.is_secure(),
+                )
+            return response
+        finally:
+            _wrote.reset(wrote)
+            _pinned.reset(pinned)
+
+
+# Runs fn with its GET/HEAD reads sent to the replica, if one is configured.
+def _call_on_replica(request, fn, *args, **kwargs):
+    if request.method not in SAFE_METHODS or not replica_configured():
+        return fn(*args, **kwargs)
+    token = _replica_reads.set(True)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _replica_reads.reset(token)
+
+
+# Runs fn with its reads sent to the primary, even inside a replica view.
+def _call_on_primary(fn, *args, **kwargs):
+    token = _replica_reads.set(False)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _replica_reads.reset(token)
+
+
+# Opt-in for class-based views: reads made while handling GET requests
+# (permission checks included) go to the replica. Authentication still
+# reads the primary: a lagging replica could return the user row or
+# token_version (accounts/tokens.py) from before a deactivation or
+# revocation and let a revoked token through.
+class ReplicaReadMixin:
+    def dispatch(self, request, *args, **kwargs):
+        return _call_on_replica(request, super().dispatch, request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        _call_on_primary(super().perform_authentication, request)
+
+
+# Opt-in for @api_view functions; goes below @permission_classes.
+def read_from_replica(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return _call_on_replica(request, view, request, *args, **kwargs)
+    return wrapper
@@ -1,7 +1,28 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from core.models import TakeReason, StockAdjustmentReason, Department
+from core.images import derivative_urls
+from core.models import TakeReason, StockAdjustmentReason, Department, Stocktake, StocktakeLine
+
+
+# Read-only field exposing the resized thumb/card/full derivatives of an
+# image field in WebP and JPEG. Used as
+#   product_image_derivatives = ImageDerivativesField(source='product_image')
+# URLs are made absolute the same way DRF does for the image itself.
+class ImageDerivativesField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        urls = derivative_urls(value.name if value else None)
+        request = self.context.get('request')
+        if urls and request is not None:
+            urls = {
+                size: {extension: request.build_absolute_uri(url) for extension, url in formats.items()}
+                for size, formats in urls.items()
+            }
+        return urls
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -49,3 +70,44 @@ class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ['id', 'name']
+
+
+class StocktakeSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Stocktake sessions.
+    lines_total / lines_counted / lines_with_variance are annotated by the
+    view's queryset rather than counted per session here.
+    """
+    created_by = serializers.SlugRelatedField(slug_field="username", read_only=True)
+    applied_by = serializers.SlugRelatedField(slug_field="username", read_only=True)
+    lines_total = serializers.IntegerField(read_only=True)
+    lines_counted = serializers.IntegerField(read_only=True)
+    lines_with_variance = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Stocktake
+        fields = [
+            'id', 'name', 'status', 'created_at', 'created_by', 'applied_at', 'applied_by',
+            'lines_total', 'lines_counted', 'lines_with_variance',
+        ]
+        read_only_fields = ['status', 'created_at', 'applied_at']
+
+
+class StocktakeVarianceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for counted stocktake lines that differ from what was expected.
+    expected_qty (baseline plus ledger movements before the line was
+    counted) and variance (counted - expected_qty) are annotated in the
+    database.
+    """
+    expected_qty = serializers.IntegerField(read_only=True)
+    variance = serializers.IntegerField(read_only=True)
+    counted_by = serializers.SlugRelatedField(slug_field="username", read_only=True)
+
+    class Meta:
+        model = StocktakeLine
+        fields = [
+            'item_type', 'item_id', 'baseline_qty', 'expected_qty', 'counted_qty', 'variance',
+            'counted_at', 'counted_by',
+        ]
+        read_only_fields = fields
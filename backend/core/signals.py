@@ -0,0 +1,113 @@
+import posixpath
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.identifiers import IDENTIFIER_SOURCES, sync_identifiers, remove_identifiers
+from core.images import IMAGE_MODELS, spool_upload
+from core.tasks import delete_image_derivatives, normalize_product_image
+
+
+def index_item_identifiers(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps ItemIdentifier in step when an inventory item is saved.
+    Saves that only touch other fields (e.g. stock via update_fields)
+    are skipped. Bulk writes don't send this signal, so code using
+    bulk_create/bulk_update calls sync_identifiers itself.
+    """
+    _, fields = IDENTIFIER_SOURCES[sender]
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    sync_identifiers(sender, [instance])
+
+
+def remove_item_identifiers(sender, instance, **kwargs):
+    """
+    Drops a deleted item's codes from ItemIdentifier.
+    """
+    remove_identifiers(sender, instance.pk)
+
+
+# Connected per model rather than for every sender: saves of other models
+# (ledger rows, request lines, ...) never call in here, and Django can only
+# delete cascaded rows (stock ledgers, snapshots, ...) in a single query when
+# no delete signal listens for their model, and otherwise loads them all first.
+for model in IDENTIFIER_SOURCES:
+    post_save.connect(index_item_identifiers, sender=model)
+    post_delete.connect(remove_item_identifiers, sender=model)
+
+
+@receiver(pre_save)
+def spool_product_image_upload(sender, instance, **kwargs):
+    """
+    Diverts a new product_image upload to a local spool file so the
+    request doesn't wait on the push to blob storage. The field keeps its
+    previous value until normalize_product_image has processed the upload.
+    The file is only written to storage by the field's own pre_save, after
+    this signal, so an uncommitted file here means a fresh upload.
+    """
+    if sender._meta.label not in IMAGE_MODELS:
+        return
+    image = instance.product_image
+    if not image or image._committed:
+        return
+    instance._product_image_spool = (spool_upload(image.file), posixpath.basename(image.name))
+    previous = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('product_image', flat=True).first()
+    instance.product_image = previous
+
+
+@receiver(post_save)
+def enqueue_product_image_processing(sender, instance, **kwargs):
+    """
+    Queues normalisation of a spooled upload once the save has committed.
+    The instance then picks up whatever product_image the record holds, so
+    the API response shows the processed image if the task backend has
+    already run it, and the previous image while it is still queued.
+    """
+    spooled = getattr(instance, '_product_image_spool', None)
+    if spooled is None:
+        return
+    instance._product_image_spool = None
+    spool_path, filename = spooled
+
+    def enqueue():
+        normalize_product_image.enqueue(sender._meta.label, instance.pk, spool_path, filename)
+        instance.product_image = (
+            sender.objects.filter(pk=instance.pk).values_list('product_image', flat=True).first()
+        )
+
+    transaction.on_commit(enqueue)
+
+
+def remove_product_image_derivatives(sender, instance, **kwargs):
+    """
+    Queues removal of a deleted item's image derivatives once the delete
+    has committed.
+    """
+    name = instance.product_image.name
+    if name:
+        transaction.on_commit(lambda: delete_image_derivatives.enqueue(sender._meta.label, name))
+
+
+# Per model for the same reason as remove_item_identifiers.
+for label in IMAGE_MODELS:
+    post_delete.connect(remove_product_image_derivatives, sender=label)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Applies the SQLite tuning profile (SQLITE_PRAGMAS in settings.py) to
+    each new SQLite connection. PRAGMAs are per connection, except
+    journal_mode=WAL which is stored in the database file itself.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
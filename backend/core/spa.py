@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import re
+import threading
+from dataclasses import dataclass, field
+
+try:
+    import brotli
+except ImportError:  # optional: without it the shell is served gzipped only
+    brotli = None
+
+
+# In-memory copy of the React build's index.html (the SPA "shell").
+#
+# Every non-API navigation is answered with this one file, so instead of
+# opening it from disk per request it is read once, hashed for an ETag and
+# pre-compressed. The file's mtime and size are checked on each request (one
+# stat call) and the copy is rebuilt when a new build is deployed, so there
+# is nothing to restart after `npm run build`.
+
+# Preferred first when the browser accepts several.
+ENCODINGS = ('br', 'gzip')
+
+
+@dataclass(frozen=True)
+class Shell:
+    stamp: tuple
+    etag: str
+    variants: dict = field(default_factory=dict)  # encoding ('' = identity) -> bytes
+
+
+_shell = None
+_lock = threading.Lock()
+
+
+def _compress(content):
+    variants = {'': content}
+    compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['br'] = brotli.compress(content, quality=11)
+    for encoding, data in compressed.items():
+        if len(data) < len(content):
+            variants[encoding] = data
+    return variants
+
+
+# Returns the current Shell for the file at path, rebuilding it if the file
+# changed since it was last read. Raises FileNotFoundError if there is no build.
+def load_shell(path):
+    global _shell
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    shell = _shell
+    if shell is not None and shell.stamp == stamp:
+        return shell
+    with _lock:
+        if _shell is not None and _shell.stamp == stamp:
+            return _shell
+        content = path.read_bytes()
+        etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+        _shell = Shell(stamp=stamp, etag=etag, variants=_compress(content))
+        return _shell
+
+
+def _quality(params):
+    match = re.search(r'q\s*=\s*([0-9.]+)', params)
+    try:
+        return float(match.group(1)) if match else 1.0
+    except ValueError:
+        return 0.0
+
+
+# Picks the best available encoding the client accepts ('' for none).
+# An encoding listed with q=0 is refused even when '*' accepts the rest.
+def negotiate_encoding(accept_encoding, available):
+    accepted, refused = set(), set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if name:
+            (accepted if _quality(params) > 0 else refused).add(name)
+    for encoding in ENCODINGS:
+        if encoding in available and encoding not in refused and (encoding in accepted or '*' in accepted):
+            return encoding
+    return ''
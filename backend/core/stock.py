@@ -0,0 +1,193 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from accounts.permissions import group_names, is_admin
+from core.inventory import INVENTORY_TYPES
+from core.models import StockAdjustmentReason
+
+
+# Upper limit on lines per bulk adjustment, so one request can't hold row
+# locks on the whole catalog.
+MAX_BULK_LINES = 500
+
+
+# Raised when stock changed between locking and updating (only possible on
+# databases without row locks, e.g. SQLite). Nothing is written; the caller
+# should retry.
+class StockConflict(Exception):
+    pass
+
+
+# A whole number sent as a JSON integer or a string of digits, or None.
+# Floats (2.7), booleans and anything else are not truncated into one.
+def _whole_number(value):
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+# Checks every line of a bulk adjustment before anything is touched.
+# Returns (cleaned_lines, errors) where errors maps line index -> list of
+# messages. Reasons are loaded in one query and the user's groups in
+# another, however many lines there are.
+def validate_adjustments(lines, user):
+    admin = is_admin(user)
+
+    reason_ids = set()
+    for line in lines:
+        if isinstance(line, dict) and str(line.get('reason', '')).isdigit():
+            reason_ids.add(int(line['reason']))
+    reasons = StockAdjustmentReason.objects.in_bulk(reason_ids)
+
+    cleaned, errors = [], {}
+    for index, line in enumerate(lines):
+        problems = []
+        if not isinstance(line, dict):
+            errors[index] = ["Each line must be an object."]
+            continue
+
+        item_type = line.get('item_type')
+        if item_type not in INVENTORY_TYPES:
+            problems.append(f"Invalid item_type. Choose from: {', '.join(INVENTORY_TYPES)}.")
+        elif not admin and INVENTORY_TYPES[item_type]['access_group'] not in group_names(user):
+            problems.append(f"You do not have access to adjust {INVENTORY_TYPES[item_type]['label']} stock.")
+
+        item_id = _whole_number(line.get('id'))
+        if item_id is None:
+            problems.append("Invalid id.")
+
+        action = line.get('action')
+        if action not in ('take', 'return'):
+            problems.append("Invalid action. Use 'take' or 'return'")
+
+        quantity = _whole_number(line.get('quantity'))
+        if quantity is None or quantity <= 0:
+            problems.append("Quantity must be a positive integer.")
+
+        reason_id = line.get('reason')
+        if not reason_id:
+            problems.append("A reason is required for stock adjustments.")
+        elif not str(reason_id).isdigit() or int(reason_id) not in reasons:
+            problems.append("Invalid reason ID.")
+
+        if problems:
+            errors[index] = problems
+            continue
+
+        cleaned.append({
+            'index': index,
+            'item_type': item_type,
+            'id': item_id,
+            'action': action,
+            'quantity': quantity,
+            'reason': reasons[int(reason_id)],
+            'notes': line.get('notes') or '',
+        })
+
+    return cleaned, errors
+
+
+# Applies validated lines in a single database transaction.
+#
+# For each inventory the touched rows are locked in primary key order (so
+# two bulk adjustments over the same items can't deadlock), new levels are
+# worked out in memory — several lines for the same item apply in sequence —
+# and written back with one UPDATE per inventory. That UPDATE is guarded on
+# each row still holding the stock level read under the lock; if any row
+# changed, StockConflict is raised and everything rolls back. Ledger rows are
+# then written with one bulk_create per inventory.
+#
+# Returns (results, errors). If any take would push stock below zero, errors
+# maps line index -> messages, nothing is written and results is empty.
+def apply_adjustments(lines, user):
+    by_type = defaultdict(list)
+    for line in lines:
+        by_type[line['item_type']].append(line)
+
+    now = timezone.now()
+    results = {}
+    errors = {}
+
+    with transaction.atomic():
+        for item_type in sorted(by_type):
+            config = INVENTORY_TYPES[item_type]
+            model = config['model']
+            type_lines = by_type[item_type]
+
+            ids = sorted({line['id'] for line in type_lines})
+            locked = dict(
+                model.objects
+                .select_for_update()
+                .filter(pk__in=ids)
+                .order_by('pk')
+                .values_list('pk', 'qty_stock')
+            )
+
+            original = dict(locked)
+            ledger = []
+            for line in type_lines:
+                if line['id'] not in locked:
+                    errors[line['index']] = [f"{config['label']} item #{line['id']} not found."]
+                    continue
+
+                stock_before = locked[line['id']]
+                if line['action'] == 'take':
+                    if stock_before < line['quantity']:
+                        errors[line['index']] = [f"Insufficient stock. Only {stock_before} available."]
+                        continue
+                    stock_after = stock_before - line['quantity']
+                else:
+                    stock_after = stock_before + line['quantity']
+                locked[line['id']] = stock_after
+
+                ledger.append(config['transaction_model'](**{
+                    config['transaction_fk'] + '_id': line['id'],
+                    'transaction_type': line['action'],
+                    'quantity': line['quantity'],
+                    'reason': line['reason'],
+                    'notes': line['notes'],
+                    'created_by': user,
+                    'stock_before': stock_before,
+                    'stock_after': stock_after,
+                }))
+                results[line['index']] = {
+                    'index': line['index'],
+                    'item_type': item_type,
+                    'id': line['id'],
+                    'action': line['action'],
+                    'quantity': line['quantity'],
+                    'stock_before': stock_before,
+                    'stock_after': stock_after,
+                }
+
+            if errors:
+                continue  # keep checking other inventories so every problem is reported
+
+            changed = [pk for pk in ids if locked[pk] != original[pk]]
+            if changed:
+                guard = Q()
+                for pk in changed:
+                    guard |= Q(pk=pk, qty_stock=original[pk])
+                updated = model.objects.filter(guard).update(
+                    qty_stock=Case(
+                        *[When(pk=pk, then=Value(locked[pk])) for pk in changed],
+                        output_field=IntegerField(),
+                    ),
+                    updated_by=user,
+                    updated_at=now,
+                )
+                if updated != len(changed):
+                    raise StockConflict()
+
+            config['transaction_model'].objects.bulk_create(ledger)
+
+        if errors:
+            transaction.set_rollback(True)
+            return [], errors
+
+    return [results[index] for index in sorted(results)], {}
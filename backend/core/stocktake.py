@@ -0,0 +1,218 @@
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.inventory import INVENTORY_TYPES
+from core.models import Stocktake, StocktakeLine, StockAdjustmentReason
+from core.stock import apply_adjustments
+
+
+# Creates a stocktake and freezes its baseline: every item of the chosen
+# inventories (all five by default) gets a StocktakeLine holding its current
+# qty_stock. Each inventory is copied with one INSERT ... SELECT, so freezing
+# a large catalog never loads the items into Python.
+#
+# The baseline and the stocktake's created_at must agree on every movement:
+# one committed before the freeze is in the baseline and timestamped before
+# created_at; one committed after it is not, and is timestamped after. So
+# the copy locks the item rows (FOR UPDATE, where the database has it), which
+# makes it wait for stock writes in flight and holds off new ones until this
+# transaction commits, and created_at is stamped only once the locks are
+# held. SQLite allows one writer at a time, which gives the same guarantee.
+def start_stocktake(name, user, item_types=None):
+    qn = connection.ops.quote_name
+    line_table = qn(StocktakeLine._meta.db_table)
+    columns = ", ".join(
+        qn(StocktakeLine._meta.get_field(field).column)
+        for field in ['stocktake', 'item_type', 'item_id', 'baseline_qty']
+    )
+    lock = " FOR UPDATE" if connection.features.has_select_for_update else ""
+
+    with transaction.atomic():
+        stocktake = Stocktake.objects.create(name=name, created_by=user)
+        with connection.cursor() as cursor:
+            for item_type in item_types or INVENTORY_TYPES:
+                model = INVENTORY_TYPES[item_type]['model']
+                cursor.execute(
+                    f"INSERT INTO {line_table} ({columns}) "
+                    f"SELECT %s, %s, {qn(model._meta.pk.column)}, {qn(model._meta.get_field('qty_stock').column)} "
+                    f"FROM {qn(model._meta.db_table)}{lock}",
+                    [stocktake.pk, item_type],
+                )
+        stocktake.created_at = timezone.now()
+        Stocktake.objects.filter(pk=stocktake.pk).update(created_at=stocktake.created_at)
+    return stocktake
+
+
+# Records counted quantities. counts is a list of
+# {'item_type', 'id', 'counted'} dicts; a later count for the same item
+# replaces an earlier one. Lines are looked up with one query per inventory
+# and saved with one bulk_update.
+# Returns (updated_count, errors) where errors maps list index -> messages.
+def record_counts(stocktake, counts, user):
+    errors = {}
+    wanted = {}
+    for index, count in enumerate(counts):
+        if not isinstance(count, dict):
+            errors[index] = ["Each count must be an object."]
+            continue
+        item_type = count.get('item_type')
+        try:
+            item_id = int(count.get('id'))
+            counted = int(count.get('counted'))
+            if counted < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors[index] = ["id and counted must be whole numbers (counted 0 or more)."]
+            continue
+        if item_type not in INVENTORY_TYPES:
+            errors[index] = [f"Invalid item_type. Choose from: {', '.join(INVENTORY_TYPES)}."]
+            continue
+        wanted[(item_type, item_id)] = (index, counted)
+
+    lines = {}
+    for item_type in {item_type for item_type, _ in wanted}:
+        item_ids = [item_id for key_type, item_id in wanted if key_type == item_type]
+        for line in stocktake.lines.filter(item_type=item_type, item_id__in=item_ids):
+            lines[(item_type, line.item_id)] = line
+
+    now = timezone.now()
+    changed = []
+    for key, (index, counted) in wanted.items():
+        line = lines.get(key)
+        if line is None:
+            errors[index] = [f"{INVENTORY_TYPES[key[0]]['label']} item #{key[1]} is not part of this stocktake."]
+            continue
+        line.counted_qty = counted
+        line.counted_at = now
+        line.counted_by = user
+        changed.append(line)
+
+    StocktakeLine.objects.bulk_update(changed, ['counted_qty', 'counted_at', 'counted_by'], batch_size=1000)
+    return len(changed), errors
+
+
+# Net stock movement (returns minus takes) each line's item had in its
+# ledger after its stocktake started and up to the moment it was counted,
+# as one correlated subquery per inventory (answered from the ledgers'
+# item + created_at indexes).
+def _movement_before_count():
+    whens = []
+    for item_type, config in INVENTORY_TYPES.items():
+        fk = config['transaction_fk']
+        net = (
+            config['transaction_model'].objects
+            .filter(**{
+                fk: OuterRef('item_id'),
+                'created_at__gt': OuterRef('stocktake__created_at'),
+                'created_at__lte': OuterRef('counted_at'),
+            })
+            .order_by()
+            .values(fk)
+            .annotate(net=Sum(Case(
+                When(transaction_type='take', then=-F('quantity')),
+                default=F('quantity'),
+            )))
+            .values('net')
+        )
+        whens.append(When(item_type=item_type, then=Subquery(net)))
+    return Coalesce(Case(*whens, output_field=IntegerField()), Value(0))
+
+
+def _with_variance(lines):
+    return (
+        lines
+        .filter(counted_qty__isnull=False)
+        .annotate(expected_qty=F('baseline_qty') + _movement_before_count())
+        .annotate(variance=F('counted_qty') - F('expected_qty'))
+        .exclude(variance=0)
+    )
+
+
+# Counted lines whose count differs from what the shelf should have held
+# when it was counted, computed in the database:
+#   expected_qty = baseline + ledger movements between the start of the
+#                  stocktake and the line's counted_at
+#   variance     = counted - expected_qty
+# So a take or return recorded while the count was running, but before
+# that shelf was counted, is not mistaken for a discrepancy.
+def variance_lines(stocktake):
+    return _with_variance(stocktake.lines.all())
+
+
+# The number of variance_lines of each stocktake, as a subquery for
+# annotating a Stocktake queryset (the session list).
+def variance_count():
+    return Coalesce(
+        Subquery(
+            _with_variance(StocktakeLine.objects.filter(stocktake=OuterRef('pk')))
+            .order_by()
+            .values('stocktake')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+# Writes every variance as a correction and closes the stocktake.
+#
+# Variances are reconciled against the ledger (see variance_lines) and each
+# correction is applied to the item's *current* stock, so every movement
+# during the count is kept exactly once: an item frozen at 10, taken down
+# to 8 and then counted at 8 needs no correction; one frozen at 10, counted
+# at 8 and then taken down to 8 ends at 6.
+# Corrections go through apply_adjustments, which locks the items, updates
+# them and bulk-writes the ledger rows in one transaction. Items deleted
+# since the baseline are skipped. If any correction would take an item
+# below zero, nothing is written and the errors are returned for a recount.
+# Returns (results, errors) where errors lists {item_type, id, errors}.
+def apply_stocktake(stocktake, user):
+    with transaction.atomic():
+        # Lock the session so two apply calls can't both write corrections.
+        stocktake = Stocktake.objects.select_for_update().get(pk=stocktake.pk)
+        if stocktake.status != 'open':
+            return [], [{'errors': ["This stocktake has already been applied."]}]
+        return _apply_open_stocktake(stocktake, user)
+
+
+def _apply_open_stocktake(stocktake, user):
+    reason = StockAdjustmentReason.objects.filter(name='Stock Correction').first()
+    variances = list(variance_lines(stocktake).values_list('item_type', 'item_id', 'variance'))
+
+    existing = {}
+    for item_type in {item_type for item_type, _, _ in variances}:
+        item_ids = [item_id for line_type, item_id, _ in variances if line_type == item_type]
+        existing[item_type] = set(
+            INVENTORY_TYPES[item_type]['model'].objects.filter(pk__in=item_ids).values_list('pk', flat=True)
+        )
+
+    adjustments = [
+        {
+            'index': index,
+            'item_type': item_type,
+            'id': item_id,
+            'action': 'return' if variance > 0 else 'take',
+            'quantity': abs(variance),
+            'reason': reason,
+            'notes': f'Stocktake #{stocktake.pk}: {stocktake.name}',
+        }
+        for index, (item_type, item_id, variance) in enumerate(variances)
+        if item_id in existing[item_type]
+    ]
+
+    results, errors = apply_adjustments(adjustments, user)
+    if errors:
+        by_index = {adjustment['index']: adjustment for adjustment in adjustments}
+        return [], [
+            {'item_type': by_index[index]['item_type'], 'id': by_index[index]['id'], 'errors': messages}
+            for index, messages in sorted(errors.items())
+        ]
+
+    stocktake.status = 'applied'
+    stocktake.applied_at = timezone.now()
+    stocktake.applied_by = user
+    stocktake.save(update_fields=['status', 'applied_at', 'applied_by'])
+    return results, []
@@ -0,0 +1,55 @@
+import logging
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.tasks import task
+
+from core.images import delete_derivatives, generate_derivatives, normalize_image
+
+logger = logging.getLogger(__name__)
+
+
+# Finishes a product_image upload: normalises it (see
+# core.images.normalize_image), pushes the result to storage under the
+# field's upload_to, points the record at it and builds the resized
+# derivatives. The source is either a file spooled to local disk during the
+# request, or (staged=True) an object uploaded straight to storage with an
+# upload ticket. The record is updated with a plain UPDATE so no save signals
+# fire again, and the derivatives of the image it replaces are removed. The
+# source is always removed; if the item was deleted in the meantime the
+# upload is simply dropped.
+@task
+def normalize_product_image(model_label, pk, source, filename, staged=False):
+    model = apps.get_model(model_label)
+    field = model._meta.get_field('product_image')
+    try:
+        instance = model.objects.get(pk=pk)
+        with (field.storage.open(source, 'rb') if staged else open(source, 'rb')) as original:
+            content, extension = normalize_image(original)
+        name = field.generate_filename(instance, posixpath.splitext(filename)[0] + extension)
+        name = field.storage.save(name, ContentFile(content))
+        model.objects.filter(pk=pk).update(product_image=name)
+        generate_derivatives(name, field.storage)
+        previous = instance.product_image.name
+        if previous and previous != name:
+            delete_derivatives(previous, field.storage)
+    except model.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception("Could not process uploaded image %s for %s #%s", filename, model_label, pk)
+        raise
+    finally:
+        if staged:
+            if field.storage.exists(source):
+                field.storage.delete(source)
+        elif os.path.exists(source):
+            os.remove(source)
+
+
+# Removes the derivatives of a deleted item's product image.
+@task
+def delete_image_derivatives(model_label, name):
+    field = apps.get_model(model_label)._meta.get_field('product_image')
+    delete_derivatives(name, field.storage)
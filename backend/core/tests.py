@@ -1,3 +1,1297 @@
-from django.test import TestCase
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from PIL import Image
+
+from accounts.tokens import tokens_for
+from core.catalog_import import BATCH_SIZE
+from apparel.models import ApparelCategory, ApparelColor, ApparelProduct, ApparelSize, ApparelVariant
+from core.identifiers import sync_identifiers
+from core.images import MAX_IMAGE_DIMENSION, derivative_names
+from core.inventory import INVENTORY_TYPES
+from core.models import Department, StockAdjustmentReason, Stocktake, StocktakeLine, TakeReason
+from core.replicas import PIN_COOKIE, REPLICA_ALIAS, REPLICA_PIN_SECONDS, ReplicaRouter
+from core.spa import negotiate_encoding
+from core.stock import apply_adjustments
+from core.stocktake import apply_stocktake, record_counts, start_stocktake, variance_lines
+from core.uploads import CONFIRM_TTL, MAX_UPLOAD_BYTES, TICKET_SALT, UPLOAD_URL_TTL
+from core.views import local_upload
+from documents.models import Document, DocumentBlob
+from executive.models import ExecutiveCategory
+from gifts.models import Gift, GiftCategory
+from item_requests.models import ACTIVE_STATUSES, ItemRequest, ItemRequestItem
+from miscellaneous.models import MiscellaneousCategory
+from office.models import OfficeCategory, OfficeItem
+from reports.models import ConsumptionForecast, DepartmentCostRollup, StockSnapshot
+
+
+# Checks that each hot list query is answered from its index, by reading the
+# database's own EXPLAIN output for the queryset the view builds.
+# On PostgreSQL sequential scans are disabled for the test transaction:
+# with a near-empty test database the planner would otherwise prefer them.
+class HotQueryIndexTests(TestCase):
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'sqlite':
+            # The index also provides the Meta.ordering: no separate sort step
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_request_lists(self):
+        cases = [
+            (ItemRequest.objects.all(), 'itemrequest_created_idx'),
+            (ItemRequest.objects.filter(requested_by_id=1), 'itemrequest_requester_idx'),
+            (ItemRequest.objects.filter(status='pending'), 'itemrequest_status_idx'),
+        ]
+        for queryset, index_name in cases:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset, index_name)
+
+    def test_active_requests(self):
+        queryset = ItemRequest.objects.filter(status__in=ACTIVE_STATUSES)
+        if connection.vendor == 'postgresql':
+            self.assertUsesIndex(queryset, 'itemrequest_active_idx')
+        else:
+            # SQLite only uses a partial index for literal values, never for
+            # the bound parameters Django sends, so it falls back to the
+            # status index (and sorts the few open requests).
+            self.assertIn('itemrequest_status_idx', queryset.explain())
+
+    def test_requests_referencing_item(self):
+        queryset = ItemRequestItem.objects.filter(item_type='gift', item_id=1)
+        self.assertUsesIndex(queryset, 'requestline_item_idx')
+
+    def test_transaction_histories(self):
+        for item_type, entry in INVENTORY_TYPES.items():
+            with self.subTest(item_type=item_type):
+                queryset = entry['transaction_model'].objects.filter(**{entry['transaction_fk']: 1})
+                index_name = next(
+                    index.name for index in entry['transaction_model']._meta.indexes
+                    if index.name.endswith('_txn_history_idx')
+                )
+                self.assertUsesIndex(queryset, index_name)
+
+    def test_apparel_sizes(self):
+        self.assertUsesIndex(ApparelSize.objects.all(), 'apparelsize_order_idx')
+
+
+# ============================================
+# QUERY BUDGETS
+# ============================================
+
+# Most queries one request to each API route may run. Every route under
+# api/ has to be listed here or in UNMEASURED_ROUTES, so a new endpoint
+# can't be added without a budget. QueryBudgetTests also fails if a
+# route's query count changes between the small and the large fixtures,
+# whatever its budget: a view whose queries grow with the rows it returns
+# (an N+1) fails CI even while the fixtures are still small.
+QUERY_BUDGETS = {
+    'api/user/register/': 8,
+    'api/token/': 3,
+    'api/token/refresh/': 4,
+    'api/reasons/': 2,
+    'api/user/me/': 3,
+    'api/stock-adjustment-reasons/': 2,
+    'api/core/departments/': 2,
+    'api/stock/bulk-adjust/': 19,
+    'api/catalog/import/': 6,
+    'api/stocktakes/': 2,
+    'api/stocktakes/<int:pk>/': 2,
+    'api/stocktakes/<int:pk>/counts/': 9,
+    'api/stocktakes/<int:pk>/variances/': 3,
+    'api/stocktakes/<int:pk>/apply/': 14,
+    'api/scan/session/': 14,
+    'api/scan/<str:code>/': 2,
+    'api/uploads/tickets/': 2,
+    'api/apparel/sizes/': 2,
+    'api/apparel/colors/': 2,
+    'api/apparel/categories/': 2,
+    'api/apparel/products/': 3,
+    'api/apparel/products/<int:pk>/': 3,
+    'api/apparel/products/<int:pk>/variants/matrix/': 13,
+    'api/apparel/variants/': 2,
+    'api/apparel/variants/<int:pk>/': 2,
+    'api/apparel/variants/update-stock/<int:pk>/': 6,
+    'api/apparel/transactions/': 2,
+    'api/requests/departments/': 2,
+    'api/requests/': 5,
+    'api/requests/<int:pk>/': 5,
+    'api/requests/<int:pk>/submit/': 50,
+    'api/requests/<int:pk>/cancel/': 35,
+    'api/requests/<int:pk>/status/': 3,
+    'api/requests/<int:pk>/items/add/': 7,
+    'api/requests/<int:pk>/items/<int:item_pk>/': 7,
+    'api/requests/<int:pk>/items/<int:item_pk>/confirm/': 16,
+    'api/documents/': 2,
+    'api/documents/batch/': 2,
+    'api/documents/search/': 4,
+    'api/documents/<int:pk>/download/': 2,
+    'api/documents/delete/<int:pk>/': 9,
+    'api/reports/stock-snapshots/': 2,
+    'api/reports/stock-valuation/': 3,
+    'api/reports/consumption-forecasts/': 2,
+    'api/reports/reorder-recommendations/': 13,
+    'api/reports/department-costs/': 2,
+    'api/gifts/': 2,
+    'api/gifts/delete/<int:pk>/': 6,
+    'api/gifts/update-stock/<int:pk>/': 6,
+    'api/gifts/update/<int:pk>/': 5,
+    'api/gifts/categories/': 2,
+    'api/gifts/<int:pk>/transactions/': 2,
+    'api/office/': 2,
+    'api/office/delete/<int:pk>/': 6,
+    'api/office/update-stock/<int:pk>/': 6,
+    'api/office/update/<int:pk>/': 5,
+    'api/office/categories/': 2,
+    'api/office/<int:pk>/transactions/': 2,
+    'api/miscellaneous/': 2,
+    'api/miscellaneous/delete/<int:pk>/': 6,
+    'api/miscellaneous/update-stock/<int:pk>/': 6,
+    'api/miscellaneous/update/<int:pk>/': 5,
+    'api/miscellaneous/categories/': 2,
+    'api/miscellaneous/<int:pk>/transactions/': 2,
+    'api/executive/': 2,
+    'api/executive/delete/<int:pk>/': 6,
+    'api/executive/update-stock/<int:pk>/': 6,
+    'api/executive/update/<int:pk>/': 5,
+    'api/executive/categories/': 2,
+    'api/executive/<int:pk>/transactions/': 2,
+}
+
+# Routes the budget test can't call meaningfully, and why.
+UNMEASURED_ROUTES = {
+    'api/auth/microsoft/': "needs an access token signed by Microsoft",
+    'api/uploads/confirm/': "validates a file that must first be PUT to storage",
+    'api/uploads/local/<str:token>/': "writes to storage, not the database",
+}
+
+SMALL_ROWS = 10
+LARGE_ROWS = 500
+
+
+# Every route in config/urls.py under api/, as its pattern string.
+def api_routes(patterns=None, prefix=''):
+    routes = []
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            routes += api_routes(pattern.url_patterns, route)
+        elif route.startswith('api/'):
+            routes.append(route)
+    return routes
+
+
+# Statements of a capture grouped by their SQL with literals blanked out,
+# most repeated first: an N+1 shows up as one statement run once per row.
+def repeated_sql(queries, limit=5):
+    shapes = Counter(re.sub(r"'[^']*'|\b\d+\b", '?', query['sql']) for query in queries)
+    return '\n'.join(f'{count:>6} x {sql[:300]}' for sql, count in shapes.most_common(limit))
+
+
+# Rows for the budget test. The constructor creates the objects the
+# requests are made against; grow(n) then adds n rows to every table those
+# endpoints read, including n more children of those objects (transactions
+# of the item whose history is listed, lines of the request that is
+# shown, documents of one gift, ...). Requests that change something act on
+# objects whose size doesn't depend on n, e.g. a draft request with three
+# lines.
+class QueryBudgetFixtures:
+    CATEGORY_MODELS = {
+        'gift': GiftCategory,
+        'executive': ExecutiveCategory,
+        'office': OfficeCategory,
+        'miscellaneous': MiscellaneousCategory,
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self.rows = 0
+        self.department = Department.objects.create(name='Department 0')
+        self.take_reason = TakeReason.objects.create(reason_name='Reason 0')
+        self.reason = StockAdjustmentReason.objects.create(name='Adjustment 0')
+
+        self.items = {}
+        for item_type, category_model in self.CATEGORY_MODELS.items():
+            config = INVENTORY_TYPES[item_type]
+            self.items[item_type] = config['model'].objects.create(**{
+                config['name']: f'{item_type} 0',
+                'category': category_model.objects.create(name=f'{item_type} category 0'),
+                'qty_stock': 1000,
+                'unit_price': Decimal('2.50'),
+                'merchant_product_id': f'{item_type.upper()}-0',
+            })
+        self.product = ApparelProduct.objects.create(
+            product_name='Apparel 0',
+            category=ApparelCategory.objects.create(name='Apparel category 0'),
+            unit_price=Decimal('12.00'),
+        )
+        self.size = ApparelSize.objects.create(size_value='M', size_type='clothing')
+        self.color = ApparelColor.objects.create(color_name='Colour 0')
+        self.items['apparel'] = ApparelVariant.objects.create(
+            product=self.product, size=self.size, color=self.color, qty_stock=1000, sku='APPAREL-0',
+        )
+
+        self.request = self._request('ready')  # shown and listed; gains a line per row
+        self.draft = self._request('draft')    # submitted
+        self.pending = self._request('pending')  # cancelled, its lines confirmed
+        for item_request in (self.draft, self.pending):
+            for item_type in ('gift', 'apparel', 'office'):
+                self._line(item_request, item_type, self.items[item_type].pk)
+
+        # Carries the documents, so the gift that gets deleted doesn't
+        self.documented = Gift.objects.create(
+            product_name='Documented gift', category=self.items['gift'].category,
+            qty_stock=1, unit_price=Decimal('2.50'), merchant_product_id='GIFT-DOCS',
+        )
+        self.document = self._document(0)
+        self.stocktake = Stocktake.objects.create(name='Stocktake 0', created_by=user)
+
+    def _request(self, status):
+        return ItemRequest.objects.create(
+            requested_by=self.user,
+            department=self.department,
+            reason=self.take_reason,
+            status=status,
+            date_needed=date(2026, 6, 1),
+        )
+
+    def _line(self, item_request, item_type, item_id):
+        return ItemRequestItem.objects.create(
+            request=item_request, item_type=item_type, item_id=item_id,
+            quantity_requested=2, unit_price=Decimal('2.50'),
+        )
+
+    def _document(self, index):
+        blob = DocumentBlob.objects.create(
+            sha256=f'{index:064x}', file=f'documents/sha256/{index}.pdf', size=100, text=f'invoice {index}',
+        )
+        return Document.objects.create(
+            file=blob.file.name, blob=blob, original_filename=f'invoice-{index}.pdf',
+            content_type=ContentType.objects.get_for_model(Gift), object_id=self.documented.pk,
+            uploaded_by=self.user,
+        )
+
+    def _ledger(self, item_type, count):
+        config = INVENTORY_TYPES[item_type]
+        config['transaction_model'].objects.bulk_create([
+            config['transaction_model'](**{
+                config['transaction_fk']: self.items[item_type],
+                'transaction_type': 'take',
+                'quantity': 1,
+                'reason': self.reason,
+                'created_by': self.user,
+                'stock_before': 1000,
+                'stock_after': 999,
+            })
+            for _ in range(count)
+        ])
+
+    def grow(self, count):
+        new = range(self.rows + 1, self.rows + count + 1)
+        self.rows += count
+        today = timezone.localdate()
+
+        created = {}
+        for item_type, category_model in self.CATEGORY_MODELS.items():
+            config = INVENTORY_TYPES[item_type]
+            categories = category_model.objects.bulk_create([
+                category_model(name=f'{item_type} category {i}') for i in new
+            ])
+            items = config['model'].objects.bulk_create([
+                config['model'](**{
+                    config['name']: f'{item_type} {i}',
+                    'category': category,
+                    'qty_stock': i,
+                    'unit_price': Decimal('2.50'),
+                    'merchant_product_id': f'{item_type.upper()}-{i}',
+                    'created_by': self.user,
+                    **({'department': self.department} if item_type in ('office', 'miscellaneous') else {}),
+                })
+                for i, category in zip(new, categories)
+            ])
+            sync_identifiers(config['model'], items)
+            created[item_type] = items
+
+        sizes = ApparelSize.objects.bulk_create([
+            ApparelSize(size_value=f'S{i}', size_type='clothing', display_order=i) for i in new
+        ])
+        colors = ApparelColor.objects.bulk_create([ApparelColor(color_name=f'Colour {i}') for i in new])
+        products = ApparelProduct.objects.bulk_create([
+            ApparelProduct(
+                product_name=f'Apparel {i}',
+                category=ApparelCategory.objects.create(name=f'Apparel category {i}'),
+                primary_color=color,
+                unit_price=Decimal('12.00'),
+            )
+            for i, color in zip(new, colors)
+        ])
+        variants = ApparelVariant.objects.bulk_create(
+            [
+                ApparelVariant(product=product, size=size, color=color, qty_stock=i, sku=f'APPAREL-{i}')
+                for i, product, size, color in zip(new, products, sizes, colors)
+            ] + [
+                # More variants of the product that is shown
+                ApparelVariant(product=self.product, size=size, color=self.color, qty_stock=i, sku=f'APPAREL-0-{i}')
+                for i, size in zip(new, sizes)
+            ]
+        )
+        sync_identifiers(ApparelVariant, variants)
+        created['apparel'] = variants
+
+        for item_type in INVENTORY_TYPES:
+            self._ledger(item_type, count)
+
+        departments = Department.objects.bulk_create([Department(name=f'Department {i}') for i in new])
+        requests = ItemRequest.objects.bulk_create([
+            ItemRequest(
+                requested_by=self.user, department=department, reason=self.take_reason,
+                status='pending', date_needed=date(2026, 6, 1),
+            )
+            for department in departments
+        ])
+        ItemRequestItem.objects.bulk_create(
+            [
+                ItemRequestItem(request=item_request, item_type=item_type, item_id=item.pk, quantity_requested=1)
+                for item_request, gift, variant in zip(requests, created['gift'], created['apparel'])
+                for item_type, item in (('gift', gift), ('apparel', variant))
+            ] + [
+                ItemRequestItem(request=self.request, item_type=item_type, item_id=items[0].pk, quantity_requested=1)
+                for item_type, items in created.items()
+                for _ in range(count // len(created) + 1)
+            ]
+        )
+
+        for i in new:
+            self._document(i)
+
+        StockSnapshot.objects.bulk_create([
+            StockSnapshot(snapshot_date=today, item_type='gift', item_id=gift.pk, qty_stock=gift.qty_stock, unit_price=gift.unit_price)
+            for gift in created['gift']
+        ])
+        ConsumptionForecast.objects.bulk_create([
+            ConsumptionForecast(item_type='gift', item_id=gift.pk, qty_stock=gift.qty_stock, computed_at=timezone.now())
+            for gift in created['gift']
+        ])
+        DepartmentCostRollup.objects.bulk_create([
+            DepartmentCostRollup(department=department, month=today.replace(day=1), item_type='gift', reason=self.take_reason, units=1, cost=Decimal('2.50'))
+            for department in departments
+        ])
+        StocktakeLine.objects.bulk_create([
+            StocktakeLine(stocktake=self.stocktake, item_type='gift', item_id=gift.pk, baseline_qty=gift.qty_stock, counted_qty=gift.qty_stock + 1, counted_by=self.user)
+            for gift in created['gift']
+        ])
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('budget', password='budget-password')
+        cls.fixtures = QueryBudgetFixtures(cls.user)
+        cls.fixtures.grow(SMALL_ROWS)
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.tokens = tokens_for(self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {self.tokens.access_token}'}
+
+    # route -> (method, URL kwargs, query params for GET or the request body)
+    def endpoint_requests(self):
+        fixtures = self.fixtures
+        items = fixtures.items
+        catalog = SimpleUploadedFile(
+            'catalog.csv',
+            b'product_name,category,qty_stock,unit_price,merchant_product_id\n'
+            b'Updated,gift category 0,5,3.00,GIFT-0\n'
+            b'New,gift category 0,5,3.00,GIFT-NEW\n',
+            content_type='text/csv',
+        )
+        requests = {
+            'api/user/register/': ('post', {}, {'username': 'new-user', 'password': 'new-password'}),
+            'api/token/': ('post', {}, {'username': 'budget', 'password': 'budget-password'}),
+            'api/token/refresh/': ('post', {}, {'refresh': str(self.tokens)}),
+            'api/reasons/': ('get', {}, {}),
+            'api/user/me/': ('get', {}, {}),
+            'api/stock-adjustment-reasons/': ('get', {}, {}),
+            'api/core/departments/': ('get', {}, {}),
+            'api/stock/bulk-adjust/': ('post', {}, [
+                {'item_type': item_type, 'id': item.pk, 'action': 'take', 'quantity': 1, 'reason': fixtures.reason.pk}
+                for item_type, item in items.items()
+            ]),
+            'api/catalog/import/': ('post', {}, {'item_type': 'gift', 'dry_run': 'true', 'file': catalog}),
+            'api/stocktakes/': ('get', {}, {}),
+            'api/stocktakes/<int:pk>/': ('get', {'pk': fixtures.stocktake.pk}, {}),
+            'api/stocktakes/<int:pk>/counts/': ('post', {'pk': fixtures.stocktake.pk}, [
+                {'item_type': item_type, 'id': item.pk, 'counted': 5} for item_type, item in items.items()
+            ]),
+            'api/stocktakes/<int:pk>/variances/': ('get', {'pk': fixtures.stocktake.pk}, {}),
+            'api/stocktakes/<int:pk>/apply/': ('post', {'pk': fixtures.stocktake.pk}, {}),
+            'api/scan/session/': ('post', {}, {
+                'action': 'take', 'reason': fixtures.reason.pk, 'codes': ['GIFT-0', 'GIFT-0', 'APPAREL-0', 'OFFICE-0'],
+            }),
+            'api/scan/<str:code>/': ('get', {'code': 'GIFT-0'}, {}),
+            'api/uploads/tickets/': ('post', {}, {
+                'kind': 'document', 'target': 'gift', 'object_id': items['gift'].pk, 'filename': 'invoice.pdf',
+            }),
+            'api/apparel/sizes/': ('get', {}, {}),
+            'api/apparel/colors/': ('get', {}, {}),
+            'api/apparel/categories/': ('get', {}, {}),
+            'api/apparel/products/': ('get', {}, {'include': 'document_count'}),
+            'api/apparel/products/<int:pk>/': ('get', {'pk': fixtures.product.pk}, {}),
+            'api/apparel/products/<int:pk>/variants/matrix/': ('post', {'pk': fixtures.product.pk}, {
+                'sizes': [fixtures.size.pk], 'colors': [fixtures.color.pk], 'genders': ['U', 'M'], 'qty_stock': 5,
+            }),
+            'api/apparel/variants/': ('get', {}, {}),
+            'api/apparel/variants/<int:pk>/': ('get', {'pk': items['apparel'].pk}, {}),
+            'api/apparel/variants/update-stock/<int:pk>/': ('patch', {'pk': items['apparel'].pk}, {
+                'action': 'take', 'quantity': 1, 'reason': fixtures.reason.pk,
+            }),
+            'api/apparel/transactions/': ('get', {}, {'product_id': fixtures.product.pk}),
+            'api/requests/departments/': ('get', {}, {}),
+            'api/requests/': ('get', {}, {}),
+            'api/requests/<int:pk>/': ('get', {'pk': fixtures.request.pk}, {}),
+            'api/requests/<int:pk>/submit/': ('patch', {'pk': fixtures.draft.pk}, {}),
+            'api/requests/<int:pk>/cancel/': ('patch', {'pk': fixtures.pending.pk}, {}),
+            'api/requests/<int:pk>/status/': ('patch', {'pk': fixtures.pending.pk}, {'status': 'completed'}),
+            'api/requests/<int:pk>/items/add/': ('post', {'pk': fixtures.draft.pk}, {
+                'item_type': 'gift', 'item_id': items['gift'].pk, 'quantity_requested': 1,
+            }),
+            'api/requests/<int:pk>/items/<int:item_pk>/': ('patch', {
+                'pk': fixtures.draft.pk, 'item_pk': fixtures.draft.items.first().pk,
+            }, {'quantity_requested': 3}),
+            'api/requests/<int:pk>/items/<int:item_pk>/confirm/': ('patch', {
+                'pk': fixtures.pending.pk, 'item_pk': fixtures.pending.items.first().pk,
+            }, {'quantity_confirmed': 1}),
+            'api/documents/': ('get', {}, {'content_type': 'gift', 'object_id': fixtures.documented.pk}),
+            'api/documents/batch/': ('get', {}, {
+                'content_type': 'gift', 'object_ids': ','.join(str(pk) for pk in Gift.objects.values_list('pk', flat=True)[:100]),
+            }),
+            'api/documents/search/': ('get', {}, {'q': 'invoice'}),
+            'api/documents/<int:pk>/download/': ('get', {'pk': fixtures.document.pk}, {}),
+            'api/documents/delete/<int:pk>/': ('delete', {'pk': fixtures.document.pk}, {}),
+            'api/reports/stock-snapshots/': ('get', {}, {}),
+            'api/reports/stock-valuation/': ('get', {}, {}),
+            'api/reports/consumption-forecasts/': ('get', {}, {}),
+            'api/reports/reorder-recommendations/': ('get', {}, {}),
+            'api/reports/department-costs/': ('get', {}, {}),
+        }
+        for item_type, prefix in (
+            ('gift', 'api/gifts/'),
+            ('office', 'api/office/'),
+            ('miscellaneous', 'api/miscellaneous/'),
+            ('executive', 'api/executive/'),
+        ):
+            pk = {'pk': items[item_type].pk}
+            requests.update({
+                prefix: ('get', {}, {'include': 'document_count'}),
+                f'{prefix}delete/<int:pk>/': ('delete', pk, {}),
+                f'{prefix}update-stock/<int:pk>/': ('patch', pk, {'action': 'take', 'quantity': 1, 'reason': fixtures.reason.pk}),
+                f'{prefix}update/<int:pk>/': ('patch', pk, {'notes': 'Updated'}),
+                f'{prefix}categories/': ('get', {}, {}),
+                f'{prefix}<int:pk>/transactions/': ('get', pk, {}),
+            })
+        return requests
+
+    # Makes one request and returns (response, the queries it ran). Whatever
+    # it changes is rolled back, so every request sees the same fixtures.
+    def send(self, route, method, kwargs, data):
+        path = '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda match: str(kwargs[match.group(1)]), route)
+        headers = dict(self.auth)
+        if route == 'api/documents/<int:pk>/download/':
+            headers['HTTP_IF_NONE_MATCH'] = f'"{self.fixtures.document.blob.sha256}"'  # no storage access
+        if method == 'get':
+            arguments = {'data': data}
+        elif isinstance(data, dict) and any(isinstance(value, SimpleUploadedFile) for value in data.values()):
+            for value in data.values():
+                if isinstance(value, SimpleUploadedFile):
+                    value.seek(0)
+            arguments = {'data': data}
+        else:
+            arguments = {'data': data, 'content_type': 'application/json'}
+
+        connection.queries_log.clear()  # holds at most 9000 queries; a capture needs room
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(path, **arguments, **headers)
+            transaction.set_rollback(True)
+        return response, queries.captured_queries
+
+    # Query counts of every budgeted route, each measured on its second call
+    # so per-process caches (content types, group ids) are already warm.
+    def measure(self):
+        results = {}
+        for route, (method, kwargs, data) in self.endpoint_requests().items():
+            self.send(route, method, kwargs, data)
+            results[route] = self.send(route, method, kwargs, data)
+        return results
+
+    def test_every_route_has_a_budget(self):
+        routes = set(api_routes())
+        self.assertEqual(set(), routes - set(QUERY_BUDGETS) - set(UNMEASURED_ROUTES), 'Routes without a query budget')
+        self.assertEqual(set(), (set(QUERY_BUDGETS) | set(UNMEASURED_ROUTES)) - routes, 'Budgets for unknown routes')
+        self.assertEqual(set(QUERY_BUDGETS), set(self.endpoint_requests()))
+
+    def test_query_counts(self):
+        small = self.measure()
+        self.fixtures.grow(LARGE_ROWS - SMALL_ROWS)
+        large = self.measure()
+
+        for route, (response, queries) in large.items():
+            with self.subTest(route=route):
+                small_count, large_count = len(small[route][1]), len(queries)
+                self.assertLess(response.status_code, 400, f'{route} failed: {response.content[:300]!r}')
+                self.assertEqual(
+                    small_count, large_count,
+                    f'{route} ran {small_count} queries with {SMALL_ROWS} rows but {large_count} with '
+                    f'{LARGE_ROWS}. Most repeated:\n{repeated_sql(queries)}'
+                )
+                self.assertLessEqual(
+                    large_count, QUERY_BUDGETS.get(route, 0),
+                    f'{route} ran {large_count} queries, over its budget of {QUERY_BUDGETS.get(route)}. '
+                    f'Most repeated:\n{repeated_sql(queries)}'
+                )
+
+
+# ============================================
+# BULK STOCK ADJUSTMENT
+# ============================================
+
+class BulkStockAdjustTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('adjuster')
+        cls.reason = StockAdjustmentReason.objects.create(name='Event')
+        cls.mug = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=10, unit_price=1,
+        )
+        cls.pen = OfficeItem.objects.create(
+            item_name='Pen', category=OfficeCategory.objects.create(name='Pens'), qty_stock=4, unit_price=1,
+        )
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def adjust(self, *lines):
+        return self.client.post('/api/stock/bulk-adjust/', [
+            {'item_type': item_type, 'id': item.pk, 'action': action, 'quantity': quantity, 'reason': self.reason.pk}
+            for item_type, item, action, quantity in lines
+        ], content_type='application/json', **self.auth)
+
+    def ledger(self, item_type):
+        config = INVENTORY_TYPES[item_type]
+        return list(config['transaction_model'].objects.order_by('pk').values_list(
+            'transaction_type', 'quantity', 'stock_before', 'stock_after',
+        ))
+
+    def assertUnchanged(self):
+        self.mug.refresh_from_db()
+        self.pen.refresh_from_db()
+        self.assertEqual((self.mug.qty_stock, self.pen.qty_stock), (10, 4))
+        self.assertEqual(self.ledger('gift') + self.ledger('office'), [])
+
+    def test_batch_is_applied_with_its_ledger(self):
+        response = self.adjust(
+            ('gift', self.mug, 'take', 3),
+            ('office', self.pen, 'return', 2),
+            ('gift', self.mug, 'take', '4'),
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [(line['index'], line['stock_before'], line['stock_after']) for line in response.json()['results']],
+            [(0, 10, 7), (1, 4, 6), (2, 7, 3)],
+        )
+        self.mug.refresh_from_db()
+        self.pen.refresh_from_db()
+        self.assertEqual((self.mug.qty_stock, self.pen.qty_stock), (3, 6))
+        self.assertEqual(self.ledger('gift'), [('take', 3, 10, 7), ('take', 4, 7, 3)])
+        self.assertEqual(self.ledger('office'), [('return', 2, 4, 6)])
+
+    def test_invalid_line_rejects_the_batch(self):
+        for quantity in (2.7, '2.7', True, 0, -1, None, [1]):
+            with self.subTest(quantity=quantity):
+                response = self.adjust(('gift', self.mug, 'take', 1), ('office', self.pen, 'take', quantity))
+
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertEqual([error['index'] for error in response.json()['errors']], [1])
+                self.assertUnchanged()
+
+    def test_insufficient_stock_on_one_line_blocks_the_batch(self):
+        response = self.adjust(
+            ('gift', self.mug, 'take', 1),
+            ('office', self.pen, 'take', 3),
+            ('office', self.pen, 'take', 2),
+        )
+
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(response.json()['errors'], [{'index': 2, 'errors': ['Insufficient stock. Only 1 available.']}])
+        self.assertUnchanged()
+
+
+# ============================================
+# CATALOG IMPORT
+# ============================================
+
+class CatalogImportFileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('importer', password='importer-password')
+        GiftCategory.objects.create(name='Pens')
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def upload(self, name, content):
+        return self.client.post('/api/catalog/import/', {
+            'item_type': 'gift', 'file': SimpleUploadedFile(name, content),
+        }, **self.auth)
+
+    def csv_rows(self, count):
+        return b''.join(
+            f'Pen {i},Pens,1,1.00,PEN-{i}\n'.encode() for i in range(count)
+        )
+
+    def test_csv_is_imported(self):
+        response = self.upload('catalog.csv', b'product_name,category,qty_stock,unit_price,merchant_product_id\n' + self.csv_rows(3))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Gift.objects.count(), 3)
+
+    def test_csv_that_is_not_utf8_writes_nothing(self):
+        # The undecodable row comes after the first full batch
+        content = (
+            b'product_name,category,qty_stock,unit_price,merchant_product_id\n'
+            + self.csv_rows(BATCH_SIZE + 10)
+            + 'Crème,Pens,1,1.00,PEN-LATIN1\n'.encode('latin-1')
+        )
+        response = self.upload('catalog.csv', content)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.json()['error'])
+        self.assertFalse(Gift.objects.exists())
+
+    def test_damaged_xlsx(self):
+        for content in (b'not a workbook', b'PK\x03\x04' + b'\x00' * 64):
+            with self.subTest(content=content[:8]):
+                response = self.upload('catalog.xlsx', content)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+        self.assertFalse(Gift.objects.exists())
+
+
+# ============================================
+# STOCKTAKES
+# ============================================
+
+class StocktakeReconciliationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('counter', password='counter-password')
+        self.reason = StockAdjustmentReason.objects.create(name='Event')
+        category = GiftCategory.objects.create(name='Mugs')
+        self.taken_before = Gift.objects.create(product_name='Mug A', category=category, qty_stock=10, unit_price=1)
+        self.taken_after = Gift.objects.create(product_name='Mug B', category=category, qty_stock=10, unit_price=1)
+        self.stocktake = start_stocktake('Year end', self.user, ['gift'])
+
+    def take(self, gift, quantity):
+        results, errors = apply_adjustments([{
+            'index': 0, 'item_type': 'gift', 'id': gift.pk, 'action': 'take',
+            'quantity': quantity, 'reason': self.reason, 'notes': '',
+        }], self.user)
+        self.assertEqual(errors, {})
+
+    def count(self, gift, counted):
+        recorded, errors = record_counts(self.stocktake, [{'item_type': 'gift', 'id': gift.pk, 'counted': counted}], self.user)
+        self.assertEqual((recorded, errors), (1, {}))
+
+    def test_movements_during_the_count_are_reconciled(self):
+        # Frozen at 10, taken down to 8, then counted at 8: nothing missing
+        self.take(self.taken_before, 2)
+        self.count(self.taken_before, 8)
+        # Frozen at 10 and counted at 8 (2 missing), then 2 taken
+        self.count(self.taken_after, 8)
+        self.take(self.taken_after, 2)
+
+        variances = {line.item_id: (line.expected_qty, line.variance) for line in variance_lines(self.stocktake)}
+        self.assertEqual(variances, {self.taken_after.pk: (10, -2)})
+
+        results, errors = apply_stocktake(self.stocktake, self.user)
+        self.assertEqual(errors, [])
+        self.taken_before.refresh_from_db()
+        self.taken_after.refresh_from_db()
+        self.assertEqual(self.taken_before.qty_stock, 8)
+        self.assertEqual(self.taken_after.qty_stock, 6)
+
+    def test_session_list_counts_the_reported_variances(self):
+        self.take(self.taken_before, 2)
+        self.count(self.taken_before, 8)
+        self.count(self.taken_after, 7)
+
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+        listed = client.get('/api/stocktakes/', **auth).json()
+        variances = client.get(f'/api/stocktakes/{self.stocktake.pk}/variances/', **auth).json()
+
+        self.assertEqual(len(variances), 1)
+        self.assertEqual(listed[0]['lines_with_variance'], 1)
+
+    def test_movement_before_the_start_is_only_in_the_baseline(self):
+        self.take(self.taken_before, 3)
+        stocktake = start_stocktake('Recount', self.user, ['gift'])
+        last_take = INVENTORY_TYPES['gift']['transaction_model'].objects.latest('created_at')
+        self.assertGreater(stocktake.created_at, last_take.created_at)
+
+        record_counts(stocktake, [{'item_type': 'gift', 'id': self.taken_before.pk, 'counted': 7}], self.user)
+        self.assertFalse(variance_lines(stocktake).exists())
+
+
+# ============================================
+# SCANNING
+# ============================================
+
+class ScanAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('office-clerk', password='clerk-password')
+        cls.user.groups.add(Group.objects.create(name='office_access'))
+        Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'),
+            qty_stock=5, unit_price=1, merchant_product_id='MUG-1',
+        )
+        cls.office_item = OfficeItem.objects.create(
+            item_name='Stapler', category=OfficeCategory.objects.create(name='Desk'),
+            qty_stock=5, unit_price=1, merchant_product_id='STAPLER-1',
+        )
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def test_items_outside_the_users_inventories_are_not_found(self):
+        response = self.client.get('/api/scan/MUG-1/', **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get('/api/scan/STAPLER-1/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'item_type': 'office', 'id': self.office_item.pk})
+
+    def test_session_rejects_items_outside_the_users_inventories(self):
+        response = self.client.post('/api/scan/session/', {
+            'action': 'take', 'reason': StockAdjustmentReason.objects.create(name='Event').pk, 'codes': ['MUG-1'],
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['errors'], ["No item found for this code."])
+
+
+class ScanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('scanner')
+        cls.reason = StockAdjustmentReason.objects.create(name='Event')
+        cls.mug = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=5, unit_price=1,
+            merchant_product_id='Mug-1', standardised_product_id='NO',
+        )
+        cls.product = ApparelProduct.objects.create(
+            product_name='Polo', category=ApparelCategory.objects.create(name='Polos'), unit_price=Decimal('12.00'),
+            merchant_product_id='POLO',
+        )
+        cls.polo = ApparelVariant.objects.create(
+            product=cls.product, size=ApparelSize.objects.create(size_value='M', size_type='clothing'),
+            color=ApparelColor.objects.create(color_name='Navy'), qty_stock=2, sku='POLO-M-NAVY',
+        )
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def scan(self, code):
+        return self.client.get(f'/api/scan/{code}/', **self.auth)
+
+    def session(self, *codes):
+        return self.client.post('/api/scan/session/', {
+            'action': 'take', 'reason': self.reason.pk, 'codes': list(codes),
+        }, content_type='application/json', **self.auth)
+
+    def test_codes_resolve_to_their_items(self):
+        self.assertEqual(self.scan(' mug-1 ').json(), {'item_type': 'gift', 'id': self.mug.pk})
+        self.assertEqual(self.scan('polo-m-navy').json(), {'item_type': 'apparel', 'id': self.polo.pk})
+        self.assertEqual(self.scan('POLO').json(), {'item_type': 'apparel_product', 'id': self.product.pk})
+        self.assertEqual(self.scan('NO').status_code, 404)  # placeholder, never indexed
+
+    def test_index_follows_item_changes(self):
+        self.mug.merchant_product_id = 'MUG-2'
+        self.mug.save()
+        self.assertEqual(self.scan('MUG-1').status_code, 404)
+        self.assertEqual(self.scan('MUG-2').json(), {'item_type': 'gift', 'id': self.mug.pk})
+
+        # A save that only touches other fields doesn't even read the index
+        with self.assertNumQueries(1):
+            self.mug.save(update_fields=['qty_stock'])
+
+        self.polo.delete()
+        self.assertEqual(self.scan('POLO-M-NAVY').status_code, 404)
+
+    def test_shared_code_lists_every_match(self):
+        pen = OfficeItem.objects.create(
+            item_name='Pen', category=OfficeCategory.objects.create(name='Pens'), qty_stock=1, unit_price=1,
+            manufacturer_product_id='MUG-1',
+        )
+        response = self.scan('MUG-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertCountEqual(response.json()['matches'], [
+            {'item_type': 'gift', 'id': self.mug.pk}, {'item_type': 'office', 'id': pen.pk},
+        ])
+
+    def test_session_takes_one_unit_per_scan(self):
+        response = self.session('MUG-1', 'mug-1', 'POLO-M-NAVY', 'MUG-1')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.mug.refresh_from_db()
+        self.polo.refresh_from_db()
+        self.assertEqual((self.mug.qty_stock, self.polo.qty_stock), (2, 1))
+        self.assertEqual(
+            list(self.mug.transactions.values_list('quantity', 'stock_before', 'stock_after')), [(3, 5, 2)],
+        )
+
+    def test_session_is_all_or_nothing(self):
+        for codes, problem in [
+            (['MUG-1', 'UNKNOWN'], "No item found for this code."),
+            (['MUG-1', 'POLO'], "This is an apparel product code. Scan a variant SKU instead."),
+            (['MUG-1', 'POLO-M-NAVY', 'POLO-M-NAVY', 'POLO-M-NAVY'], "Insufficient stock. Only 2 available."),
+        ]:
+            with self.subTest(codes=codes):
+                response = self.session(*codes)
+
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertEqual(response.json()['errors'][0]['errors'], [problem])
+                self.mug.refresh_from_db()
+                self.assertEqual(self.mug.qty_stock, 5)
+                self.assertFalse(self.mug.transactions.exists())
+
+
+# ============================================
+# PRODUCT IMAGE UPLOADS
+# ============================================
+
+IMMEDIATE_TASKS = {'default': {'BACKEND': 'django.tasks.backends.immediate.ImmediateBackend'}}
+QUEUED_TASKS = {'default': {'BACKEND': 'django_tasks_db.DatabaseBackend'}}
+
+
+# Points default storage and the image spool at fresh temporary directories
+# for the rest of the test. Returns (media directory, spool directory).
+def use_local_media(test):
+    media, spool = tempfile.mkdtemp(), tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media)
+    test.addCleanup(shutil.rmtree, spool)
+    storage = override_settings(
+        STORAGES={**settings.STORAGES, 'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': media, 'base_url': '/media/'},
+        }},
+        IMAGE_SPOOL_DIR=spool,
+    )
+    storage.enable()
+    test.addCleanup(storage.disable)
+    return media, spool
+
+
+# Uploads go through the real gift endpoint into a throwaway local
+# FileSystemStorage and spool directory. Saves commit for real (as in
+# production) so the on-commit hooks run before the response is rendered;
+# available_apps lets the flush between tests cascade into the legacy api_*
+# tables that still reference auth_user.
+class ProductImageUploadTests(TransactionTestCase):
+    available_apps = settings.INSTALLED_APPS
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('photographer', password='photographer-password')
+        self.category = GiftCategory.objects.create(name='Mugs')
+        self.media, self.spool = use_local_media(self)
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    # A 3000x1200 camera JPEG tagged "rotate 90°" (so upright it is
+    # 1200x3000), carrying the camera make and a GPS position.
+    def photo(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation
+        exif[0x010F] = 'Camera maker'  # Make
+        exif[0x8825] = {1: 'N', 2: (52.0, 22.0, 0.0)}  # GPSInfo
+        buffer = BytesIO()
+        Image.new('RGB', (3000, 1200), (200, 30, 30)).save(buffer, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile('holiday.jpeg', buffer.getvalue(), content_type='image/jpeg')
+
+    def upload(self):
+        response = self.client.post('/api/gifts/', {
+            'product_name': 'Mug', 'category_id': self.category.pk, 'qty_stock': 5, 'unit_price': '2.50',
+            'product_image': self.photo(),
+        }, **self.auth)
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json(), Gift.objects.get(pk=response.json()['id'])
+
+    @override_settings(TASKS=IMMEDIATE_TASKS)
+    def test_upload_is_normalised_and_recorded(self):
+        data, gift = self.upload()
+
+        name = gift.product_image.name
+        self.assertTrue(name.startswith('gift_images/') and name.endswith('.jpg'), name)
+        with default_storage.open(name) as stored, Image.open(stored) as image:
+            self.assertEqual(image.size, (MAX_IMAGE_DIMENSION * 1200 // 3000, MAX_IMAGE_DIMENSION))
+            self.assertEqual(len(image.getexif()), 0)
+        for derivative in derivative_names(name):
+            self.assertTrue(default_storage.exists(derivative), derivative)
+        self.assertEqual(os.listdir(self.spool), [])
+
+        # The response describes the stored record, not the upload
+        self.assertTrue(data['product_image'].endswith(name))
+        self.assertIsNotNone(data['product_image_derivatives'])
+
+    @override_settings(TASKS=QUEUED_TASKS)
+    def test_upload_is_spooled_until_the_worker_runs(self):
+        data, gift = self.upload()
+
+        self.assertIsNone(data['product_image'])
+        self.assertFalse(gift.product_image)
+        self.assertEqual(len(os.listdir(self.spool)), 1)
+        self.assertEqual(os.listdir(self.media), [])
+
+        call_command('db_worker', batch=True, startup_delay=False, stdout=StringIO(), stderr=StringIO())
+
+        gift.refresh_from_db()
+        self.assertTrue(gift.product_image.name.startswith('gift_images/'))
+        self.assertTrue(default_storage.exists(gift.product_image.name))
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_derivatives_keep_the_original_extension(self):
+        self.assertTrue(set(derivative_names('gift_images/mug.png')).isdisjoint(derivative_names('gift_images/mug.jpg')))
+
+    @override_settings(TASKS=IMMEDIATE_TASKS)
+    def test_old_derivatives_are_removed(self):
+        _, gift = self.upload()
+        first = gift.product_image.name
+
+        response = self.client.patch(
+            f'/api/gifts/update/{gift.pk}/', encode_multipart(BOUNDARY, {'product_image': self.photo()}),
+            content_type=MULTIPART_CONTENT, **self.auth,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        gift.refresh_from_db()
+        second = gift.product_image.name
+        self.assertNotEqual(first, second)
+        self.assertFalse(any(default_storage.exists(name) for name in derivative_names(first)))
+        self.assertTrue(all(default_storage.exists(name) for name in derivative_names(second)))
+
+        self.assertEqual(self.client.delete(f'/api/gifts/delete/{gift.pk}/', **self.auth).status_code, 204)
+        self.assertFalse(any(default_storage.exists(name) for name in derivative_names(second)))
+
+
+# ============================================
+# DIRECT UPLOADS
+# ============================================
+
+# The ticket -> PUT -> confirm flow, with local_upload standing in for the
+# storage provider's signed URL.
+@override_settings(TASKS=IMMEDIATE_TASKS)
+class DirectUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('uploader', password='uploader-password')
+        cls.gift = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=5, unit_price=1,
+        )
+
+    def setUp(self):
+        use_local_media(self)
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def ticket(self, kind='document', filename='manual.pdf'):
+        response = self.client.post('/api/uploads/tickets/', {
+            'kind': kind, 'target': 'gift', 'object_id': self.gift.pk, 'filename': filename,
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put(self, ticket, body):
+        return self.client.put(urlsplit(ticket['upload_url']).path, body, content_type='application/octet-stream')
+
+    def confirm(self, ticket):
+        return self.client.post(
+            '/api/uploads/confirm/', {'ticket': ticket['ticket']}, content_type='application/json', **self.auth,
+        )
+
+    def key(self, ticket):
+        return signing.loads(ticket['ticket'], salt=TICKET_SALT)['key']
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn(message, response.json()['error'])
+
+    def test_document_is_attached(self):
+        ticket = self.ticket()
+        self.assertEqual(self.put(ticket, b'%PDF-1.7 manual').status_code, 201)
+
+        response = self.confirm(ticket)
+
+        self.assertEqual(response.status_code, 201, response.content)
+        document = Document.objects.get(pk=response.json()['id'])
+        self.assertEqual((document.object_id, document.original_filename), (self.gift.pk, 'manual.pdf'))
+        self.assertRejected(self.confirm(ticket), 'already been confirmed')
+
+    def test_image_is_processed(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30)).save(buffer, 'PNG')
+        ticket = self.ticket('image', 'photo.png')
+        self.put(ticket, buffer.getvalue())
+
+        self.assertEqual(self.confirm(ticket).status_code, 202)
+
+        self.gift.refresh_from_db()
+        self.assertTrue(default_storage.exists(self.gift.product_image.name))
+        self.assertFalse(default_storage.exists(self.key(ticket)))
+
+    def test_expired_ticket(self):
+        issued = time.time() - UPLOAD_URL_TTL - CONFIRM_TTL - 1
+        with mock.patch('django.core.signing.time.time', return_value=issued):
+            ticket = self.ticket()
+        self.assertEqual(self.put(ticket, b'%PDF-1.7').status_code, 403)
+        self.assertRejected(self.confirm(ticket), 'expired')
+
+    def test_tampered_ticket(self):
+        ticket = self.ticket()
+        self.put(ticket, b'%PDF-1.7')
+        signature = ticket['ticket'].split(':', 1)[1]
+        claims = signing.loads(ticket['ticket'], salt=TICKET_SALT)
+        other_item = signing.dumps({**claims, 'object_id': claims['object_id'] + 1}, salt=TICKET_SALT)
+        # Another payload under this ticket's signature, and a cut signature
+        self.assertRejected(self.confirm({'ticket': f"{other_item.split(':')[0]}:{signature}"}), 'Invalid upload ticket')
+        self.assertRejected(self.confirm({'ticket': ticket['ticket'][:-2]}), 'Invalid upload ticket')
+
+    def test_oversized_upload(self):
+        with mock.patch.dict(MAX_UPLOAD_BYTES, {'document': 8}):
+            ticket = self.ticket()
+            self.assertEqual(self.put(ticket, b'%PDF-1.7 and more').status_code, 413)
+
+            # Content-Length understated: the body is still cut off at the limit
+            request = RequestFactory().put('/', b'%PDF-1.7 and more', content_type='application/pdf')
+            request.META['CONTENT_LENGTH'] = '8'
+            token = urlsplit(ticket['upload_url']).path.rstrip('/').rsplit('/', 1)[1]
+            self.assertEqual(local_upload(request, token).status_code, 413)
+            self.assertFalse(default_storage.exists(self.key(ticket)))
+
+            # Written past the signed URL (which only Azure would allow)
+            default_storage.save(self.key(ticket), ContentFile(b'%PDF-1.7 and more'))
+            self.assertRejected(self.confirm(ticket), 'File must be between')
+            self.assertFalse(default_storage.exists(self.key(ticket)))
+
+    def test_malformed_content_length(self):
+        ticket = self.ticket()
+        request = RequestFactory().put('/', b'%PDF-1.7', content_type='application/pdf')
+        request.META['CONTENT_LENGTH'] = 'eight'
+        token = urlsplit(ticket['upload_url']).path.rstrip('/').rsplit('/', 1)[1]
+
+        self.assertEqual(local_upload(request, token).status_code, 400)
+        self.assertFalse(default_storage.exists(self.key(ticket)))
+
+    def test_empty_upload(self):
+        ticket = self.ticket()
+        self.put(ticket, b'')
+        self.assertRejected(self.confirm(ticket), 'File must be between')
+
+    def test_document_must_be_a_pdf(self):
+        ticket = self.ticket()
+        self.put(ticket, b'GIF89a not a pdf')
+        self.assertRejected(self.confirm(ticket), 'Only PDF files')
+        self.assertFalse(default_storage.exists(self.key(ticket)))
+        self.assertFalse(Document.objects.exists())
+
+    def test_image_must_decode(self):
+        ticket = self.ticket('image', 'photo.jpg')
+        self.put(ticket, b'\xff\xd8\xff\xe0 truncated jpeg')
+        self.assertRejected(self.confirm(ticket), 'valid image')
+        self.assertFalse(default_storage.exists(self.key(ticket)))
+        self.gift.refresh_from_db()
+        self.assertFalse(self.gift.product_image)
+
+
+# ============================================
+# REACT APP SHELL
+# ============================================
+
+class EncodingNegotiationTests(TestCase):
+    def test_preferred_accepted_encoding_is_chosen(self):
+        both = {'': b'html', 'gzip': b'gz', 'br': b'br'}
+        for accept_encoding, available, expected in [
+            ('gzip, deflate, br', both, 'br'),
+            ('gzip', both, 'gzip'),
+            ('br;q=0, *', both, 'gzip'),
+            ('BR;q=0.0, gzip;q=0', both, ''),
+            ('*;q=0', both, ''),
+            ('*', {'': b'html', 'gzip': b'gz'}, 'gzip'),
+            ('br', {'': b'html', 'gzip': b'gz'}, ''),
+            ('', both, ''),
+            (None, both, ''),
+        ]:
+            with self.subTest(accept_encoding=accept_encoding, available=sorted(available)):
+                self.assertEqual(negotiate_encoding(accept_encoding, available), expected)
+
+
+# The shell is served from a throwaway build directory; the in-memory copy
+# is reset per test so each one reads its own file.
+class ReactAppViewTests(TestCase):
+    content = b'<!doctype html><html><body>' + b'<div id="root"></div>' * 50 + b'</body></html>'
+
+    def setUp(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        self.index = Path(base) / 'frontend' / 'dist' / 'index.html'
+        self.index.parent.mkdir(parents=True)
+        self.index.write_bytes(self.content)
+        build = override_settings(BASE_DIR=Path(base))
+        build.enable()
+        self.addCleanup(build.disable)
+        patcher = mock.patch('core.spa._shell', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+
+    def test_shell_is_served_compressed_with_an_etag(self):
+        response = self.client.get('/inventory/gifts', HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='identity')
+        self.assertEqual(response.content, self.content)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_revisit_is_not_modified_until_a_new_build(self):
+        etag = self.client.get('/').headers['ETag']
+
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get('/requests', HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+        self.index.write_bytes(self.content.replace(b'root', b'app'))
+        response = self.client.get('/requests', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_build_is_not_found(self):
+        self.index.unlink()
+        self.assertEqual(self.client.get('/').status_code, 404)
+
+
+# ============================================
+# READ REPLICA
+# ============================================
+
+# ReplicaRouter as configured when AZURE_POSTGRESQL_REPLICA_HOST is set,
+# except that it records which alias each read was routed to and then runs
+# it on the one test database.
+class RecordingReplicaRouter(ReplicaRouter):
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append((model._meta.db_table, super().db_for_read(model, **hints) or 'default'))
+        return None
+
+
+@override_settings(
+    DATABASE_ROUTERS=['core.tests.RecordingReplicaRouter'],
+    MIDDLEWARE=[*settings.MIDDLEWARE, 'core.replicas.ReplicaPinMiddleware'],
+)
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('replica', password='replica-password')
+        cls.gift = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=5, unit_price=1,
+        )
+
+    def setUp(self):
+        configured = mock.patch('core.replicas.replica_configured', return_value=True)
+        configured.start()
+        self.addCleanup(configured.stop)
+        cache.clear()
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    # Makes the request and returns (response, tables read from default,
+    # tables read from the replica).
+    def request(self, method, path, **kwargs):
+        RecordingReplicaRouter.reads = []
+        response = getattr(self.client, method)(path, **kwargs, **self.auth)
+        tables = {'default': set(), REPLICA_ALIAS: set()}
+        for table, alias in RecordingReplicaRouter.reads:
+            tables[alias].add(table)
+        return response, tables['default'], tables[REPLICA_ALIAS]
+
+    def test_opted_in_reads_use_the_replica(self):
+        response, primary, replica = self.request('get', f'/api/gifts/{self.gift.pk}/transactions/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('gifts_inventorytransaction', replica)
+        self.assertNotIn('gifts_inventorytransaction', primary)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response, primary, replica = self.request('get', '/api/gifts/categories/')
+        self.assertIn('gifts_giftcategory', primary)
+        self.assertEqual(replica, set())
+
+    def test_authentication_reads_the_primary(self):
+        response, primary, replica = self.request('get', f'/api/gifts/{self.gift.pk}/transactions/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('auth_user', primary)
+        self.assertNotIn('auth_user', replica)
+
+    def test_write_pins_the_client_to_the_primary(self):
+        response, _, _ = self.request('post', '/api/gifts/', data={
+            'product_name': 'Pen', 'category_id': self.gift.category_id, 'qty_stock': 3, 'unit_price': '1.00',
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], REPLICA_PIN_SECONDS)
+
+        # The test client sends the cookie back on the next request
+        response, primary, replica = self.request('get', f'/api/gifts/{self.gift.pk}/transactions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('gifts_inventorytransaction', primary)
+        self.assertEqual(replica, set())
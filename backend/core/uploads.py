@@ -0,0 +1,201 @@
+import posixpath
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import signing
+from django.db import transaction
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+from PIL import Image
+
+from accounts.permissions import group_names, is_admin
+from core.inventory import INVENTORY_TYPES
+from core.tasks import normalize_product_image
+from documents.blobs import adopt_stored_file
+from documents.models import Document
+from documents.permissions import MANAGER_GROUPS
+from documents.views import CONTENT_TYPE_MODELS
+
+
+# How long a signed upload URL stays valid, and how long after that the
+# upload can still be confirmed.
+UPLOAD_URL_TTL = 15 * 60
+CONFIRM_TTL = 60 * 60
+
+# Upload kinds: what the file becomes once confirmed, and its size limit.
+MAX_UPLOAD_BYTES = {
+    'document': 25 * 1024 * 1024,
+    'image': 20 * 1024 * 1024,
+}
+
+TICKET_SALT = 'core.uploads.ticket'
+LOCAL_UPLOAD_SALT = 'core.uploads.local'
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadTooLarge(UploadError):
+    pass
+
+
+# Request body for local_upload that counts bytes as they are read and stops
+# once more than max_bytes have arrived, so the limit holds even when the
+# client sends no Content-Length or an understated one.
+class LimitedBody:
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.remaining = max_bytes
+
+    def read(self, size=-1):
+        # Read one byte past the limit so an oversized body is detected
+        # without reading any more of it.
+        allowed = self.remaining + 1
+        data = self.stream.read(allowed if size is None or size < 0 else min(size, allowed))
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise UploadTooLarge("The upload exceeds its size limit.")
+        return data
+
+
+# The file field an upload ends up in: Document.file for documents, the
+# target item's product_image for images.
+def _field_for(kind, model):
+    if kind == 'document':
+        return Document._meta.get_field('file')
+    return model._meta.get_field('product_image')
+
+
+def can_upload(user, kind, target):
+    if is_admin(user):
+        return True
+    if kind == 'document':
+        return bool(group_names(user) & set(MANAGER_GROUPS))
+    return INVENTORY_TYPES[target]['access_group'] in group_names(user)
+
+
+# Storage key the browser uploads to. Documents go straight to their final
+# place under the field's upload_to; images are staged under uploads/ and
+# moved by the normalisation task. A random directory keeps keys unique on
+# backends that overwrite (Azure) without renaming the file itself.
+def _upload_key(kind, model, filename):
+    filename = get_valid_filename(posixpath.basename(filename))
+    if kind == 'document':
+        return f"{_field_for(kind, model).upload_to}{uuid.uuid4().hex}/{filename}"
+    return f"uploads/{uuid.uuid4().hex}/{filename}"
+
+
+# Signed URL the browser PUTs the file to, plus any headers it must send.
+# On Azure this is a blob SAS URL with create/write permission on that one
+# blob. Other backends (local development, tests) get a URL on this app
+# signed with SECRET_KEY; see local_upload in core/views.py.
+def _signed_upload_url(request, storage, key, max_bytes):
+    if hasattr(storage, 'azure_container'):
+        return storage.url(key, expire=UPLOAD_URL_TTL, mode='cw'), {'x-ms-blob-type': 'BlockBlob'}
+    token = signing.dumps({'key': key, 'max_bytes': max_bytes}, salt=LOCAL_UPLOAD_SALT)
+    return request.build_absolute_uri(reverse('upload-local', args=[token])), {}
+
+
+# Issues an upload ticket for one file. Returns the response payload:
+# the opaque ticket to send to the confirm endpoint, where to PUT the bytes
+# and the limits that will be enforced on confirmation.
+# Raises UploadError for an unknown target or missing item.
+def issue_ticket(request, kind, target, object_id, filename):
+    if kind not in MAX_UPLOAD_BYTES:
+        raise UploadError(f"Invalid kind. Choose from: {', '.join(MAX_UPLOAD_BYTES)}.")
+    model = CONTENT_TYPE_MODELS.get(target)
+    if model is None:
+        raise UploadError(f"Unknown target '{target}'.")
+    if not filename:
+        raise UploadError("filename is required.")
+    if kind == 'document' and not filename.lower().endswith('.pdf'):
+        raise UploadError("Only PDF files are allowed.")
+    if not model.objects.filter(pk=object_id).exists():
+        raise UploadError(f"No {target} found with id {object_id}.")
+
+    storage = _field_for(kind, model).storage
+    key = _upload_key(kind, model, filename)
+    max_bytes = MAX_UPLOAD_BYTES[kind]
+    upload_url, headers = _signed_upload_url(request, storage, key, max_bytes)
+    ticket = signing.dumps({
+        'kind': kind,
+        'target': target,
+        'object_id': int(object_id),
+        'key': key,
+        'filename': filename,
+        'user': request.user.pk,
+    }, salt=TICKET_SALT)
+    return {
+        'ticket': ticket,
+        'upload_url': upload_url,
+        'method': 'PUT',
+        'headers': headers,
+        'expires_in': UPLOAD_URL_TTL,
+        'max_bytes': max_bytes,
+    }
+
+
+def _validate_upload(kind, storage, key):
+    if not storage.exists(key):
+        raise UploadError("No uploaded file found for this ticket.")
+    size = storage.size(key)
+    if size == 0 or size > MAX_UPLOAD_BYTES[kind]:
+        raise UploadError(f"File must be between 1 byte and {MAX_UPLOAD_BYTES[kind] // (1024 * 1024)} MB.")
+    with storage.open(key, 'rb') as uploaded:
+        if kind == 'document':
+            if uploaded.read(5) != b'%PDF-':
+                raise UploadError("Only PDF files are allowed.")
+        else:
+            try:
+                Image.open(uploaded).verify()
+            except Exception:
+                raise UploadError("Upload a valid image. The file you uploaded was either not an image or a corrupted image.")
+
+
+# Checks an uploaded object against its ticket and attaches it.
+# Documents become a Document on the target item straight away (sharing the
+# stored blob if the same PDF was uploaded before); images are
+# handed to normalize_product_image, which moves them into place. An object
+# that fails validation is deleted from storage.
+# Returns (kind, Document or None). Raises UploadError.
+def confirm_upload(user, ticket):
+    try:
+        claims = signing.loads(ticket, salt=TICKET_SALT, max_age=UPLOAD_URL_TTL + CONFIRM_TTL)
+    except signing.SignatureExpired:
+        raise UploadError("This upload ticket has expired.")
+    except signing.BadSignature:
+        raise UploadError("Invalid upload ticket.")
+    if claims['user'] != user.pk:
+        raise UploadError("This upload ticket was issued to another user.")
+
+    kind, key = claims['kind'], claims['key']
+    model = CONTENT_TYPE_MODELS[claims['target']]
+    storage = _field_for(kind, model).storage
+
+    if kind == 'document' and Document.objects.filter(file=key).exists():
+        raise UploadError("This upload has already been confirmed.")
+    try:
+        _validate_upload(kind, storage, key)
+        if not model.objects.filter(pk=claims['object_id']).exists():
+            raise UploadError(f"No {claims['target']} found with id {claims['object_id']}.")
+    except UploadError:
+        if storage.exists(key):
+            storage.delete(key)
+        raise
+
+    if kind == 'image':
+        normalize_product_image.enqueue(model._meta.label, claims['object_id'], key, claims['filename'], staged=True)
+        return kind, None
+
+    with transaction.atomic():
+        blob = adopt_stored_file(storage, key)
+        document = Document.objects.create(
+            file=blob.file.name,
+            blob=blob,
+            original_filename=claims['filename'],
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=claims['object_id'],
+            uploaded_by=user,
+        )
+    return kind, document
@@ -6,4 +6,16 @@ urlpatterns = [
     path("user/me/", views.CurrentUserView.as_view(), name="current-user"),
     path("stock-adjustment-reasons/", views.StockAdjustmentReasonList.as_view(), name="stock-adjustment-reasons"),
     path("core/departments/", views.DepartmentListView.as_view(), name="department-list"),
+    path("stock/bulk-adjust/", views.BulkStockAdjustView.as_view(), name="bulk-stock-adjust"),
+    path("catalog/import/", views.CatalogImportView.as_view(), name="catalog-import"),
+    path("stocktakes/", views.StocktakeListCreate.as_view(), name="stocktake-list"),
+    path("stocktakes/<int:pk>/", views.StocktakeDetail.as_view(), name="stocktake-detail"),
+    path("stocktakes/<int:pk>/counts/", views.submit_stocktake_counts, name="stocktake-counts"),
+    path("stocktakes/<int:pk>/variances/", views.StocktakeVarianceList.as_view(), name="stocktake-variances"),
+    path("stocktakes/<int:pk>/apply/", views.apply_stocktake_view, name="stocktake-apply"),
+    path("scan/session/", views.ScanSessionView.as_view(), name="scan-session"),
+    path("scan/<str:code>/", views.scan_code, name="scan-code"),
+    path("uploads/tickets/", views.UploadTicketView.as_view(), name="upload-ticket"),
+    path("uploads/confirm/", views.ConfirmUploadView.as_view(), name="upload-confirm"),
+    path("uploads/local/<str:token>/", views.local_upload, name="upload-local"),
 ]
@@ -1,15 +1,38 @@
 from django.contrib.auth.models import User
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from django.db import transaction
+from django.db.models import Count, Q
 
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from core.serializers import UserSerializer, TakeReasonSerializer, StockAdjustmentReasonSerializer, DepartmentSerializer
+from core.serializers import (
+    UserSerializer, TakeReasonSerializer, StockAdjustmentReasonSerializer, DepartmentSerializer,
+    StocktakeSerializer, StocktakeVarianceSerializer,
+)
 
-from core.models import TakeReason, StockAdjustmentReason, Department
+from core.models import TakeReason, StockAdjustmentReason, Department, Stocktake
+from core.inventory import INVENTORY_TYPES
 
-from accounts.permissions import IsAdminUser
+from core.catalog_import import IMPORTERS, CatalogImporter, ImportFileError, read_rows
+from core.stock import MAX_BULK_LINES, StockConflict, validate_adjustments, apply_adjustments
+from core.stocktake import start_stocktake, record_counts, variance_count, variance_lines, apply_stocktake
+from core.identifiers import MAX_SCAN_CODES, normalize_code, resolve_code, resolve_codes
+from core.uploads import (
+    LOCAL_UPLOAD_SALT, UPLOAD_URL_TTL, LimitedBody, UploadError, UploadTooLarge, can_upload, confirm_upload,
+    issue_ticket,
+)
+
+from accounts.permissions import IsAdminUser, group_names, is_admin
+from documents.serializers import DocumentSerializer
 
 
 # ============================================
@@ -63,10 +86,12 @@ class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
+        # Load the full row with its profile in one query; request.user may
+        # only carry the token's claims (accounts/authentication.py).
+        user = User.objects.select_related('profile').get(pk=request.user.pk)
 
         # Get all group names this user belongs to
-        groups = list(user.groups.values_list('name', flat=True))
+        groups = sorted(group_names(request.user))
 
         # Superusers get all access regardless of groups
         if user.is_superuser:
@@ -123,3 +148,472 @@ class DepartmentListView(generics.ListAPIView):
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
     queryset = Department.objects.all()
+
+
+# ============================================
+# BULK STOCK ADJUSTMENT VIEW
+# ============================================
+
+class BulkStockAdjustView(APIView):
+    """
+    Applies many stock adjustments across any inventories in one request.
+    POST /api/stock/bulk-adjust/
+    Body: a list of {item_type, id, action, quantity, reason, notes} lines,
+    using the same action/quantity/reason rules as the per-item
+    update-stock endpoints.
+
+    All-or-nothing: every line is validated first (including access to each
+    inventory), then all stock changes and transaction records are written in
+    one database transaction. If any line fails, nothing is changed and the
+    response lists the errors by line index.
+    Returns per-line results with stock levels before and after.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        lines = request.data
+        if not isinstance(lines, list) or not lines:
+            return Response(
+                {"error": "Expected a non-empty list of adjustments."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(lines) > MAX_BULK_LINES:
+            return Response(
+                {"error": f"At most {MAX_BULK_LINES} adjustments can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cleaned, errors = validate_adjustments(lines, request.user)
+        if not errors:
+            try:
+                results, errors = apply_adjustments(cleaned, request.user)
+            except StockConflict:
+                return Response(
+                    {"error": "Stock changed while the adjustment was being applied. Please try again."},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+        if errors:
+            return Response({
+                "error": "No stock was changed because some lines are invalid.",
+                "errors": [{"index": index, "errors": messages} for index, messages in sorted(errors.items())],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": f"{len(results)} stock adjustments applied.",
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
+# ============================================
+# CATALOG IMPORT VIEW
+# ============================================
+
+class CatalogImportView(APIView):
+    """
+    Imports a supplier spreadsheet into one inventory.
+    POST /api/catalog/import/  (multipart)
+        file      - .csv or .xlsx, one row per item (per variant for apparel)
+        item_type - gift, apparel, executive, office or miscellaneous
+        dry_run   - 'true' to preview the changes without writing anything
+
+    Columns use the serializer field names; category, department, size and
+    color are given by name. Rows are matched on merchant_product_id: new
+    items are created with an opening 'Restock' ledger entry, existing items
+    are updated but keep their stock. Invalid rows are skipped and listed by
+    row number in the response. Admin only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        item_type = request.data.get('item_type')
+        if item_type not in IMPORTERS:
+            return Response(
+                {"error": f"Invalid item_type. Choose from: {', '.join(IMPORTERS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"error": "A .csv or .xlsx file is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        importer = CatalogImporter(item_type, user=request.user, dry_run=dry_run)
+        try:
+            summary = importer.run(read_rows(upload.file, upload.name))
+        except ImportFileError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+# ============================================
+# STOCKTAKE VIEWS
+# ============================================
+
+# Stocktakes with their progress counted in the same query.
+# lines_with_variance counts exactly the lines /variances/ reports.
+def _stocktake_queryset():
+    return Stocktake.objects.select_related('created_by', 'applied_by').annotate(
+        lines_total=Count('lines'),
+        lines_counted=Count('lines', filter=Q(lines__counted_qty__isnull=False)),
+        lines_with_variance=variance_count(),
+    )
+
+
+class StocktakeListCreate(generics.ListCreateAPIView):
+    """
+    Lists stocktakes or starts a new one.
+    GET  /api/stocktakes/
+    POST /api/stocktakes/  {"name": "...", "item_types": ["gift", "apparel"]}
+    Starting a stocktake freezes the current stock of every item in the
+    chosen inventories (all five if item_types is omitted) as its baseline.
+    Admin only.
+    """
+    serializer_class = StocktakeSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        return _stocktake_queryset()
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        item_types = request.data.get('item_types') or None
+        if item_types is not None and (
+            not isinstance(item_types, list) or any(item_type not in INVENTORY_TYPES for item_type in item_types)
+        ):
+            return Response(
+                {"error": f"item_types must be a list drawn from: {', '.join(INVENTORY_TYPES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stocktake = start_stocktake(serializer.validated_data['name'], request.user, item_types)
+        return Response(
+            StocktakeSerializer(_stocktake_queryset().get(pk=stocktake.pk)).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class StocktakeDetail(generics.RetrieveAPIView):
+    """
+    Returns one stocktake with its counting progress.
+    GET /api/stocktakes/{id}/
+    """
+    serializer_class = StocktakeSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        return _stocktake_queryset()
+
+
+# Records counted quantities for a stocktake.
+# POST /api/stocktakes/{id}/counts/
+#   JSON body: [{"item_type": "gift", "id": 12, "counted": 40}, ...]  (scanner)
+#   or multipart with a .csv/.xlsx "file" with item_type, id, counted columns
+# Counting an item again replaces the earlier count. Valid counts are saved
+# even if some lines are rejected; rejected lines are listed by index.
+# Counts are written with the stocktake row locked, the same lock applying
+# it takes, so no count can land after the corrections have been worked out.
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def submit_stocktake_counts(request, pk):
+    upload = request.FILES.get('file')
+    if upload is not None:
+        try:
+            counts = [row for _, row in read_rows(upload.file, upload.name)]
+        except ImportFileError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        counts = request.data
+        if not isinstance(counts, list):
+            return Response(
+                {"error": "Expected a list of counts or a .csv/.xlsx file."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    with transaction.atomic():
+        stocktake = generics.get_object_or_404(Stocktake.objects.select_for_update(), pk=pk)
+        if stocktake.status != 'open':
+            return Response(
+                {"error": "This stocktake has already been applied."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        recorded, errors = record_counts(stocktake, counts, request.user)
+
+    return Response({
+        "recorded": recorded,
+        "errors": [{"index": index, "errors": messages} for index, messages in sorted(errors.items())],
+    }, status=status.HTTP_200_OK)
+
+
+# Returns counted lines that differ from what the shelf should have held
+# when counted (the frozen baseline plus movements recorded before the count).
+# GET /api/stocktakes/{id}/variances/
+class StocktakeVarianceList(generics.ListAPIView):
+    serializer_class = StocktakeVarianceSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        stocktake = generics.get_object_or_404(Stocktake, pk=self.kwargs['pk'])
+        return variance_lines(stocktake).select_related('counted_by')
+
+
+# Applies every variance as a 'Stock Correction' and closes the stocktake.
+# POST /api/stocktakes/{id}/apply/
+# Variances are reconciled with the takes and returns recorded before each
+# line was counted, and all corrections are written in one transaction on
+# top of the current stock. If any correction can't be applied nothing changes
+# and the affected items are listed so they can be recounted.
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def apply_stocktake_view(request, pk):
+    stocktake = generics.get_object_or_404(Stocktake, pk=pk)
+    try:
+        results, errors = apply_stocktake(stocktake, request.user)
+    except StockConflict:
+        return Response(
+            {"error": "Stock changed while the corrections were being applied. Please try again."},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    if errors:
+        return Response({
+            "error": "No corrections were applied.",
+            "errors": errors,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "message": f"Stocktake applied. {len(results)} items corrected.",
+        "results": results,
+    }, status=status.HTTP_200_OK)
+
+
+# ============================================
+# BARCODE / SKU SCANNING
+# ============================================
+
+# Drops matches in inventories the user has no access group for (the rule
+# validate_adjustments applies), so a scan never reveals those items.
+# Apparel product codes fall under apparel access.
+def _accessible_matches(user, matches):
+    if is_admin(user):
+        return matches
+    groups = group_names(user)
+    return [
+        match for match in matches
+        if INVENTORY_TYPES[
+            'apparel' if match['item_type'] == 'apparel_product' else match['item_type']
+        ]['access_group'] in groups
+    ]
+
+
+# Resolves a scanned code to the item it belongs to.
+# GET /api/scan/{code}/
+# Matches standardised, merchant and manufacturer product IDs on every
+# inventory and apparel variant SKUs, with one indexed lookup.
+# Returns {item_type, id}; 404 if unknown, 409 with every match if the same
+# code is on several items. Items in inventories the user can't adjust are
+# treated as unknown.
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def scan_code(request, code):
+    matches = _accessible_matches(request.user, resolve_code(code))
+    if not matches:
+        return Response({"error": f"No item found for code '{code}'."}, status=status.HTTP_404_NOT_FOUND)
+    if len(matches) > 1:
+        return Response({
+            "error": f"Code '{code}' matches more than one item.",
+            "matches": matches,
+        }, status=status.HTTP_409_CONFLICT)
+    return Response(matches[0], status=status.HTTP_200_OK)
+
+
+class ScanSessionView(APIView):
+    """
+    Applies a stream of scanned codes as one batched take or return.
+    POST /api/scan/session/
+    Body: {action: 'take'|'return', reason, notes, codes: [...]}
+
+    Every code is resolved with a single query; each scan counts as one
+    unit, so scanning the same item three times takes or returns three.
+    The resulting per-item quantities go through the bulk stock adjustment
+    rules: all-or-nothing, one transaction, one ledger row per item.
+    Unknown or ambiguous codes reject the whole session, as do apparel
+    product codes (a variant SKU must be scanned so the size is known).
+    Items in inventories the user can't adjust count as unknown codes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        codes = request.data.get('codes')
+        if not isinstance(codes, list) or not codes:
+            return Response(
+                {"error": "Expected a non-empty list of scanned codes."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(codes) > MAX_SCAN_CODES:
+            return Response(
+                {"error": f"At most {MAX_SCAN_CODES} codes can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resolved = resolve_codes(codes)
+        quantities = {}
+        code_errors = []
+        for code in codes:
+            matches = _accessible_matches(request.user, resolved.get(normalize_code(code), []))
+            if not matches:
+                code_errors.append({"code": code, "errors": ["No item found for this code."]})
+            elif len(matches) > 1:
+                code_errors.append({"code": code, "errors": ["Code matches more than one item."], "matches": matches})
+            elif matches[0]['item_type'] == 'apparel_product':
+                code_errors.append({"code": code, "errors": ["This is an apparel product code. Scan a variant SKU instead."]})
+            else:
+                key = (matches[0]['item_type'], matches[0]['id'])
+                quantities[key] = quantities.get(key, 0) + 1
+
+        if code_errors:
+            return Response({
+                "error": "No stock was changed because some codes could not be used.",
+                "errors": code_errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(quantities) > MAX_BULK_LINES:
+            return Response(
+                {"error": f"At most {MAX_BULK_LINES} different items can be adjusted at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = [
+            {
+                'item_type': item_type,
+                'id': item_id,
+                'action': request.data.get('action'),
+                'quantity': quantity,
+                'reason': request.data.get('reason'),
+                'notes': request.data.get('notes'),
+            }
+            for (item_type, item_id), quantity in quantities.items()
+        ]
+        cleaned, errors = validate_adjustments(lines, request.user)
+        if not errors:
+            try:
+                results, errors = apply_adjustments(cleaned, request.user)
+            except StockConflict:
+                return Response(
+                    {"error": "Stock changed while the scans were being applied. Please try again."},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+        if errors:
+            return Response({
+                "error": "No stock was changed.",
+                "errors": [
+                    {"item_type": lines[index]['item_type'], "id": lines[index]['id'], "errors": messages}
+                    for index, messages in sorted(errors.items())
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": f"{len(codes)} scans applied to {len(results)} items.",
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
+# ============================================
+# DIRECT-TO-STORAGE UPLOADS
+# ============================================
+
+class UploadTicketView(APIView):
+    """
+    Issues a short-lived signed URL so the browser can upload a file
+    straight to storage instead of through a Django worker.
+    POST /api/uploads/tickets/
+    Body: {kind: 'document'|'image', target: 'gift'|'apparel'|..., object_id, filename}
+
+    The browser PUTs the file to upload_url (with the returned headers),
+    then posts the ticket to /api/uploads/confirm/. Documents need document
+    access; images need write access to the target inventory.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        kind = request.data.get('kind')
+        target = request.data.get('target')
+        object_id = request.data.get('object_id')
+        if not str(object_id or '').isdigit():
+            return Response({"error": "object_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if target in INVENTORY_TYPES and not can_upload(request.user, kind, target):
+            return Response(
+                {"error": "You do not have permission to upload files for this item."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            ticket = issue_ticket(request, kind, target, object_id, request.data.get('filename'))
+        except UploadError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+
+class ConfirmUploadView(APIView):
+    """
+    Validates a file uploaded with a ticket and attaches it to its item.
+    POST /api/uploads/confirm/
+    Body: {ticket}
+
+    Checks the size limit and the content (PDF signature for documents, a
+    decodable image for images). Documents are attached immediately and
+    returned; images are queued for normalisation (202) and appear on the
+    item once processed. A file that fails validation is deleted.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            kind, document = confirm_upload(request.user, request.data.get('ticket') or '')
+        except UploadError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if kind == 'image':
+            return Response({"message": "Image received and queued for processing."}, status=status.HTTP_202_ACCEPTED)
+        return Response(
+            DocumentSerializer(document, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+# Stand-in for a storage provider's signed upload URL, used when media is
+# on the local filesystem (development and tests). The token in the URL is
+# signed with SECRET_KEY and names the one key it may write, so — like an
+# Azure SAS URL — it needs no session or JWT. Production uploads go to
+# Azure directly and never reach this view.
+# PUT /api/uploads/local/{token}/  (raw file bytes as the body)
+@csrf_exempt
+@require_http_methods(['PUT'])
+def local_upload(request, token):
+    try:
+        claims = signing.loads(token, salt=LOCAL_UPLOAD_SALT, max_age=UPLOAD_URL_TTL)
+    except signing.BadSignature:
+        return HttpResponse(status=403)
+    try:
+        declared_length = int(request.headers.get('Content-Length') or 0)
+    except ValueError:
+        return HttpResponse(status=400)
+    if declared_length > claims['max_bytes']:
+        return HttpResponse(status=413)
+    if default_storage.exists(claims['key']):
+        default_storage.delete(claims['key'])
+    # Streamed in chunks, never held in memory. Content-Length is only a
+    # hint, so the limit is enforced on the bytes actually received and a
+    # partial file is removed.
+    try:
+        default_storage.save(claims['key'], File(LimitedBody(request, claims['max_bytes']), name=claims['key']))
+    except UploadTooLarge:
+        if default_storage.exists(claims['key']):
+            default_storage.delete(claims['key'])
+        return HttpResponse(status=413)
+    return HttpResponse(status=201)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from documents.models import Document
+from documents.models import Document, DocumentBlob
 
 
 @admin.register(Document)
@@ -7,3 +7,9 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ['original_filename', 'content_type', 'object_id', 'uploaded_by', 'uploaded_at']
     list_filter = ['content_type']
     search_fields = ['original_filename']
+
+
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'created_at']
+    search_fields = ['sha256']
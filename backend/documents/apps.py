@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class DocumentsConfig(AppConfig):
     name = 'documents'
+
+    def ready(self):
+        """
+        Called when Django starts up.
+        Imports signals so deleting a Document releases its stored blob.
+        """
+        import documents.signals
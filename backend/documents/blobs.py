@@ -0,0 +1,84 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+
+from documents.models import Document, DocumentBlob
+
+
+# Read size when hashing; uploads are never held in memory whole.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_name(sha256):
+    return f'documents/sha256/{sha256[:2]}/{sha256}.pdf'
+
+
+# Returns the blob for an uploaded file, storing it only if no blob with the
+# same content exists yet. The upload is hashed while streaming through it;
+# a repeat upload costs one indexed lookup and no storage write at all.
+# Call inside transaction.atomic() together with creating the Document, so
+# garbage collection (which locks the blob row) can't remove it in between.
+def store_upload(uploaded_file):
+    sha256 = hash_file(uploaded_file)
+    blob = DocumentBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is not None:
+        return blob
+
+    storage = DocumentBlob._meta.get_field('file').storage
+    name = blob_name(sha256)
+    if not storage.exists(name):  # left over from a rolled-back upload: same bytes by definition
+        uploaded_file.seek(0)
+        name = storage.save(name, uploaded_file)
+    return _create_blob(sha256, name, uploaded_file.size)
+
+
+# Registers an object that is already in storage (a direct upload from
+# /api/uploads/). The object is hashed by streaming it back from storage.
+# If identical content is already stored, the new object is deleted and the
+# existing blob is returned instead. Same transaction rule as store_upload.
+def adopt_stored_file(storage, name):
+    with storage.open(name, 'rb') as stored:
+        sha256 = hash_file(stored)
+    blob = DocumentBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is not None:
+        if blob.file.name != name:
+            transaction.on_commit(lambda: storage.delete(name))
+        return blob
+    return _create_blob(sha256, name, storage.size(name))
+
+
+def _create_blob(sha256, name, size):
+    try:
+        with transaction.atomic():
+            return DocumentBlob.objects.create(sha256=sha256, file=name, size=size)
+    except IntegrityError:
+        # Someone stored the same content concurrently; use theirs, and drop
+        # the copy this request stored unless both landed on the same name.
+        blob = DocumentBlob.objects.get(sha256=sha256)
+        if blob.file.name != name:
+            blob.file.storage.delete(name)
+        return blob
+
+
+# Drops a blob once no Document references it: the row is deleted at once
+# and the stored PDF (and its preview) after the transaction commits. The blob row is
+# locked first so a concurrent upload can't attach a new Document to it
+# between the check and the delete.
+# Returns True if the blob was removed.
+def release_blob(blob_id):
+    with transaction.atomic():
+        blob = DocumentBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None or Document.objects.filter(blob_id=blob_id).exists():
+            return False
+        names = [name for name in (blob.file.name, blob.preview.name) if name]
+        storage = blob.file.storage
+        blob.delete()
+        transaction.on_commit(lambda: [storage.delete(name) for name in names])
+    return True
@@ -0,0 +1,37 @@
+import pypdfium2
+from django.core.files.storage import default_storage
+
+
+# Text kept per PDF for the search index. Certificates and invoices are a
+# few pages; the cap keeps a scanned 500-page catalogue (or a PDF full of
+# junk text) from producing an oversized index entry.
+MAX_TEXT_CHARS = 200_000
+
+
+# Extracts the plain text of a stored PDF, page by page, stopping once
+# MAX_TEXT_CHARS is reached. Scanned PDFs without a text layer give ''.
+def extract_text(name, storage=default_storage):
+    with storage.open(name, 'rb') as stored:
+        pdf = pypdfium2.PdfDocument(stored.read())
+    parts, length = [], 0
+    try:
+        for page in pdf:
+            text = page.get_textpage().get_text_range()
+            parts.append(text)
+            length += len(text)
+            if length >= MAX_TEXT_CHARS:
+                break
+    finally:
+        pdf.close()
+    # NUL can't be stored in a PostgreSQL text column.
+    return '\n'.join(parts)[:MAX_TEXT_CHARS].replace('\x00', '')
+
+
+# Process pool entry point for the backfill command. Takes a
+# (blob_id, name) tuple and returns (blob_id, text or None, error or None).
+def extract_text_for(blob):
+    blob_id, name = blob
+    try:
+        return blob_id, extract_text(name), None
+    except Exception as error:
+        return blob_id, None, str(error)
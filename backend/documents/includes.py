@@ -0,0 +1,38 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from documents.models import Document
+
+
+# Names accepted by ?include= on inventory list endpoints, comma-separated.
+def requested_includes(request):
+    return {name.strip() for name in request.query_params.get('include', '').split(',') if name.strip()}
+
+
+# Annotates each item with document_count: one grouped subquery on
+# Document's (content_type, object_id) index, evaluated inside the list
+# query itself. get_for_model is answered from ContentType's per-process
+# cache after its first call.
+def with_document_counts(queryset):
+    counts = (
+        Document.objects
+        .filter(content_type=ContentType.objects.get_for_model(queryset.model), object_id=OuterRef('pk'))
+        .order_by()
+        .values('object_id')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return queryset.annotate(document_count=Coalesce(Subquery(counts), 0))
+
+
+# List view mixin: ?include=document_count adds a document_count to every
+# item (the serializer's read-only document_count field is omitted
+# otherwise), so a grid can show attachment badges without one
+# /api/documents/ request per row.
+class DocumentCountMixin:
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'document_count' in requested_includes(self.request):
+            queryset = with_document_counts(queryset)
+        return queryset
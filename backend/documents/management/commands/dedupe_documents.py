@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.db import disable_statement_timeout
+from documents.blobs import adopt_stored_file, release_blob
+from documents.models import Document, DocumentBlob
+
+
+class Command(BaseCommand):
+    help = 'Hashes documents uploaded before deduplication and removes unreferenced blobs'
+
+    def handle(self, *args, **options):
+        """
+        New uploads are deduplicated as they arrive. This brings older
+        documents into the same scheme: each one is hashed from storage and
+        linked to a DocumentBlob; where several hold identical bytes they
+        end up sharing one stored file and the copies are deleted. Finally
+        any blob no Document references (e.g. after a failed delete) is
+        garbage-collected. Safe to run repeatedly.
+        """
+        disable_statement_timeout()
+        linked = missing = 0
+        for document in Document.objects.filter(blob__isnull=True).iterator():
+            storage = document.file.storage
+            if not storage.exists(document.file.name):
+                self.stderr.write(f'  Document #{document.pk}: file {document.file.name} is missing')
+                missing += 1
+                continue
+            with transaction.atomic():
+                blob = adopt_stored_file(storage, document.file.name)
+                Document.objects.filter(pk=document.pk).update(blob=blob, file=blob.file.name)
+            linked += 1
+
+        collected = 0
+        for blob_id in DocumentBlob.objects.filter(documents__isnull=True).values_list('pk', flat=True):
+            collected += release_blob(blob_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Documents deduplicated! {linked} linked to blobs, {missing} missing files, '
+            f'{collected} unreferenced blobs removed. '
+            f'{DocumentBlob.objects.count()} blobs now back {Document.objects.count()} documents.'
+        ))
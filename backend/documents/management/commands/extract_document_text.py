@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.db import disable_statement_timeout
+from documents.extraction import extract_text_for
+from documents.models import DocumentBlob
+
+
+class Command(BaseCommand):
+    help = 'Extracts PDF text into the document search index for stored documents not yet processed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-extract documents that were already processed',
+        )
+
+    def handle(self, *args, **options):
+        """
+        New uploads are indexed automatically. Run this once to index
+        documents stored before search existed (after dedupe_documents, so
+        older documents have blobs). The database index itself is updated
+        as each blob's text is saved.
+        """
+        disable_statement_timeout()
+        blobs = DocumentBlob.objects.all()
+        if not options['force']:
+            blobs = blobs.filter(text_extracted_at__isnull=True)
+        work = list(blobs.values_list('pk', 'file'))
+
+        indexed = failed = 0
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1), initializer=django.setup) as pool:
+            for blob_id, text, error in pool.map(extract_text_for, work):
+                if error:
+                    self.stderr.write(f'  Blob #{blob_id}: {error}')
+                    failed += 1
+                    text = ''
+                else:
+                    indexed += 1
+                DocumentBlob.objects.filter(pk=blob_id).update(text=text, text_extracted_at=timezone.now())
+
+        self.stdout.write(self.style.SUCCESS(f'Document text extracted! {indexed} indexed, {failed} unreadable.'))
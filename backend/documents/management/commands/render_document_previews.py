@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from core.db import disable_statement_timeout
+from documents.models import DocumentBlob
+from documents.previews import render_preview_for
+
+
+class Command(BaseCommand):
+    help = 'Renders first-page preview images for stored documents that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render previews that already exist',
+        )
+
+    def handle(self, *args, **options):
+        """
+        New uploads get a preview automatically. Run this once to backfill
+        documents stored before previews existed (after dedupe_documents, so
+        older documents have blobs), or with --force after changing the
+        preview size. PDFs are rendered in a process pool; each finished
+        preview is recorded as it comes back.
+        """
+        disable_statement_timeout()
+        blobs = DocumentBlob.objects.all()
+        if not options['force']:
+            blobs = blobs.filter(preview='')
+        work = list(blobs.values_list('pk', 'file', 'sha256'))
+
+        rendered = failed = 0
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1), initializer=django.setup) as pool:
+            for blob_id, name, error in pool.map(render_preview_for, work):
+                if error:
+                    self.stderr.write(f'  Blob #{blob_id}: {error}')
+                    failed += 1
+                    continue
+                DocumentBlob.objects.filter(pk=blob_id).update(preview=name)
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Document previews done! {rendered} rendered, {failed} failed.'))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_documentblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentblob',
+            name='preview',
+            field=models.FileField(blank=True, upload_to='documents/previews/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_documentblob_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentblob',
+            name='text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='documentblob',
+            name='text_extracted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
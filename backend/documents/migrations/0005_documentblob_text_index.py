@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+# Full-text index over DocumentBlob.text, queried by documents/search.py.
+# The SQL is kept here rather than imported so this migration keeps applying
+# the same schema however the search module changes later.
+#
+# PostgreSQL: a GIN expression index on to_tsvector('simple', text).
+# SQLite: an external-content FTS5 table kept in step by triggers.
+# Other backends get no index and search falls back to a plain scan.
+
+POSTGRES_INDEX_SQL = [
+    "CREATE INDEX documents_documentblob_text_fts ON documents_documentblob "
+    "USING GIN (to_tsvector('simple', text))",
+]
+POSTGRES_DROP_SQL = ["DROP INDEX IF EXISTS documents_documentblob_text_fts"]
+
+SQLITE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE documents_documentblob_fts "
+    "USING fts5(text, content='documents_documentblob', content_rowid='id')",
+    "INSERT INTO documents_documentblob_fts(documents_documentblob_fts) VALUES ('rebuild')",
+    """CREATE TRIGGER documents_documentblob_fts_ai AFTER INSERT ON documents_documentblob BEGIN
+        INSERT INTO documents_documentblob_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER documents_documentblob_fts_ad AFTER DELETE ON documents_documentblob BEGIN
+        INSERT INTO documents_documentblob_fts(documents_documentblob_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER documents_documentblob_fts_au AFTER UPDATE OF text ON documents_documentblob BEGIN
+        INSERT INTO documents_documentblob_fts(documents_documentblob_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO documents_documentblob_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS documents_documentblob_fts_au",
+    "DROP TRIGGER IF EXISTS documents_documentblob_fts_ad",
+    "DROP TRIGGER IF EXISTS documents_documentblob_fts_ai",
+    "DROP TABLE IF EXISTS documents_documentblob_fts",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_INDEX_SQL, POSTGRES_DROP_SQL),
+    'sqlite': (SQLITE_INDEX_SQL, SQLITE_DROP_SQL),
+}
+
+
+def forwards(apps, schema_editor):
+    create, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in create:
+        schema_editor.execute(statement)
+
+
+def backwards(apps, schema_editor):
+    _, drop = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in drop:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_documentblob_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 02:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('documents', '0005_documentblob_text_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['content_type', 'object_id'], name='document_owner_idx'),
+        ),
+    ]
@@ -15,6 +15,30 @@ def validate_pdf_mime_type(file):
         raise ValidationError('Only PDF files are allowed.')
 
 
+# DocumentBlob is one stored PDF, identified by the SHA-256 of its content.
+# Identical uploads (the same supplier certificate attached to 40 products)
+# share a single blob; each attachment is still its own Document row.
+# A blob is deleted, file included, when the last Document using it goes
+# (see documents/signals.py).
+class DocumentBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='documents/sha256/')
+    size = models.PositiveBigIntegerField()
+    # First-page preview image, rendered in the background after the blob
+    # is created (documents/tasks.py). Empty until then, or if the PDF
+    # can't be rendered.
+    preview = models.FileField(upload_to='documents/previews/', blank=True)
+    # Plain text of the PDF, extracted in the background and full-text
+    # indexed (see documents/search.py). text_extracted_at stays null until
+    # extraction has run, so backfills can find what's left.
+    text = models.TextField(blank=True)
+    text_extracted_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+
 # Document is a shared file attachment that can hang off ANY inventory model
 # (Gift, ApparelProduct, OfficeItem, MiscellaneousItem, and future ones) via
 # Django's generic relation pattern, instead of needing a separate document
@@ -29,6 +53,17 @@ class Document(models.Model):
         help_text="The uploaded PDF file"
     )
 
+    # The content-addressed blob holding the bytes; file above points at the
+    # same stored object. Null only for documents uploaded before dedup,
+    # until dedupe_documents has hashed them.
+    blob = models.ForeignKey(
+        DocumentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='documents',
+    )
+
     original_filename = models.CharField(
         max_length=255,
         help_text="Original filename as uploaded, preserved even if storage renames the file"
@@ -51,6 +86,10 @@ class Document(models.Model):
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Every lookup goes by attached item: per-item lists, batches and counts.
+            models.Index(fields=['content_type', 'object_id'], name='document_owner_idx'),
+        ]
         verbose_name = "Document"
         verbose_name_plural = "Documents"
 
@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
 
+from accounts.permissions import group_names, is_admin
+
 # Documents attach to items across every inventory module, so access mirrors
 # the admin panel as a whole rather than any single category: any manager
 # group, or admin/superuser. There is no read-only viewer tier — uploading
@@ -18,6 +20,6 @@ class HasDocumentAccess(BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if is_admin(request.user):
             return True
-        return request.user.groups.filter(name__in=MANAGER_GROUPS).exists()
+        return bool(group_names(request.user) & set(MANAGER_GROUPS))
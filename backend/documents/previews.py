@@ -0,0 +1,49 @@
+from io import BytesIO
+
+import pypdfium2
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+# Previews are rendered to this width in pixels (height follows the page's
+# aspect ratio) — enough for the Documents list at 2x.
+PREVIEW_WIDTH = 320
+PREVIEW_WEBP_OPTIONS = {'quality': 75, 'method': 4}
+
+
+# Previews are content-addressed like the blobs they belong to.
+def preview_name(sha256):
+    return f'documents/previews/{sha256[:2]}/{sha256}.webp'
+
+
+# Renders the first page of a stored PDF to a WebP image and saves it,
+# replacing any earlier render. Only the first page is rasterised, so the
+# cost doesn't grow with the length of the document.
+# Returns the stored preview name.
+def render_preview(name, sha256, storage=default_storage):
+    with storage.open(name, 'rb') as stored:
+        pdf = pypdfium2.PdfDocument(stored.read())
+    try:
+        page = pdf[0]
+        width, _ = page.get_size()
+        image = page.render(scale=PREVIEW_WIDTH / width).to_pil()
+    finally:
+        pdf.close()
+
+    buffer = BytesIO()
+    image.convert('RGB').save(buffer, 'WEBP', **PREVIEW_WEBP_OPTIONS)
+    target = preview_name(sha256)
+    if storage.exists(target):
+        storage.delete(target)
+    return storage.save(target, ContentFile(buffer.getvalue()))
+
+
+# Process pool entry point for the backfill command. Takes a
+# (blob_id, name, sha256) tuple so it pickles cheaply, and reports failures
+# instead of raising. Returns (blob_id, preview name or None, error or None).
+def render_preview_for(blob):
+    blob_id, name, sha256 = blob
+    try:
+        return blob_id, render_preview(name, sha256), None
+    except Exception as error:
+        return blob_id, None, str(error)
@@ -0,0 +1,61 @@
+import re
+
+from django.db import connection
+
+from documents.models import DocumentBlob
+
+
+# Full-text index over DocumentBlob.text.
+#
+# PostgreSQL: a GIN expression index on to_tsvector('simple', text), queried
+#   with the identical expression so the planner uses it. The 'simple'
+#   configuration doesn't stem, which suits product codes, HS codes and the
+#   mix of languages on supplier paperwork.
+# SQLite: an external-content FTS5 table kept in step with the blob table by
+#   triggers, so the text itself is stored only once.
+#
+# Both are created by migration 0005; search_blob_ids queries whichever one
+# the current database has.
+
+BLOB_TABLE = 'documents_documentblob'
+FTS_TABLE = 'documents_documentblob_fts'
+
+# Most results returned for one search.
+MAX_RESULTS = 50
+
+
+# Words of the query; punctuation is dropped so user input can never be
+# read as query syntax by either engine.
+def _terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+# Returns the ids of blobs whose text matches every word of the query,
+# best match first, using one indexed query.
+def search_blob_ids(query, limit=MAX_RESULTS):
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        blobs = DocumentBlob.objects.all()
+        for term in terms:
+            blobs = blobs.filter(text__icontains=term)
+        return list(blobs.values_list('pk', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"SELECT id FROM {BLOB_TABLE} "
+                f"WHERE to_tsvector('simple', text) @@ plainto_tsquery('simple', %s) "
+                f"ORDER BY ts_rank(to_tsvector('simple', text), plainto_tsquery('simple', %s)) DESC "
+                f"LIMIT %s",
+                [' '.join(terms), ' '.join(terms), limit],
+            )
+        else:
+            match = ' '.join(f'"{term}"' for term in terms)  # quoted: always literal words
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
@@ -6,8 +6,16 @@ from documents.models import Document
 # dedicated view logic (see views.py) rather than standard serializer validation,
 # since creation needs to resolve a content_type string identifier to an actual
 # ContentType and target object.
+#
+# sha256 is the content hash of the stored PDF (null for documents uploaded
+# before deduplication was introduced), usable as a cache key or ETag.
+# preview is the URL of a small first-page image, null until it has been
+# rendered in the background.
 class DocumentSerializer(serializers.ModelSerializer):
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True, default=None)
+    preview = serializers.FileField(source='blob.preview', read_only=True, default=None)
+
     class Meta:
         model = Document
-        fields = ['id', 'file', 'original_filename', 'uploaded_at']
+        fields = ['id', 'file', 'sha256', 'preview', 'original_filename', 'uploaded_at']
         read_only_fields = fields
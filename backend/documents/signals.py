@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from documents.blobs import release_blob
+from documents.models import Document, DocumentBlob
+from documents.tasks import extract_document_text, render_document_preview
+
+
+@receiver(post_delete, sender=Document)
+def release_document_blob(sender, instance, **kwargs):
+    """
+    Garbage-collects the stored PDF when the last Document using it
+    is deleted. Other attachments of the same file keep it alive.
+    """
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=DocumentBlob)
+def queue_document_processing(sender, instance, created, **kwargs):
+    """
+    Queues the first-page preview render and text extraction for newly
+    stored PDFs once the upload has committed. Re-uploads of a known PDF
+    reuse its blob, preview and text, so nothing is processed twice.
+    """
+    if created:
+        transaction.on_commit(lambda: render_document_preview.enqueue(instance.pk))
+        transaction.on_commit(lambda: extract_document_text.enqueue(instance.pk))
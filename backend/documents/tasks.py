@@ -0,0 +1,43 @@
+import logging
+
+from django.tasks import task
+from django.utils import timezone
+
+from documents.models import DocumentBlob
+from documents.extraction import extract_text
+from documents.previews import render_preview
+
+logger = logging.getLogger(__name__)
+
+
+# Renders the first-page preview of a newly stored PDF and records it on the
+# blob. Enqueued once per blob, so a PDF attached to many items is only
+# rendered once. A PDF that can't be rendered is logged and left without a
+# preview; render_document_previews can retry it.
+@task
+def render_document_preview(blob_id):
+    blob = DocumentBlob.objects.filter(pk=blob_id).first()
+    if blob is None:
+        return
+    try:
+        name = render_preview(blob.file.name, blob.sha256, blob.file.storage)
+    except Exception:
+        logger.exception("Could not render a preview for document blob %s", blob.sha256)
+        return
+    DocumentBlob.objects.filter(pk=blob_id).update(preview=name)
+
+
+# Extracts the text of a newly stored PDF into DocumentBlob.text, which the
+# database indexes for /api/documents/search/. A PDF that can't be read is
+# marked as processed with no text, so it simply never matches.
+@task
+def extract_document_text(blob_id):
+    blob = DocumentBlob.objects.filter(pk=blob_id).first()
+    if blob is None:
+        return
+    try:
+        text = extract_text(blob.file.name, blob.file.storage)
+    except Exception:
+        logger.exception("Could not extract text from document blob %s", blob.sha256)
+        text = ''
+    DocumentBlob.objects.filter(pk=blob_id).update(text=text, text_extracted_at=timezone.now())
@@ -1,3 +1,251 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django_tasks_db.models import DBTaskResult
+from PIL import Image
+
+from accounts.tokens import tokens_for
+from documents.blobs import _create_blob, blob_name, hash_file
+from documents.models import Document, DocumentBlob
+from documents.previews import PREVIEW_WIDTH, preview_name
+from documents.tasks import render_document_preview
+from gifts.models import Gift, GiftCategory
+
+
+IMMEDIATE_TASKS = {'default': {'BACKEND': 'django.tasks.backends.immediate.ImmediateBackend'}}
+QUEUED_TASKS = {'default': {'BACKEND': 'django_tasks_db.DatabaseBackend'}}
+
+
+# A one-page A4 PDF showing the given line of text, with a valid xref table.
+def pdf_bytes(text):
+    content = f'BT /F1 18 Tf 72 760 Td ({text}) Tj ET'.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content),
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+# Uploads go through the documents endpoint into a throwaway local
+# FileSystemStorage; the background tasks run inline unless a test says
+# otherwise.
+@override_settings(TASKS=IMMEDIATE_TASKS)
+class DocumentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('archivist', password='archivist-password')
+        cls.gift = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=5, unit_price=1,
+        )
+
+    def setUp(self):
+        self.media = media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        storage = override_settings(STORAGES={**settings.STORAGES, 'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': media, 'base_url': '/media/'},
+        }})
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    # Uploads a PDF to the gift and returns its blob once the commit hooks
+    # (which enqueue the processing tasks) have run.
+    def upload(self, content, filename='certificate.pdf'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/documents/', {
+                'file': SimpleUploadedFile(filename, content, content_type='application/pdf'),
+                'content_type': 'gift', 'object_id': self.gift.pk,
+            }, **self.auth)
+        self.assertEqual(response.status_code, 201, response.content)
+        return DocumentBlob.objects.get(documents__pk=response.json()['id'])
+
+    # Names of every stored PDF, relative to the storage root.
+    def stored_pdfs(self):
+        return {
+            os.path.relpath(os.path.join(folder, name), self.media).replace(os.sep, '/')
+            for folder, _, names in os.walk(self.media)
+            for name in names if name.endswith('.pdf')
+        }
+
+
+class DocumentBlobTests(DocumentTestCase):
+    def test_repeat_upload_stores_nothing(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+        self.assertEqual(self.stored_pdfs(), {blob.file.name})
+
+        self.assertEqual(self.upload(pdf_bytes('Certificate of origin'), 'copy.pdf'), blob)
+
+        self.assertEqual(self.stored_pdfs(), {blob.file.name})
+        self.assertEqual(blob.documents.count(), 2)
+
+    def test_blob_goes_with_its_last_document(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+        self.upload(pdf_bytes('Certificate of origin'), 'copy.pdf')
+        names = {blob.file.name, blob.preview.name}
+        first, last = blob.documents.order_by('pk')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/documents/delete/{first.pk}/', **self.auth)
+        self.assertTrue(DocumentBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/documents/delete/{last.pk}/', **self.auth)
+        self.assertFalse(DocumentBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    # Two uploads of the same new PDF race: the one that loses the insert
+    # uses the winner's blob and removes the file it stored itself.
+    def test_losing_a_race_removes_the_stored_copy(self):
+        winner = self.upload(pdf_bytes('Certificate of origin'))
+        duplicate = default_storage.save(blob_name(winner.sha256), ContentFile(pdf_bytes('Certificate of origin')))
+        self.assertNotEqual(duplicate, winner.file.name)
+
+        self.assertEqual(_create_blob(winner.sha256, duplicate, winner.size), winner)
+
+        self.assertEqual(self.stored_pdfs(), {winner.file.name})
+
+    def test_dedupe_merges_legacy_copies(self):
+        gift_type = ContentType.objects.get_for_model(self.gift)
+        legacy = []
+        for filename, text in [('a.pdf', 'Certificate'), ('b.pdf', 'Certificate'), ('c.pdf', 'Invoice')]:
+            name = default_storage.save(f'documents/{filename}', ContentFile(pdf_bytes(text)))
+            legacy.append(Document.objects.create(
+                file=name, original_filename=filename, content_type=gift_type, object_id=self.gift.pk,
+            ))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('dedupe_documents', stdout=StringIO(), stderr=StringIO())
+
+        a, b, c = (Document.objects.get(pk=document.pk) for document in legacy)
+        self.assertEqual(a.blob, b.blob)
+        self.assertNotEqual(a.blob, c.blob)
+        self.assertEqual((b.file.name, c.file.name), (a.blob.file.name, c.blob.file.name))
+        self.assertEqual(self.stored_pdfs(), {a.blob.file.name, c.blob.file.name})
+        self.assertEqual(DocumentBlob.objects.count(), 2)
+        with default_storage.open(a.file.name) as stored:
+            self.assertEqual(hash_file(stored), a.blob.sha256)
+
+
+class DocumentPreviewTests(DocumentTestCase):
+    def test_first_page_is_rendered(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+
+        self.assertEqual(blob.preview.name, preview_name(blob.sha256))
+        with default_storage.open(blob.preview.name) as stored, Image.open(stored) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.width, PREVIEW_WIDTH)
+            self.assertAlmostEqual(image.height, PREVIEW_WIDTH * 842 / 595, delta=1)
+
+        response = self.client.get('/api/documents/', {'content_type': 'gift', 'object_id': self.gift.pk}, **self.auth)
+        self.assertTrue(response.json()[0]['preview'].endswith(blob.preview.name))
+
+    def test_repeat_upload_is_not_rendered_again(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+        default_storage.delete(blob.preview.name)
+
+        self.assertEqual(self.upload(pdf_bytes('Certificate of origin'), 'copy.pdf'), blob)
+
+        self.assertFalse(default_storage.exists(blob.preview.name))
+
+    def test_unreadable_pdf_is_left_without_preview(self):
+        with self.assertLogs('documents.tasks', 'ERROR'):
+            blob = self.upload(b'%PDF-1.4 truncated')
+        self.assertFalse(blob.preview)
+
+    @override_settings(TASKS=QUEUED_TASKS)
+    def test_rendering_is_queued_for_the_worker(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+
+        self.assertFalse(blob.preview)
+        queued = {(result.task_path, tuple(result.args_kwargs['args'])) for result in DBTaskResult.objects.all()}
+        self.assertIn((render_document_preview.module_path, (blob.pk,)), queued)
+
+    def test_backfill_renders_missing_previews(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+        default_storage.delete(blob.preview.name)
+        DocumentBlob.objects.filter(pk=blob.pk).update(preview='')
+
+        call_command('render_document_previews', workers=1, stdout=StringIO(), stderr=StringIO())
+
+        blob.refresh_from_db()
+        self.assertEqual(blob.preview.name, preview_name(blob.sha256))
+        self.assertTrue(default_storage.exists(blob.preview.name))
+
+
+class DocumentTextSearchTests(DocumentTestCase):
+    def search(self, query):
+        response = self.client.get('/api/documents/search/', {'q': query}, **self.auth)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [document['original_filename'] for document in response.json()]
+
+    def test_text_is_extracted_and_searchable(self):
+        blob = self.upload(pdf_bytes('Certificate of origin HS 6109'))
+        self.upload(pdf_bytes('Invoice 2231 for mugs'), 'invoice.pdf')
+
+        self.assertIn('Certificate of origin HS 6109', blob.text)
+        self.assertIsNotNone(blob.text_extracted_at)
+        self.assertEqual(self.search('origin 6109'), ['certificate.pdf'])
+        self.assertEqual(self.search('INVOICE'), ['invoice.pdf'])
+        self.assertEqual(self.search('origin invoice'), [])
+
+        response = self.client.get('/api/documents/search/', {'q': 'origin'}, **self.auth)
+        self.assertEqual(response.json()[0]['owner'], {'content_type': 'gift', 'id': self.gift.pk, 'name': str(self.gift)})
+
+    def test_query_syntax_is_read_as_words(self):
+        self.upload(pdf_bytes('Certificate of origin'))
+        for query in ('"origin', '(origin)', 'origin*', '-origin', 'origin & !', "origin'); --"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ['certificate.pdf'])
+        self.assertEqual(self.search('?!'), [])
+
+    def test_index_follows_text_changes(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+
+        DocumentBlob.objects.filter(pk=blob.pk).update(text='Safety data sheet')
+        self.assertEqual(self.search('origin'), [])
+        self.assertEqual(self.search('safety'), ['certificate.pdf'])
+
+        self.client.delete(f'/api/documents/delete/{blob.documents.get().pk}/', **self.auth)
+        self.assertEqual(self.search('safety'), [])
+
+    def test_unreadable_pdf_never_matches(self):
+        with self.assertLogs('documents.tasks', 'ERROR'):
+            blob = self.upload(b'%PDF-1.4 truncated')
+        self.assertEqual(blob.text, '')
+        self.assertIsNotNone(blob.text_extracted_at)
+
+    def test_backfill_extracts_unprocessed_documents(self):
+        blob = self.upload(pdf_bytes('Certificate of origin'))
+        DocumentBlob.objects.filter(pk=blob.pk).update(text='', text_extracted_at=None)
+
+        call_command('extract_document_text', workers=1, stdout=StringIO(), stderr=StringIO())
+
+        blob.refresh_from_db()
+        self.assertIsNotNone(blob.text_extracted_at)
+        self.assertEqual(self.search('origin'), ['certificate.pdf'])
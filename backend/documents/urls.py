@@ -5,6 +5,15 @@ urlpatterns = [
     # GET documents for an item (?content_type=&object_id=) / POST upload a new document
     path("", views.DocumentListCreate.as_view(), name="document-list-create"),
 
+    # GET documents for many items of one inventory (?content_type=&object_ids=1,2,3)
+    path("batch/", views.DocumentBatch.as_view(), name="document-batch"),
+
+    # GET full-text search over document contents (?q=)
+    path("search/", views.DocumentSearch.as_view(), name="search-documents"),
+
+    # GET the PDF itself (ETag = content SHA-256)
+    path("<int:pk>/download/", views.DocumentDownload.as_view(), name="download-document"),
+
     # DELETE a specific document by ID
     path("delete/<int:pk>/", views.DocumentDelete.as_view(), name="delete-document"),
 ]
@@ -1,7 +1,14 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 
+from core.replicas import ReplicaReadMixin
+from documents.blobs import store_upload
+from documents.search import search_blob_ids
 from documents.models import Document
 from documents.serializers import DocumentSerializer
 from documents.permissions import HasDocumentAccess
@@ -24,6 +31,10 @@ CONTENT_TYPE_MODELS = {
 }
 
 
+# Most object ids accepted by one batch request.
+MAX_BATCH_OBJECTS = 500
+
+
 # ============================================
 # DOCUMENT VIEWS
 # ============================================
@@ -42,7 +53,7 @@ class DocumentListCreate(generics.ListCreateAPIView):
         content_type_key = self.request.query_params.get('content_type')
         object_id = self.request.query_params.get('object_id')
 
-        queryset = Document.objects.all()
+        queryset = Document.objects.select_related('blob')
 
         if content_type_key:
             model_class = CONTENT_TYPE_MODELS.get(content_type_key)
@@ -107,13 +118,20 @@ class DocumentListCreate(generics.ListCreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        document = Document.objects.create(
-            file=uploaded_file,
-            original_filename=uploaded_file.name,
-            content_type=ContentType.objects.get_for_model(model_class),
-            object_id=target_object.pk,
-            uploaded_by=request.user,
-        )
+        # The upload is hashed as it streams in; if the same PDF is already
+        # stored (e.g. one certificate attached to many products) the new
+        # Document just points at the existing blob and nothing is written
+        # to storage.
+        with transaction.atomic():
+            blob = store_upload(uploaded_file)
+            document = Document.objects.create(
+                file=blob.file.name,
+                blob=blob,
+                original_filename=uploaded_file.name,
+                content_type=ContentType.objects.get_for_model(model_class),
+                object_id=target_object.pk,
+                uploaded_by=request.user,
+            )
 
         serializer = self.get_serializer(document)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -125,3 +143,106 @@ class DocumentDelete(generics.DestroyAPIView):
     serializer_class = DocumentSerializer
     permission_classes = [HasDocumentAccess]
     queryset = Document.objects.all()
+
+
+# Streams a document's PDF.
+# GET /api/documents/{id}/download/
+# The blob's SHA-256 doubles as a strong ETag: content never changes under
+# a hash, so a matching If-None-Match gets a 304 after one query, without
+# touching storage. Documents uploaded before dedup have no ETag until
+# dedupe_documents has hashed them.
+class DocumentDownload(APIView):
+    permission_classes = [HasDocumentAccess]
+
+    def get(self, request, pk):
+        document = generics.get_object_or_404(Document.objects.select_related('blob'), pk=pk)
+        etag = f'"{document.blob.sha256}"' if document.blob else None
+
+        if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                document.file.open('rb'),
+                content_type='application/pdf',
+                filename=document.original_filename,
+            )
+        if etag:
+            response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+# Full-text search over the contents of every attached PDF.
+# GET /api/documents/search/?q=invoice 6109
+# Matches documents whose text contains every word of q, best match first,
+# with one indexed query (see documents/search.py). Each result includes its
+# owning item, resolved with one query per inventory for the whole page
+# rather than one per document.
+class DocumentSearch(ReplicaReadMixin, APIView):
+    permission_classes = [HasDocumentAccess]
+
+    def get(self, request):
+        blob_ids = search_blob_ids(request.query_params.get('q', ''))
+        rank = {blob_id: position for position, blob_id in enumerate(blob_ids)}
+        documents = sorted(
+            Document.objects.filter(blob_id__in=blob_ids).select_related('blob', 'content_type'),
+            key=lambda document: (rank[document.blob_id], -document.uploaded_at.timestamp()),
+        )
+
+        owner_ids = {}
+        for document in documents:
+            owner_ids.setdefault(document.content_type, set()).add(document.object_id)
+        owners = {
+            content_type.pk: content_type.model_class().objects.in_bulk(ids)
+            for content_type, ids in owner_ids.items()
+        }
+        type_keys = {model: key for key, model in CONTENT_TYPE_MODELS.items()}
+
+        results = []
+        for document, data in zip(documents, DocumentSerializer(documents, many=True, context={'request': request}).data):
+            owner = owners[document.content_type_id].get(document.object_id)
+            data['owner'] = {
+                'content_type': type_keys.get(document.content_type.model_class()),
+                'id': document.object_id,
+                'name': str(owner) if owner else None,
+            }
+            results.append(data)
+        return Response(results, status=status.HTTP_200_OK)
+
+
+# Returns the documents of many items of one inventory at once.
+# GET /api/documents/batch/?content_type=gift&object_ids=4,5,6
+# Response: {"4": [...], "5": [], "6": [...]} — every requested id is present,
+# documents newest first. One query for the whole batch (on the
+# content_type/object_id index) instead of one request per item.
+class DocumentBatch(APIView):
+    permission_classes = [HasDocumentAccess]
+
+    def get(self, request):
+        model_class = CONTENT_TYPE_MODELS.get(request.query_params.get('content_type'))
+        if not model_class:
+            return Response(
+                {"error": f"Unknown content_type. Choose from: {', '.join(CONTENT_TYPE_MODELS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        raw_ids = [value.strip() for value in request.query_params.get('object_ids', '').split(',') if value.strip()]
+        if not raw_ids or not all(value.isdigit() for value in raw_ids):
+            return Response(
+                {"error": "object_ids must be a comma-separated list of ids."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        object_ids = {int(value) for value in raw_ids}
+        if len(object_ids) > MAX_BATCH_OBJECTS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_OBJECTS} object_ids can be requested at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        documents = Document.objects.filter(
+            content_type=ContentType.objects.get_for_model(model_class),
+            object_id__in=object_ids,
+        ).select_related('blob')
+        grouped = {str(object_id): [] for object_id in sorted(object_ids)}
+        for document, data in zip(documents, DocumentSerializer(documents, many=True, context={'request': request}).data):
+            grouped[str(document.object_id)].append(data)
+        return Response(grouped, status=status.HTTP_200_OK)
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_itemidentifier'),
+        ('executive', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='executivetransaction',
+            index=models.Index(fields=['item', '-created_at'], name='executive_txn_history_idx'),
+        ),
+    ]
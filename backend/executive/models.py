@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User
 from core.models import StockAdjustmentReason
 
@@ -71,6 +72,10 @@ class ExecutiveItem(models.Model):
 
     notes = models.TextField(blank=True)
 
+    # PDFs attached through documents.Document. Lets list views count them in
+    # one grouped subquery, and deletes an item's documents along with it.
+    documents = GenericRelation('documents.Document')
+
     # System tracking
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
@@ -130,3 +135,7 @@ class ExecutiveTransaction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Executive Transaction"
         verbose_name_plural = "Executive Transactions"
+        indexes = [
+            # One item's history, newest first
+            models.Index(fields=['item', '-created_at'], name='executive_txn_history_idx'),
+        ]
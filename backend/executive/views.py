@@ -9,6 +9,8 @@ from executive.serializers import ExecutiveItemSerializer, ExecutiveCategorySeri
 
 from executive.models import ExecutiveItem, ExecutiveCategory, ExecutiveTransaction
 from core.models import StockAdjustmentReason
+from core.replicas import ReplicaReadMixin
+from documents.includes import DocumentCountMixin
 
 
 # ============================================
@@ -18,10 +20,10 @@ from core.models import StockAdjustmentReason
 # Returns all executive items or creates a new one.
 # GET  /api/executive/  - lists the full inventory, visible to anyone with executive access.
 # POST /api/executive/  - creates a new item record, automatically setting created_by.
-class ExecutiveItemListCreate(generics.ListCreateAPIView):
+class ExecutiveItemListCreate(DocumentCountMixin, generics.ListCreateAPIView):
     serializer_class = ExecutiveItemSerializer
     permission_classes = [HasExecutiveAccess]
-    queryset = ExecutiveItem.objects.all()
+    queryset = ExecutiveItem.objects.select_related('category')
 
     def perform_create(self, serializer):
         if serializer.is_valid():
@@ -175,12 +177,12 @@ def update_executive_item(request, pk):
 # Returns the full transaction history for a single executive item, ordered newest first.
 # GET /api/executive/{pk}/transactions/
 # Used to populate the History modal in the admin table.
-class ExecutiveTransactionListView(generics.ListAPIView):
+class ExecutiveTransactionListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ExecutiveTransactionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return ExecutiveTransaction.objects.filter(
+        return ExecutiveTransaction.objects.select_related('created_by', 'reason').filter(
             item__pk=self.kwargs["pk"]
         ).order_by("-created_at")
 
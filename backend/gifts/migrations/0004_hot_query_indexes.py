@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_itemidentifier'),
+        ('gifts', '0003_alter_inventorytransaction_reason'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['gift', '-created_at'], name='gift_txn_history_idx'),
+        ),
+    ]
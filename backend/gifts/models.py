@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User
 from core.models import StockAdjustmentReason
 
@@ -82,6 +83,10 @@ class Gift(models.Model):
     minimum_stock_level = models.IntegerField(default=10, blank=True)
     notes = models.TextField(blank=True)
 
+    # PDFs attached through documents.Document. Lets list views count them in
+    # one grouped subquery, and deletes an item's documents along with it.
+    documents = GenericRelation('documents.Document')
+
     def __str__(self):
         return self.product_name
 
@@ -132,3 +137,7 @@ class InventoryTransaction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Inventory Transaction"
         verbose_name_plural = "Inventory Transactions"
+        indexes = [
+            # One item's history, newest first
+            models.Index(fields=['gift', '-created_at'], name='gift_txn_history_idx'),
+        ]
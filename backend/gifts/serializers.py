@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from gifts.models import Gift, GiftCategory, InventoryTransaction
+from core.serializers import ImageDerivativesField
 
 
 # GiftCategorySerializer is used wherever categories need to appear as nested objects
@@ -29,11 +30,16 @@ class GiftSerializer(serializers.ModelSerializer):
         write_only=True
     )
 
+    product_image_derivatives = ImageDerivativesField(source='product_image')
+    document_count = serializers.IntegerField(read_only=True)  # only with ?include=document_count
+
     class Meta:
         model = Gift
         fields = [
             "id",
             "product_image",
+            "product_image_derivatives",  # read: thumb/card/full URLs (webp + jpg)
+            "document_count",        # read: only with ?include=document_count
             "product_name",
             "category",              # read: full nested object
             "category_id",           # write: integer ID
@@ -11,6 +11,8 @@ from gifts.serializers import GiftSerializer, GiftCategorySerializer, InventoryT
 
 from gifts.models import Gift, GiftCategory, InventoryTransaction
 from core.models import StockAdjustmentReason
+from core.replicas import ReplicaReadMixin
+from documents.includes import DocumentCountMixin
 
 
 # ============================================
@@ -20,10 +22,10 @@ from core.models import StockAdjustmentReason
 # Returns all gifts or creates a new one.
 # GET  /api/gifts/  - lists the full inventory, visible to anyone with gifts access.
 # POST /api/gifts/  - creates a new gift record, automatically setting created_by.
-class GiftListCreate(generics.ListCreateAPIView):
+class GiftListCreate(DocumentCountMixin, generics.ListCreateAPIView):
     serializer_class = GiftSerializer
     permission_classes = [HasGiftsAccess]
-    queryset = Gift.objects.all()
+    queryset = Gift.objects.select_related('category')
 
     def perform_create(self, serializer):
         if serializer.is_valid():
@@ -177,12 +179,12 @@ def update_gift(request, pk):
 # Returns the full transaction history for a single gift, ordered newest first.
 # GET /api/gifts/{pk}/transactions/
 # Used to populate the History modal in the admin table.
-class GiftTransactionListView(generics.ListAPIView):
+class GiftTransactionListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = InventoryTransactionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return InventoryTransaction.objects.filter(
+        return InventoryTransaction.objects.select_related('created_by', 'reason').filter(
             gift__pk=self.kwargs["pk"]
         ).order_by("-created_at")
 
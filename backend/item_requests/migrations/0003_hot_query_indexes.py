@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_itemidentifier'),
+        ('item_requests', '0002_alter_itemrequestitem_item_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemrequest',
+            index=models.Index(fields=['-created_at'], name='itemrequest_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemrequest',
+            index=models.Index(fields=['requested_by', '-created_at'], name='itemrequest_requester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemrequest',
+            index=models.Index(fields=['status', '-created_at'], name='itemrequest_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemrequest',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_preparation', 'ready'])), fields=['-created_at'], name='itemrequest_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemrequestitem',
+            index=models.Index(fields=['item_type', 'item_id'], name='requestline_item_idx'),
+        ),
+    ]
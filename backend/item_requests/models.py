@@ -2,6 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from core.models import TakeReason, Department
 
+# Submitted but not yet collected: the preparation team's open queue.
+ACTIVE_STATUSES = ['pending', 'in_preparation', 'ready']
+
 
 # ItemRequest is the top-level record for a staff member's request.
 # One request covers all the items a person needs in a single submission,
@@ -86,6 +89,19 @@ class ItemRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = "Item Request"
         verbose_name_plural = "Item Requests"
+        # Each index serves one list query already in date order:
+        # all requests (admins), one user's own requests, one status, and
+        # the open queue (a partial index holding only active requests).
+        indexes = [
+            models.Index(fields=['-created_at'], name='itemrequest_created_idx'),
+            models.Index(fields=['requested_by', '-created_at'], name='itemrequest_requester_idx'),
+            models.Index(fields=['status', '-created_at'], name='itemrequest_status_idx'),
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='itemrequest_active_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Request #{self.pk} — {self.requested_by.username} — {self.status}"
@@ -166,6 +182,10 @@ class ItemRequestItem(models.Model):
     class Meta:
         verbose_name = "Item Request Line"
         verbose_name_plural = "Item Request Lines"
+        indexes = [
+            # Which requests reference a given item
+            models.Index(fields=['item_type', 'item_id'], name='requestline_item_idx'),
+        ]
 
     @property
     def estimated_cost(self):
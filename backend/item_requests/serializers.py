@@ -1,8 +1,12 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import ItemRequest, ItemRequestItem
 from core.serializers import TakeReasonSerializer
 from core.models import Department
+from gifts.models import Gift
+from apparel.models import ApparelVariant
 
 
 # Returns id and name for the department dropdown on the request form.
@@ -12,6 +16,28 @@ class DepartmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
+# Product names for request lines, keyed by (item_type, item_id): one query
+# per inventory for all the lines given, however many there are. Gifts and
+# apparel variants are named (apparel with the variant's size and colour);
+# other inventories, and items that have since been deleted, are left out.
+def item_names(lines):
+    wanted = defaultdict(set)
+    for line in lines:
+        wanted[line.item_type].add(line.item_id)
+
+    names = {}
+    if wanted['gift']:
+        for pk, name in Gift.objects.filter(pk__in=wanted['gift']).values_list('pk', 'product_name'):
+            names[('gift', pk)] = name
+    if wanted['apparel']:
+        variants = ApparelVariant.objects.filter(pk__in=wanted['apparel']).values_list(
+            'pk', 'product__product_name', 'size__size_value', 'color__color_name'
+        )
+        for pk, product_name, size_value, color_name in variants:
+            names[('apparel', pk)] = f"{product_name} — {size_value} {color_name}"
+    return names
+
+
 # ItemRequestItemSerializer handles a single line item within a request.
 #
 # estimated_cost uses ReadOnlyField to call the model property directly.
@@ -19,28 +45,21 @@ class DepartmentSerializer(serializers.ModelSerializer):
 #
 # item_name is a SerializerMethodField that resolves the human-readable product name
 # from the referenced model (gift or apparel variant) using item_type + item_id.
-# Because item_id has no database-level FK, the lookup can fail if the referenced
-# record was deleted. get_item_name catches any exception and falls back to a
-# generic "Type #ID" label so the request still renders correctly.
-# For apparel, the name includes the variant's size and colour.
+# Inside ItemRequestSerializer the names of all the lines being serialized are
+# looked up together beforehand (context['item_names']); a line serialized on
+# its own looks up just its own name.
+# Because item_id has no database-level FK, the referenced record may have
+# been deleted; the name then falls back to a generic "Type #ID" label so the
+# request still renders correctly.
 class ItemRequestItemSerializer(serializers.ModelSerializer):
     estimated_cost = serializers.ReadOnlyField()
     item_name = serializers.SerializerMethodField()
 
     def get_item_name(self, obj):
-        # Resolves the product name from the correct inventory model.
-        # Falls back to a generic label if the item no longer exists.
-        try:
-            if obj.item_type == 'gift':
-                from gifts.models import Gift
-                return Gift.objects.get(pk=obj.item_id).product_name
-            elif obj.item_type == 'apparel':
-                from apparel.models import ApparelVariant
-                variant = ApparelVariant.objects.get(pk=obj.item_id)
-                return f"{variant.product.product_name} — {variant.size.size_value} {variant.color.color_name}"
-            return f"{obj.get_item_type_display()} #{obj.item_id}"
-        except Exception:
-            return f"{obj.get_item_type_display()} #{obj.item_id}"
+        names = self.context.get('item_names')
+        if names is None:
+            names = item_names([obj])
+        return names.get((obj.item_type, obj.item_id), f"{obj.get_item_type_display()} #{obj.item_id}")
 
     class Meta:
         model = ItemRequestItem
@@ -57,6 +76,15 @@ class ItemRequestItemSerializer(serializers.ModelSerializer):
         ]
 
 
+# Serializes many requests at once (list responses), naming the line items of
+# all of them in one go first.
+class ItemRequestListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        requests = list(data.all() if hasattr(data, 'all') else data)
+        self.context['item_names'] = item_names(line for item_request in requests for line in item_request.items.all())
+        return super().to_representation(requests)
+
+
 # ItemRequestSerializer handles the full request record including all line items.
 #
 # Dual-field pattern for department and reason:
@@ -128,3 +156,9 @@ class ItemRequestSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
         ]
+        list_serializer_class = ItemRequestListSerializer
+
+    def to_representation(self, instance):
+        if 'item_names' not in self.context:
+            self.context['item_names'] = item_names(instance.items.all())
+        return super().to_representation(instance)
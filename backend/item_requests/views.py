@@ -3,18 +3,20 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import ItemRequest, ItemRequestItem
+from .models import ACTIVE_STATUSES, ItemRequest, ItemRequestItem
 from .serializers import ItemRequestSerializer, ItemRequestItemSerializer, DepartmentSerializer
-from accounts.permissions import HasRequestsAccess
+from accounts.permissions import HasRequestsAccess, is_admin
 from core.models import Department
 from gifts.models import Gift, InventoryTransaction
 from apparel.models import ApparelVariant, ApparelTransaction
 from office.models import OfficeItem, OfficeTransaction
 from miscellaneous.models import MiscellaneousItem, MiscellaneousTransaction
 from executive.models import ExecutiveItem, ExecutiveTransaction
+from reports.rollups import COUNTED_STATUSES, record_line, record_line_change, record_request
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +38,17 @@ class DepartmentList(generics.ListAPIView):
 # ITEM REQUEST VIEWS
 # ============================================
 
+# Requests with everything ItemRequestSerializer reads: requester, department
+# and reason joined in, and the line items of every request in one more
+# query (also used by total_cost).
+def _request_queryset():
+    return ItemRequest.objects.select_related('requested_by', 'department', 'reason').prefetch_related('items')
+
+
 # Lists requests or creates a new one.
 # GET  /api/requests/  - admins see all requests; regular users see only their own.
+#                        ?status=<status> narrows to one status; ?status=active
+#                        to the open queue (pending, in preparation or ready).
 # POST /api/requests/  - any authenticated user can create a request.
 #                        requested_by and status='draft' are set automatically.
 class ItemRequestListCreate(generics.ListCreateAPIView):
@@ -46,9 +57,16 @@ class ItemRequestListCreate(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser or user.groups.filter(name='admin').exists():
-            return ItemRequest.objects.all()
-        return ItemRequest.objects.filter(requested_by=user)
+        queryset = _request_queryset()
+        if not is_admin(user):
+            queryset = queryset.filter(requested_by=user)
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter == 'active':
+            queryset = queryset.filter(status__in=ACTIVE_STATUSES)
+        elif status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(
@@ -61,18 +79,33 @@ class ItemRequestListCreate(generics.ListCreateAPIView):
 # GET    /api/requests/{id}/  - admins can view any request; users can only view their own.
 # PATCH  /api/requests/{id}/  - used to save admin notes; updated_by is recorded automatically.
 # DELETE /api/requests/{id}/  - intended for admin use to remove a request entirely.
+# A counted request's department, reason and month key its lines in the
+# department cost rollup, so an update takes the lines out under the old
+# values and adds them back under the new ones; a delete takes them out.
 class ItemRequestDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ItemRequestSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser or user.groups.filter(name='admin').exists():
-            return ItemRequest.objects.all()
-        return ItemRequest.objects.filter(requested_by=user)
+        if is_admin(user):
+            return _request_queryset()
+        return _request_queryset().filter(requested_by=user)
 
     def perform_update(self, serializer):
-        serializer.save(updated_by=self.request.user)
+        counted = serializer.instance.status in COUNTED_STATUSES
+        with transaction.atomic():
+            if counted:
+                record_request(serializer.instance, sign=-1)
+            item_request = serializer.save(updated_by=self.request.user)
+            if counted:
+                record_request(item_request)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if instance.status in COUNTED_STATUSES:
+                record_request(instance, sign=-1)
+            instance.delete()
 
 
 # Moves a Draft request to Pending and deducts stock for all line items.
@@ -277,6 +310,7 @@ def submit_request(request, pk):
 
     item_request.status = 'pending'
     item_request.save()
+    record_request(item_request)  # add the lines to the department cost rollup
 
     # --- Email notifications ---
     # Two emails are sent: one to the inventory team so they know a new
@@ -347,12 +381,7 @@ def submit_request(request, pk):
 def cancel_request(request, pk):
     item_request = get_object_or_404(ItemRequest, pk=pk)
 
-    is_admin = (
-        request.user.is_superuser or
-        request.user.groups.filter(name='admin').exists()
-    )
-
-    if item_request.requested_by != request.user and not is_admin:
+    if item_request.requested_by != request.user and not is_admin(request.user):
         return Response(
             {"error": "You can only cancel your own requests."},
             status=status.HTTP_403_FORBIDDEN
@@ -455,6 +484,7 @@ def cancel_request(request, pk):
     item_request.status = 'cancelled'
     item_request.updated_by = request.user
     item_request.save()
+    record_request(item_request, sign=-1)  # take the lines back out of the department cost rollup
 
     return Response(
         {"message": "Request cancelled and stock restored.", "status": "cancelled"},
@@ -465,7 +495,9 @@ def cancel_request(request, pk):
 # Allows admin to move a request to any status in the workflow.
 # PATCH /api/requests/{id}/status/
 # This is a direct status override, separate from the submit and cancel flows
-# which also handle stock. This view only changes the status field.
+# which also handle stock. This view only changes the status field (and keeps
+# the department cost rollup in step when a request moves in or out of
+# draft/cancelled).
 # Requires IsAdminUser permission.
 @api_view(['PATCH'])
 @permission_classes([HasRequestsAccess])
@@ -481,10 +513,17 @@ def update_request_status(request, pk):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    was_counted = item_request.status in COUNTED_STATUSES
     item_request.status = new_status
     item_request.updated_by = request.user
     item_request.save()
 
+    # Overriding into or out of draft/cancelled changes whether the request
+    # counts towards department spend.
+    is_counted = new_status in COUNTED_STATUSES
+    if is_counted != was_counted:
+        record_request(item_request, sign=1 if is_counted else -1)
+
     return Response(
         {"message": f"Status updated to {new_status}."},
         status=status.HTTP_200_OK
@@ -507,8 +546,7 @@ def add_item_to_request(request, pk):
 
     # Only owner or admin can add items
     if item_request.requested_by != request.user:
-        if not (request.user.is_superuser or
-                request.user.groups.filter(name='admin').exists()):
+        if not is_admin(request.user):
             return Response(
                 {"error": "You can only modify your own requests."},
                 status=status.HTTP_403_FORBIDDEN
@@ -516,7 +554,9 @@ def add_item_to_request(request, pk):
 
     serializer = ItemRequestItemSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(request=item_request)
+        with transaction.atomic():
+            item = serializer.save(request=item_request)
+            record_line(item)  # counted requests: add the line to the department cost rollup
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -534,13 +574,10 @@ def add_item_to_request(request, pk):
 @permission_classes([IsAuthenticated])
 def manage_request_item(request, pk, item_pk):
     item_request = get_object_or_404(ItemRequest, pk=pk)
-    item = get_object_or_404(ItemRequestItem, pk=item_pk, request=item_request)
-
-    is_admin = request.user.is_superuser or \
-               request.user.groups.filter(name='admin').exists()
+    item = get_object_or_404(item_request.items, pk=item_pk)
 
     # Non-admin can only modify their own draft requests
-    if not is_admin:
+    if not is_admin(request.user):
         if item_request.requested_by != request.user:
             return Response(
                 {"error": "You can only modify your own requests."},
@@ -552,8 +589,12 @@ def manage_request_item(request, pk, item_pk):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    # On counted requests the line's old contribution is taken out of the
+    # department cost rollup and, for an update, its new one added back.
     if request.method == 'DELETE':
-        item.delete()
+        with transaction.atomic():
+            record_line(item, sign=-1)
+            item.delete()
         return Response(
             {"message": "Item removed from request."},
             status=status.HTTP_204_NO_CONTENT
@@ -561,7 +602,9 @@ def manage_request_item(request, pk, item_pk):
 
     serializer = ItemRequestItemSerializer(item, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            record_line(item, sign=-1)
+            record_line(serializer.save())
         return Response(serializer.data)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -742,6 +785,7 @@ def confirm_request_item(request, pk, item_pk):
 
     item.quantity_confirmed = new_qty
     item.save()
+    record_line_change(item, previously_deducted, new_qty)
 
     return Response(
         {"message": "Quantity confirmed and stock adjusted.", "quantity_confirmed": new_qty},
@@ -8,6 +8,8 @@ from rest_framework import status
 from miscellaneous.serializers import MiscellaneousItemSerializer, MiscellaneousCategorySerializer, MiscellaneousTransactionSerializer
 from miscellaneous.models import MiscellaneousItem, MiscellaneousCategory, MiscellaneousTransaction
 from core.models import StockAdjustmentReason
+from core.replicas import ReplicaReadMixin
+from documents.includes import DocumentCountMixin
 
 
 # ============================================
@@ -17,10 +19,10 @@ from core.models import StockAdjustmentReason
 # Returns all miscellaneous items or creates a new one.
 # GET  /api/miscellaneous/  - lists the full inventory.
 # POST /api/miscellaneous/  - creates a new item record, automatically setting created_by.
-class MiscellaneousItemListCreate(generics.ListCreateAPIView):
+class MiscellaneousItemListCreate(DocumentCountMixin, generics.ListCreateAPIView):
     serializer_class = MiscellaneousItemSerializer
     permission_classes = [HasMiscellaneousAccess]
-    queryset = MiscellaneousItem.objects.all()
+    queryset = MiscellaneousItem.objects.select_related('category', 'department')
 
     def perform_create(self, serializer):
         if serializer.is_valid():
@@ -159,12 +161,12 @@ def update_miscellaneous_item(request, pk):
 
 # Returns the full transaction history for a single miscellaneous item, ordered newest first.
 # GET /api/miscellaneous/{pk}/transactions/
-class MiscellaneousTransactionListView(generics.ListAPIView):
+class MiscellaneousTransactionListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = MiscellaneousTransactionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return MiscellaneousTransaction.objects.filter(
+        return MiscellaneousTransaction.objects.select_related('created_by', 'reason').filter(
             item__pk=self.kwargs["pk"]
         ).order_by("-created_at")
 
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User
 from core.models import StockAdjustmentReason, Department
 
@@ -64,6 +65,10 @@ class OfficeItem(models.Model):
 
     notes = models.TextField(blank=True)
 
+    # PDFs attached through documents.Document. Lets list views count them in
+    # one grouped subquery, and deletes an item's documents along with it.
+    documents = GenericRelation('documents.Document')
+
     # System tracking
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
@@ -112,3 +117,7 @@ class OfficeTransaction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Office Transaction"
         verbose_name_plural = "Office Transactions"
+        indexes = [
+            # One item's history, newest first
+            models.Index(fields=['item', '-created_at'], name='office_txn_history_idx'),
+        ]
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from office.models import OfficeItem, OfficeCategory, OfficeTransaction
 from core.models import Department
+from core.serializers import ImageDerivativesField
 
 
 class OfficeCategorySerializer(serializers.ModelSerializer):
@@ -39,11 +40,16 @@ class OfficeItemSerializer(serializers.ModelSerializer):
         allow_null=True,
     )
 
+    product_image_derivatives = ImageDerivativesField(source='product_image')
+    document_count = serializers.IntegerField(read_only=True)  # only with ?include=document_count
+
     class Meta:
         model = OfficeItem
         fields = [
             "id",
             "product_image",
+            "product_image_derivatives",  # read: thumb/card/full URLs (webp + jpg)
+            "document_count",        # read: only with ?include=document_count
             "item_name",
             "category",
             "category_id",
@@ -8,6 +8,8 @@ from rest_framework import status
 from office.serializers import OfficeItemSerializer, OfficeCategorySerializer, OfficeTransactionSerializer
 from office.models import OfficeItem, OfficeCategory, OfficeTransaction
 from core.models import StockAdjustmentReason
+from core.replicas import ReplicaReadMixin
+from documents.includes import DocumentCountMixin
 
 
 # ============================================
@@ -17,10 +19,10 @@ from core.models import StockAdjustmentReason
 # Returns all office items or creates a new one.
 # GET  /api/office/  - lists the full inventory.
 # POST /api/office/  - creates a new item record, automatically setting created_by.
-class OfficeItemListCreate(generics.ListCreateAPIView):
+class OfficeItemListCreate(DocumentCountMixin, generics.ListCreateAPIView):
     serializer_class = OfficeItemSerializer
     permission_classes = [HasOfficeAccess]
-    queryset = OfficeItem.objects.all()
+    queryset = OfficeItem.objects.select_related('category', 'department')
 
     def perform_create(self, serializer):
         if serializer.is_valid():
@@ -159,12 +161,12 @@ def update_office_item(request, pk):
 
 # Returns the full transaction history for a single office item, ordered newest first.
 # GET /api/office/{pk}/transactions/
-class OfficeTransactionListView(generics.ListAPIView):
+class OfficeTransactionListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = OfficeTransactionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return OfficeTransaction.objects.filter(
+        return OfficeTransaction.objects.select_related('created_by', 'reason').filter(
             item__pk=self.kwargs["pk"]
         ).order_by("-created_at")
 
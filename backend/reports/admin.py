@@ -0,0 +1,26 @@
+from django.contrib import admin
+from reports.models import StockSnapshot, ConsumptionForecast, SupplierLeadTime, DepartmentCostRollup
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_date', 'item_type', 'item_id', 'qty_stock', 'unit_price']
+    list_filter = ['item_type', 'snapshot_date']
+
+
+@admin.register(ConsumptionForecast)
+class ConsumptionForecastAdmin(admin.ModelAdmin):
+    list_display = ['item_type', 'item_id', 'qty_stock', 'avg_daily_consumption', 'days_of_cover', 'computed_at']
+    list_filter = ['item_type']
+
+
+@admin.register(SupplierLeadTime)
+class SupplierLeadTimeAdmin(admin.ModelAdmin):
+    list_display = ['supplier_name', 'lead_time_days']
+    search_fields = ['supplier_name']
+
+
+@admin.register(DepartmentCostRollup)
+class DepartmentCostRollupAdmin(admin.ModelAdmin):
+    list_display = ['month', 'department', 'item_type', 'reason', 'units', 'cost']
+    list_filter = ['item_type', 'department', 'month']
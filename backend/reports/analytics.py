@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.inventory import INVENTORY_TYPES
+from item_requests.models import ItemRequest
+from reports.models import ConsumptionForecast
+
+
+# How far back history is read. Rolling consumption uses the last 90 days at
+# most; event seasonality compares against a full year.
+LOOKBACK_DAYS = 365
+
+# Burn rate (and therefore days of cover) is based on the last 28 days.
+RATE_WINDOW_DAYS = 28
+
+# Longest days of cover reported (100 years). Large stock with a tiny burn
+# rate is capped here rather than overflowing the days_of_cover column.
+MAX_DAYS_OF_COVER = Decimal('36500.0')
+
+# Days either side of a request's date_needed that count as "around an event".
+EVENT_WINDOW_DAYS = 7
+
+# Items are loaded and upserted in chunks of this many IDs, so memory stays
+# flat however many items have moved.
+CHUNK_SIZE = 1000
+
+
+# Converts a calendar day to the aware datetime at its start, so history
+# queries filter on created_at directly and can use its index.
+def _start_of(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+# Event dates are the date_needed of every request that actually went ahead
+# (anything past draft that wasn't cancelled). Returns the set of calendar
+# days within EVENT_WINDOW_DAYS of any of them, limited to the lookback period.
+def event_days(today):
+    start = today - timedelta(days=LOOKBACK_DAYS)
+    window = timedelta(days=EVENT_WINDOW_DAYS)
+    dates = (
+        ItemRequest.objects
+        .exclude(status__in=['draft', 'cancelled'])
+        .filter(date_needed__gte=start - window, date_needed__lte=today + window)
+        .values_list('date_needed', flat=True)
+        .distinct()
+    )
+    days = set()
+    for needed in dates:
+        for offset in range(-EVENT_WINDOW_DAYS, EVENT_WINDOW_DAYS + 1):
+            day = needed + timedelta(days=offset)
+            if start <= day <= today:
+                days.add(day)
+    return days
+
+
+# Works out which items of one inventory need recomputing:
+#   - items with a transaction newer than the highest ID already processed
+#   - items whose figures were computed on an earlier day, because the
+#     rolling windows have moved on since
+# With full=True every item with history in the lookback period is included.
+def _items_to_refresh(item_type, today, full):
+    config = INVENTORY_TYPES[item_type]
+    transactions = config['transaction_model'].objects.all()
+    fk_id = f"{config['transaction_fk']}_id"
+    forecasts = ConsumptionForecast.objects.filter(item_type=item_type)
+
+    if full:
+        since = today - timedelta(days=LOOKBACK_DAYS)
+        moved = transactions.filter(created_at__gte=_start_of(since))
+        stale = forecasts
+    else:
+        watermark = forecasts.aggregate(latest=Max('last_transaction_id'))['latest'] or 0
+        moved = transactions.filter(id__gt=watermark)
+        stale = forecasts.filter(computed_at__date__lt=today)
+
+    item_ids = set(moved.values_list(fk_id, flat=True).distinct())
+    item_ids.update(stale.values_list('item_id', flat=True))
+    return sorted(item_ids)
+
+
+# Computes the forecast figures for one chunk of items from their ledger rows.
+# History is read with one query per chunk rather than per item, then summed
+# in a single pass over the rows.
+def _compute_chunk(item_type, item_ids, today, event_day_set):
+    config = INVENTORY_TYPES[item_type]
+    transaction_model = config['transaction_model']
+    fk_id = f"{config['transaction_fk']}_id"
+    since = today - timedelta(days=LOOKBACK_DAYS)
+
+    stock = dict(config['model'].objects.filter(pk__in=item_ids).values_list('pk', 'qty_stock'))
+
+    last_transaction = dict(
+        transaction_model.objects
+        .filter(**{f'{fk_id}__in': item_ids})
+        .values(fk_id)
+        .annotate(latest=Max('id'))
+        .values_list(fk_id, 'latest')
+    )
+
+    rows = (
+        transaction_model.objects
+        .filter(**{f'{fk_id}__in': item_ids, 'created_at__gte': _start_of(since)})
+        .order_by()
+        .values_list(fk_id, 'transaction_type', 'quantity', 'created_at')
+    )
+
+    net = defaultdict(lambda: {7: 0, 28: 0, 90: 0})
+    takes_in_events = defaultdict(int)
+    takes_outside = defaultdict(int)
+    first_seen = {}
+    for item_id, transaction_type, quantity, created_at in rows:
+        day = timezone.localtime(created_at).date()
+        age = (today - day).days
+        signed = quantity if transaction_type == 'take' else -quantity
+        for window in (7, 28, 90):
+            if age < window:
+                net[item_id][window] += signed
+        if transaction_type == 'take':
+            if day in event_day_set:
+                takes_in_events[item_id] += quantity
+            else:
+                takes_outside[item_id] += quantity
+        if item_id not in first_seen or day < first_seen[item_id]:
+            first_seen[item_id] = day
+
+    now = timezone.now()
+    forecasts = []
+    for item_id in item_ids:
+        if item_id not in stock:
+            continue  # item deleted since it last moved; its row is removed below
+
+        consumed = net[item_id]
+        daily = max(consumed[28], 0) / RATE_WINDOW_DAYS
+        qty_stock = stock[item_id]
+
+        # Seasonality: daily take rate on event days vs other days, counted
+        # from the item's first movement so new items aren't diluted by a
+        # year of days before they existed.
+        uplift = None
+        if item_id in first_seen:
+            history_length = (today - first_seen[item_id]).days + 1
+            event_count = sum(1 for day in event_day_set if day >= first_seen[item_id])
+            other_count = history_length - event_count
+            if event_count and other_count and takes_outside[item_id]:
+                rate_in = takes_in_events[item_id] / event_count
+                rate_out = takes_outside[item_id] / other_count
+                uplift = Decimal(rate_in / rate_out).quantize(Decimal('0.01'))
+
+        forecasts.append(ConsumptionForecast(
+            item_type=item_type,
+            item_id=item_id,
+            qty_stock=qty_stock,
+            consumed_7d=consumed[7],
+            consumed_28d=consumed[28],
+            consumed_90d=consumed[90],
+            avg_daily_consumption=Decimal(daily).quantize(Decimal('0.01')),
+            avg_weekly_consumption=Decimal(daily * 7).quantize(Decimal('0.01')),
+            event_uplift=uplift,
+            days_of_cover=(
+                min(Decimal(max(qty_stock, 0) / daily), MAX_DAYS_OF_COVER).quantize(Decimal('0.1'))
+                if daily else None
+            ),
+            last_transaction_id=last_transaction.get(item_id, 0),
+            computed_at=now,
+        ))
+
+    return forecasts, [item_id for item_id in item_ids if item_id not in stock]
+
+
+# Refreshes the ConsumptionForecast table. Incremental by default: only items
+# that moved since the last run (or whose figures are from an earlier day)
+# are recomputed, and results are upserted in chunks.
+# Returns a dict of item_type -> number of forecasts written.
+def refresh_consumption_forecasts(full=False):
+    today = timezone.localdate()
+    event_day_set = event_days(today)
+    update_fields = [
+        'qty_stock', 'consumed_7d', 'consumed_28d', 'consumed_90d',
+        'avg_daily_consumption', 'avg_weekly_consumption', 'event_uplift',
+        'days_of_cover', 'last_transaction_id', 'computed_at',
+    ]
+
+    counts = {}
+    for item_type in INVENTORY_TYPES:
+        item_ids = _items_to_refresh(item_type, today, full)
+        counts[item_type] = 0
+        for start in range(0, len(item_ids), CHUNK_SIZE):
+            chunk = item_ids[start:start + CHUNK_SIZE]
+            forecasts, deleted = _compute_chunk(item_type, chunk, today, event_day_set)
+            with transaction.atomic():
+                ConsumptionForecast.objects.bulk_create(
+                    forecasts,
+                    update_conflicts=True,
+                    unique_fields=['item_type', 'item_id'],
+                    update_fields=update_fields,
+                )
+                if deleted:
+                    ConsumptionForecast.objects.filter(item_type=item_type, item_id__in=deleted).delete()
+            counts[item_type] += len(forecasts)
+
+    return counts
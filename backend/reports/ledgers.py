@@ -0,0 +1,174 @@
+import django
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, OuterRef, Subquery, Window, When
+from django.db.models.functions import Lag
+
+from core.db import disable_statement_timeout
+from core.inventory import INVENTORY_TYPES
+
+
+# Ledger integrity checks for the five *Transaction tables.
+#
+# Every stock movement writes a transaction with stock_before/stock_after, so
+# for any item the ledger should form an unbroken chain:
+#   - chain:      each row's stock_before equals the previous row's stock_after
+#   - arithmetic: stock_after equals stock_before -/+ quantity for a take/return
+#   - balance:    the newest row's stock_after equals the item's live qty_stock
+# Stock writes are not atomic today, so concurrent adjustments can break any
+# of these. All three checks run as set-based SQL (the chain check uses a LAG
+# window over each item's history), one query per check per shard.
+
+# Rows are ordered by created_at, with id breaking ties for transactions
+# written within the same timestamp.
+def _ledger_order():
+    return [F('created_at').asc(), F('id').asc()]
+
+
+# Splits the item IDs of one inventory into contiguous ranges of chunk_size.
+# Each range is one unit of work for verify_range, so large tables can be
+# checked in parallel by a process pool.
+def build_shards(item_type, chunk_size):
+    model = INVENTORY_TYPES[item_type]['model']
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (item_type, start, start + chunk_size - 1)
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size)
+    ]
+
+
+# Runs all three checks for items of item_type with id_from <= pk <= id_to.
+# Returns (items_checked, discrepancies) where each discrepancy is a plain
+# dict so results can cross process boundaries and be dumped as JSON.
+def verify_range(item_type, id_from, id_to):
+    config = INVENTORY_TYPES[item_type]
+    model = config['model']
+    fk = config['transaction_fk']
+    transactions = config['transaction_model'].objects.filter(**{
+        f'{fk}_id__gte': id_from,
+        f'{fk}_id__lte': id_to,
+    })
+    discrepancies = []
+
+    # --- Chain continuity: stock_before must match the previous stock_after ---
+    chain_breaks = (
+        transactions
+        .annotate(previous_stock_after=Window(
+            Lag('stock_after'),
+            partition_by=[F(fk)],
+            order_by=_ledger_order(),
+        ))
+        .filter(previous_stock_after__isnull=False)
+        .exclude(previous_stock_after=F('stock_before'))
+        .values_list(f'{fk}_id', 'id', 'previous_stock_after', 'stock_before')
+    )
+    for item_id, transaction_id, expected, actual in chain_breaks:
+        discrepancies.append({
+            'check': 'chain',
+            'item_type': item_type,
+            'item_id': item_id,
+            'transaction_id': transaction_id,
+            'expected_stock_before': expected,
+            'stock_before': actual,
+        })
+
+    # --- Arithmetic: each row must be internally consistent ---
+    bad_rows = (
+        transactions
+        .annotate(expected_stock_after=Case(
+            When(transaction_type='take', then=F('stock_before') - F('quantity')),
+            default=F('stock_before') + F('quantity'),
+            output_field=IntegerField(),
+        ))
+        .exclude(expected_stock_after=F('stock_after'))
+        .values_list(f'{fk}_id', 'id', 'expected_stock_after', 'stock_after')
+    )
+    for item_id, transaction_id, expected, actual in bad_rows:
+        discrepancies.append({
+            'check': 'arithmetic',
+            'item_type': item_type,
+            'item_id': item_id,
+            'transaction_id': transaction_id,
+            'expected_stock_after': expected,
+            'stock_after': actual,
+        })
+
+    # --- Final balance: the newest stock_after must equal qty_stock ---
+    # Items with no transactions at all have nothing to compare against.
+    latest_stock_after = (
+        config['transaction_model'].objects
+        .filter(**{fk: OuterRef('pk')})
+        .order_by('-created_at', '-id')
+        .values('stock_after')[:1]
+    )
+    items = model.objects.filter(pk__gte=id_from, pk__lte=id_to)
+    drifted = (
+        items
+        .annotate(ledger_balance=Subquery(latest_stock_after))
+        .filter(ledger_balance__isnull=False)
+        .exclude(ledger_balance=F('qty_stock'))
+        .values_list('pk', 'qty_stock', 'ledger_balance')
+    )
+    for item_id, qty_stock, ledger_balance in drifted:
+        discrepancies.append({
+            'check': 'balance',
+            'item_type': item_type,
+            'item_id': item_id,
+            'qty_stock': qty_stock,
+            'ledger_balance': ledger_balance,
+        })
+
+    return items.count(), discrepancies
+
+
+# Process pool initializer. Worker processes must not reuse the parent's
+# database connections, so the command closes them before the pool starts
+# and each worker opens its own on first query (with no statement timeout,
+# like the command itself).
+def init_worker():
+    django.setup()
+    disable_statement_timeout()
+
+
+# Writes one corrective transaction so the ledger ends at the item's live
+# qty_stock. Only 'balance' discrepancies can be repaired this way — a broken
+# chain in the middle of the history is an audit fact and is reported, never
+# rewritten.
+#
+# The item row is locked and the ledger balance re-read inside the
+# transaction, so a stock move that happened after the check is not
+# "corrected" twice. Returns the new transaction, or None if the item no
+# longer needs repair.
+def repair_balance(item_type, item_id, reason=None):
+    config = INVENTORY_TYPES[item_type]
+    fk = config['transaction_fk']
+    transaction_model = config['transaction_model']
+
+    with transaction.atomic():
+        try:
+            item = config['model'].objects.select_for_update().get(pk=item_id)
+        except config['model'].DoesNotExist:
+            return None
+
+        latest = (
+            transaction_model.objects
+            .filter(**{fk: item})
+            .order_by('-created_at', '-id')
+            .first()
+        )
+        if latest is None or latest.stock_after == item.qty_stock:
+            return None
+
+        diff = item.qty_stock - latest.stock_after
+        return transaction_model.objects.create(**{
+            fk: item,
+            'transaction_type': 'return' if diff > 0 else 'take',
+            'quantity': abs(diff),
+            'reason': reason,
+            'notes': 'Ledger repair: aligns transaction history with recorded stock',
+            'created_by': None,
+            'stock_before': latest.stock_after,
+            'stock_after': item.qty_stock,
+        })
+
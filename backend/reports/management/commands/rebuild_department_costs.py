@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.db import disable_statement_timeout
+from reports.rollups import rebuild_department_costs
+
+
+class Command(BaseCommand):
+    help = 'Recalculates the department cost rollup from all submitted request lines'
+
+    def handle(self, *args, **options):
+        """
+        The rollup is normally kept current as requests are submitted, confirmed
+        and cancelled. Run this after bulk data fixes, or when request lines
+        were edited directly (admin panel, manage_request_item) on requests
+        that had already been submitted.
+        """
+        disable_statement_timeout()
+        count = rebuild_department_costs()
+        self.stdout.write(self.style.SUCCESS(f'Department cost rollup rebuilt! {count} rows written.'))
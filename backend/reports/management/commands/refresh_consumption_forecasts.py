@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.db import disable_statement_timeout
+from core.inventory import INVENTORY_TYPES
+from reports.analytics import refresh_consumption_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Recomputes burn rate and days-of-cover forecasts for items whose stock has moved'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every item with history in the last year, not just items that moved',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Incremental by default: picks up items with transactions newer than the
+        last processed transaction ID, plus items last computed on an earlier day.
+        Intended to run nightly and optionally more often during busy periods.
+        """
+        disable_statement_timeout()
+        counts = refresh_consumption_forecasts(full=options['full'])
+
+        for item_type, count in counts.items():
+            self.stdout.write(f"  {INVENTORY_TYPES[item_type]['label']}: {count} forecasts updated")
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Forecast refresh complete! {sum(counts.values())} items updated.')
+        )
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import disable_statement_timeout
+from core.inventory import INVENTORY_TYPES
+from reports.snapshots import take_stock_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Records a StockSnapshot row for every item in all inventories (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Snapshot date as YYYY-MM-DD (defaults to today)',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Copies current qty_stock and unit_price for every gift, apparel variant,
+        office, miscellaneous and executive item into the StockSnapshot table.
+        Safe to run multiple times a day — the day's rows are replaced, not duplicated.
+        """
+        disable_statement_timeout()
+        snapshot_date = None
+        if options['date']:
+            try:
+                snapshot_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid --date '{options['date']}'. Use YYYY-MM-DD.")
+
+        counts = take_stock_snapshot(snapshot_date)
+
+        for item_type, count in counts.items():
+            self.stdout.write(f"  {INVENTORY_TYPES[item_type]['label']}: {count} items")
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Snapshot complete! {sum(counts.values())} rows recorded.')
+        )
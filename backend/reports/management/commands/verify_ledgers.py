@@ -0,0 +1,121 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core.db import disable_statement_timeout
+from core.inventory import INVENTORY_TYPES
+from core.models import StockAdjustmentReason
+from reports.ledgers import build_shards, init_worker, repair_balance, verify_range
+
+
+class Command(BaseCommand):
+    help = 'Checks every *Transaction ledger against itself and against live qty_stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--item-type',
+            choices=list(INVENTORY_TYPES),
+            action='append',
+            help='Only check this inventory (can be repeated; defaults to all five)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes (default 1 runs in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Item IDs per unit of work handed to a worker (default 5000)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file instead of stdout',
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Write a corrective transaction for every final-balance mismatch '
+                 '(chain and arithmetic breaks are only reported, and still fail the command)',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Verifies chain continuity (stock_before = previous stock_after),
+        per-row arithmetic and final-balance agreement (newest stock_after =
+        qty_stock) for every item, then emits a JSON discrepancy report.
+
+        Work is split into item-ID ranges per inventory; with --workers > 1
+        the ranges are checked in parallel by a process pool.
+        """
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1.')
+        disable_statement_timeout()
+
+        item_types = options['item_type'] or list(INVENTORY_TYPES)
+        shards = []
+        for item_type in item_types:
+            shards.extend(build_shards(item_type, options['chunk_size']))
+
+        if options['workers'] == 1:
+            results = [verify_range(*shard) for shard in shards]
+        else:
+            # Forked workers must open their own database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as pool:
+                results = list(pool.map(verify_range, *zip(*shards))) if shards else []
+
+        summary = {item_type: {'items_checked': 0, 'discrepancies': 0} for item_type in item_types}
+        discrepancies = []
+        for (item_type, _, _), (items_checked, found) in zip(shards, results):
+            summary[item_type]['items_checked'] += items_checked
+            summary[item_type]['discrepancies'] += len(found)
+            discrepancies.extend(found)
+
+        repaired = []
+        if options['repair']:
+            reason = StockAdjustmentReason.objects.filter(name='Stock Correction').first()
+            for discrepancy in discrepancies:
+                if discrepancy['check'] != 'balance':
+                    continue
+                fix = repair_balance(discrepancy['item_type'], discrepancy['item_id'], reason)
+                if fix is not None:
+                    repaired.append({
+                        'item_type': discrepancy['item_type'],
+                        'item_id': discrepancy['item_id'],
+                        'transaction_id': fix.pk,
+                        'transaction_type': fix.transaction_type,
+                        'quantity': fix.quantity,
+                    })
+
+        report = {
+            'checked_at': timezone.now().isoformat(),
+            'summary': summary,
+            'discrepancies': discrepancies,
+            'repaired': repaired,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        # Human-readable summary goes to stderr so stdout stays valid JSON.
+        total = len(discrepancies)
+        message = f'{total} discrepancies found, {len(repaired)} repaired.'
+        self.stderr.write(self.style.SUCCESS(message) if total == 0 else self.style.WARNING(message))
+
+        if total and not options['repair']:
+            raise CommandError('Ledger discrepancies found. Re-run with --repair to write corrective transactions.')
+        unrepairable = sum(1 for discrepancy in discrepancies if discrepancy['check'] != 'balance')
+        if unrepairable:
+            raise CommandError(
+                f'{unrepairable} chain or arithmetic discrepancies cannot be repaired automatically; '
+                f'see the report.'
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(help_text='Day this snapshot represents')),
+                ('item_type', models.CharField(choices=[('gift', 'Gifts'), ('apparel', 'Apparel'), ('executive', 'Executive Office'), ('office', 'Office'), ('miscellaneous', 'Miscellaneous')], help_text='Which inventory category this item comes from', max_length=20)),
+                ('item_id', models.PositiveIntegerField(help_text='Primary key of the item in its respective inventory model')),
+                ('qty_stock', models.IntegerField(help_text='Stock on hand when the snapshot was taken')),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, help_text='Unit price when the snapshot was taken', max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'ordering': ['-snapshot_date', 'item_type', 'item_id'],
+                'indexes': [models.Index(fields=['item_type', 'item_id', 'snapshot_date'], name='reports_sto_item_ty_e20a87_idx')],
+                'unique_together': {('snapshot_date', 'item_type', 'item_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumptionForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('gift', 'Gifts'), ('apparel', 'Apparel'), ('executive', 'Executive Office'), ('office', 'Office'), ('miscellaneous', 'Miscellaneous')], help_text='Which inventory category this item comes from', max_length=20)),
+                ('item_id', models.PositiveIntegerField(help_text='Primary key of the item in its respective inventory model')),
+                ('qty_stock', models.IntegerField(help_text='Stock on hand when the forecast was computed')),
+                ('consumed_7d', models.IntegerField(default=0)),
+                ('consumed_28d', models.IntegerField(default=0)),
+                ('consumed_90d', models.IntegerField(default=0)),
+                ('avg_daily_consumption', models.DecimalField(decimal_places=2, default=0, help_text='Average net units consumed per day over the last 28 days', max_digits=10)),
+                ('avg_weekly_consumption', models.DecimalField(decimal_places=2, default=0, help_text='Average net units consumed per week over the last 28 days', max_digits=10)),
+                ('event_uplift', models.DecimalField(blank=True, decimal_places=2, help_text='Daily take rate around event dates divided by the rate on other days', max_digits=8, null=True)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, help_text='Days until stock runs out at the current burn rate (null if no consumption)', max_digits=10, null=True)),
+                ('last_transaction_id', models.PositiveIntegerField(default=0, help_text='Newest transaction ID included in these figures')),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Consumption Forecast',
+                'verbose_name_plural': 'Consumption Forecasts',
+                'ordering': ['days_of_cover'],
+                'unique_together': {('item_type', 'item_id')},
+            },
+        ),
+    ]
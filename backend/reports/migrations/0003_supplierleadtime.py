@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_consumptionforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierLeadTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supplier_name', models.CharField(help_text='Supplier name exactly as entered on inventory items', max_length=200, unique=True)),
+                ('lead_time_days', models.PositiveIntegerField(help_text='Typical days from placing an order to receiving it')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Supplier Lead Time',
+                'verbose_name_plural': 'Supplier Lead Times',
+                'ordering': ['supplier_name'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 02:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_stockadjustmentreason_applies_to'),
+        ('reports', '0003_supplierleadtime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentCostRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the items were needed')),
+                ('item_type', models.CharField(choices=[('gift', 'Gift'), ('apparel', 'Apparel Variant'), ('executive', 'Executive Office Item'), ('it', 'IT Asset'), ('office', 'Office & Events Item'), ('miscellaneous', 'Miscellaneous Item')], help_text='Which inventory category the items come from', max_length=20)),
+                ('units', models.IntegerField(default=0, help_text='Units requested (confirmed quantity where set)')),
+                ('cost', models.DecimalField(decimal_places=2, default=0, help_text='Units multiplied by the unit price captured on each request line', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(help_text='Department the requests are charged to', on_delete=django.db.models.deletion.CASCADE, related_name='cost_rollups', to='core.department')),
+                ('reason', models.ForeignKey(help_text='Reason given on the requests', on_delete=django.db.models.deletion.CASCADE, related_name='cost_rollups', to='core.takereason')),
+            ],
+            options={
+                'verbose_name': 'Department Cost Rollup',
+                'verbose_name_plural': 'Department Cost Rollups',
+                'ordering': ['-month', 'department', 'item_type', 'reason'],
+                'unique_together': {('department', 'month', 'item_type', 'reason')},
+            },
+        ),
+    ]
@@ -0,0 +1,229 @@
+from django.db import models
+
+from core.inventory import ITEM_TYPE_CHOICES
+from item_requests.models import ItemRequestItem
+
+
+# StockSnapshot is one row per inventory item per day, recording how much
+# stock the item had and what it was worth at the time the snapshot ran.
+# Rows are written in bulk by the snapshot_stock management command (see
+# reports/snapshots.py), never through the API.
+#
+# Trend and valuation questions ("how many pins did we hold at the end of
+# March?") read these rows directly instead of replaying the *Transaction
+# ledgers. item_type + item_id use the same generic pattern as
+# ItemRequestItem; for apparel item_id is the variant ID.
+#
+# unit_price is nullable because office, miscellaneous and executive items
+# don't always have a tracked price.
+class StockSnapshot(models.Model):
+    snapshot_date = models.DateField(
+        help_text="Day this snapshot represents"
+    )
+
+    item_type = models.CharField(
+        max_length=20,
+        choices=ITEM_TYPE_CHOICES,
+        help_text="Which inventory category this item comes from"
+    )
+
+    item_id = models.PositiveIntegerField(
+        help_text="Primary key of the item in its respective inventory model"
+    )
+
+    qty_stock = models.IntegerField(
+        help_text="Stock on hand when the snapshot was taken"
+    )
+
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Unit price when the snapshot was taken"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-snapshot_date', 'item_type', 'item_id']
+        unique_together = ['snapshot_date', 'item_type', 'item_id']
+        indexes = [
+            # Per-item history lookups (e.g. a stock trend chart for one gift)
+            models.Index(fields=['item_type', 'item_id', 'snapshot_date']),
+        ]
+        verbose_name = "Stock Snapshot"
+        verbose_name_plural = "Stock Snapshots"
+
+    def __str__(self):
+        return f"{self.snapshot_date} — {self.get_item_type_display()} #{self.item_id}: {self.qty_stock}"
+
+
+# ConsumptionForecast caches burn-rate analytics for one inventory item, so
+# the admin panel can list every item's days of cover in a single query
+# instead of crunching transaction history on each request.
+# Rows are (re)computed by the refresh_consumption_forecasts command — see
+# reports/analytics.py for how each figure is derived.
+#
+# consumed_* are net units out of stock (takes minus returns) over the last
+# 7, 28 and 90 days. event_uplift compares the daily take rate on days near
+# a request's date_needed with the rate on all other days over the past
+# year (e.g. 2.5 = demand is 2.5x higher around events); it is null when
+# there is not enough history to tell.
+#
+# last_transaction_id is the newest ledger row included in the figures and
+# lets the refresh job pick up only items that have moved since.
+class ConsumptionForecast(models.Model):
+    item_type = models.CharField(
+        max_length=20,
+        choices=ITEM_TYPE_CHOICES,
+        help_text="Which inventory category this item comes from"
+    )
+
+    item_id = models.PositiveIntegerField(
+        help_text="Primary key of the item in its respective inventory model"
+    )
+
+    qty_stock = models.IntegerField(
+        help_text="Stock on hand when the forecast was computed"
+    )
+
+    consumed_7d = models.IntegerField(default=0)
+    consumed_28d = models.IntegerField(default=0)
+    consumed_90d = models.IntegerField(default=0)
+
+    avg_daily_consumption = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text="Average net units consumed per day over the last 28 days"
+    )
+
+    avg_weekly_consumption = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text="Average net units consumed per week over the last 28 days"
+    )
+
+    event_uplift = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Daily take rate around event dates divided by the rate on other days"
+    )
+
+    days_of_cover = models.DecimalField(
+        max_digits=10,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        help_text="Days until stock runs out at the current burn rate (null if no consumption)"
+    )
+
+    last_transaction_id = models.PositiveIntegerField(
+        default=0,
+        help_text="Newest transaction ID included in these figures"
+    )
+
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['days_of_cover']
+        unique_together = ['item_type', 'item_id']
+        verbose_name = "Consumption Forecast"
+        verbose_name_plural = "Consumption Forecasts"
+
+    def __str__(self):
+        return f"{self.get_item_type_display()} #{self.item_id}: {self.days_of_cover} days of cover"
+
+
+# SupplierLeadTime records how many days a supplier usually takes to deliver
+# after an order is placed. Reorder recommendations use it to size safety
+# stock; suppliers without a row fall back to DEFAULT_LEAD_TIME_DAYS in
+# reports/reorder.py. Managed by admin via Django admin.
+# supplier_name is matched case-insensitively against the supplier_name
+# stored on each inventory item.
+class SupplierLeadTime(models.Model):
+    supplier_name = models.CharField(
+        max_length=200,
+        unique=True,
+        help_text="Supplier name exactly as entered on inventory items"
+    )
+
+    lead_time_days = models.PositiveIntegerField(
+        help_text="Typical days from placing an order to receiving it"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['supplier_name']
+        verbose_name = "Supplier Lead Time"
+        verbose_name_plural = "Supplier Lead Times"
+
+    def __str__(self):
+        return f"{self.supplier_name} ({self.lead_time_days} days)"
+
+
+# DepartmentCostRollup holds running totals of requested stock per
+# department, month, inventory and reason — one row per combination.
+#
+# Rows are kept up to date as requests move through the workflow (see
+# reports/rollups.py): submitting a request adds its lines, confirming a
+# line adjusts by the change in quantity, and cancelling takes the lines
+# back out. Drafts and cancelled requests are never counted.
+# Budget dashboards read this table instead of walking every request line
+# and its total_cost property. The rebuild_department_costs command
+# recalculates it from scratch if it ever drifts.
+#
+# month is the first day of the month of the request's date_needed, so
+# spend lands in the month the items are actually used.
+class DepartmentCostRollup(models.Model):
+    department = models.ForeignKey(
+        'core.Department',
+        on_delete=models.CASCADE,
+        related_name='cost_rollups',
+        help_text="Department the requests are charged to"
+    )
+
+    month = models.DateField(
+        help_text="First day of the month the items were needed"
+    )
+
+    item_type = models.CharField(
+        max_length=20,
+        choices=ItemRequestItem.ITEM_TYPE_CHOICES,
+        help_text="Which inventory category the items come from"
+    )
+
+    reason = models.ForeignKey(
+        'core.TakeReason',
+        on_delete=models.CASCADE,
+        related_name='cost_rollups',
+        help_text="Reason given on the requests"
+    )
+
+    units = models.IntegerField(
+        default=0,
+        help_text="Units requested (confirmed quantity where set)"
+    )
+
+    cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Units multiplied by the unit price captured on each request line"
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month', 'department', 'item_type', 'reason']
+        unique_together = ['department', 'month', 'item_type', 'reason']
+        verbose_name = "Department Cost Rollup"
+        verbose_name_plural = "Department Cost Rollups"
+
+    def __str__(self):
+        return f"{self.department} — {self.month:%Y-%m} — {self.get_item_type_display()}: {self.cost}"
@@ -0,0 +1,214 @@
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from core.inventory import INVENTORY_TYPES
+from reports.models import SupplierLeadTime
+
+
+# Whole weeks of take history used to measure demand and its variability.
+HISTORY_WEEKS = 12
+
+# Lead time for suppliers without a SupplierLeadTime row.
+DEFAULT_LEAD_TIME_DAYS = 14
+
+# How long each order should last once it arrives (roughly one order per month).
+REVIEW_PERIOD_DAYS = 30
+
+# Safety stock multiplier: 1.65 standard deviations covers demand in about
+# 95% of lead-time periods.
+SERVICE_LEVEL_Z = 1.65
+
+
+# The HISTORY_WEEKS whole Monday-to-Sunday weeks before the current one, as
+# (start, end) datetimes. TruncWeek buckets takes by calendar week, so a
+# window starting or ending mid-week would spread them over an extra,
+# partial week while the mean still divided by HISTORY_WEEKS.
+def _history_window():
+    today = timezone.localdate()
+    monday = today - timedelta(days=today.weekday())
+    end = datetime.combine(monday, time.min, tzinfo=timezone.get_current_timezone())
+    return end - timedelta(weeks=HISTORY_WEEKS), end
+
+
+# Measures demand per key from 'take' transactions, bucketed by week in SQL.
+# group_by is the transaction field to aggregate on (e.g. 'gift_id', or
+# 'variant__product_id' to pool apparel sizes at product level).
+# window is the (start, end) from _history_window(). Weeks with no takes never
+# appear in the grouped rows, so mean and variance are taken over
+# HISTORY_WEEKS with those weeks counted as zero.
+# Returns {key: (mean_daily_demand, daily_standard_deviation)}.
+def _demand_stats(transaction_model, group_by, window):
+    start, end = window
+    weekly = (
+        transaction_model.objects
+        .filter(transaction_type='take', created_at__gte=start, created_at__lt=end)
+        .annotate(week=TruncWeek('created_at'))
+        .order_by()
+        .values(group_by, 'week')
+        .annotate(units=Sum('quantity'))
+        .values_list(group_by, 'units')
+    )
+
+    sums = defaultdict(lambda: [0, 0])
+    for key, units in weekly:
+        sums[key][0] += units
+        sums[key][1] += units * units
+
+    stats = {}
+    for key, (total, squares) in sums.items():
+        mean_week = total / HISTORY_WEEKS
+        variance = max(squares / HISTORY_WEEKS - mean_week ** 2, 0)
+        stats[key] = (mean_week / 7, math.sqrt(variance / 7))
+    return stats
+
+
+# Apparel demand is measured per product and spread over its variants by
+# size curve — each variant's share of the product's takes in the history
+# window. Pooling at product level keeps the variability estimate stable
+# for sizes that only move a few units a quarter. Variants of a product with
+# no takes split its (zero) demand evenly.
+# Returns {variant_id: (mean_daily_demand, daily_standard_deviation, share)}.
+def _apparel_demand(variants, window):
+    start, end = window
+    transaction_model = INVENTORY_TYPES['apparel']['transaction_model']
+    product_stats = _demand_stats(transaction_model, 'variant__product_id', window)
+
+    variant_units = dict(
+        transaction_model.objects
+        .filter(transaction_type='take', created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .values('variant_id')
+        .annotate(units=Sum('quantity'))
+        .values_list('variant_id', 'units')
+    )
+
+    product_units = defaultdict(int)
+    product_variant_count = defaultdict(int)
+    for variant in variants:
+        product_units[variant['product_id']] += variant_units.get(variant['pk'], 0)
+        product_variant_count[variant['product_id']] += 1
+
+    demand = {}
+    for variant in variants:
+        product_id = variant['product_id']
+        if product_units[product_id]:
+            share = variant_units.get(variant['pk'], 0) / product_units[product_id]
+        else:
+            share = 1 / product_variant_count[product_id]
+        mean, deviation = product_stats.get(product_id, (0, 0))
+        demand[variant['pk']] = (mean * share, deviation * share, share)
+    return demand
+
+
+# Reorder point and order quantity for one item.
+#   safety stock  = z * daily deviation * sqrt(lead time)
+#   reorder point = expected demand over the lead time + safety stock,
+#                   never below the item's own minimum_stock_level
+#   order-up-to   = expected demand over lead time + review period + safety
+#                   stock, and at least the reorder point plus the minimum
+#                   level, so items with a threshold but no recent demand
+#                   are topped back up to twice their threshold
+# An order is only recommended once stock is at or below the reorder point.
+def _recommend(qty_stock, minimum, mean_daily, deviation_daily, lead_time):
+    safety_stock = SERVICE_LEVEL_Z * deviation_daily * math.sqrt(lead_time)
+    reorder_point = math.ceil(mean_daily * lead_time + safety_stock)
+    if minimum is not None:
+        reorder_point = max(reorder_point, minimum)
+
+    order_up_to = max(
+        math.ceil(mean_daily * (lead_time + REVIEW_PERIOD_DAYS) + safety_stock),
+        reorder_point + (minimum or 0),
+    )
+    order_quantity = order_up_to - qty_stock if qty_stock <= reorder_point else 0
+    return math.ceil(safety_stock), reorder_point, max(order_quantity, 0)
+
+
+# Builds purchase lists for the whole catalog: every item at or below its
+# reorder point, grouped by supplier with line and supplier totals.
+#
+# Everything is set-based — per inventory there is one query for the items
+# and one grouped query for weekly demand (two for apparel), so the cost
+# does not grow with one query per item.
+def build_purchase_lists(item_types=None):
+    now = timezone.now()
+    window = _history_window()
+    lead_times = {
+        name.strip().lower(): days
+        for name, days in SupplierLeadTime.objects.values_list('supplier_name', 'lead_time_days')
+    }
+
+    suppliers = {}
+    for item_type in item_types or INVENTORY_TYPES:
+        config = INVENTORY_TYPES[item_type]
+        fields = [
+            'pk', 'qty_stock', config['name'], config['unit_price'],
+            config['supplier_name'], config['supplier_email'],
+        ]
+        if config['minimum_stock']:
+            fields.append(config['minimum_stock'])
+        if item_type == 'apparel':
+            fields += ['product_id', 'size__size_value', 'color__color_name', 'gender']
+
+        items = list(config['model'].objects.order_by().values(*fields))
+
+        if item_type == 'apparel':
+            demand = _apparel_demand(items, window)
+        else:
+            stats = _demand_stats(config['transaction_model'], f"{config['transaction_fk']}_id", window)
+            demand = {pk: (*values, None) for pk, values in stats.items()}
+
+        for item in items:
+            supplier_name = (item[config['supplier_name']] or '').strip()
+            supplier_email = item[config['supplier_email']] or ''
+            lead_time = lead_times.get(supplier_name.lower(), DEFAULT_LEAD_TIME_DAYS)
+            mean_daily, deviation_daily, share = demand.get(item['pk'], (0, 0, None))
+            minimum = item[config['minimum_stock']] if config['minimum_stock'] else None
+
+            safety_stock, reorder_point, order_quantity = _recommend(
+                item['qty_stock'], minimum, mean_daily, deviation_daily, lead_time
+            )
+            if order_quantity <= 0:
+                continue
+
+            name = item[config['name']]
+            if item_type == 'apparel':
+                name = f"{name} — {item['size__size_value']} {item['color__color_name']} ({item['gender']})"
+            unit_price = item[config['unit_price']]
+
+            line = {
+                'item_type': item_type,
+                'item_id': item['pk'],
+                'name': name,
+                'qty_stock': item['qty_stock'],
+                'avg_daily_demand': round(mean_daily, 2),
+                'safety_stock': safety_stock,
+                'reorder_point': reorder_point,
+                'order_quantity': order_quantity,
+                'lead_time_days': lead_time,
+                'unit_price': unit_price,
+                'line_cost': unit_price * order_quantity if unit_price is not None else None,
+            }
+            if share is not None:
+                line['size_share'] = round(share, 3)
+
+            key = (supplier_name.lower(), supplier_email.lower())
+            supplier = suppliers.setdefault(key, {
+                'supplier_name': supplier_name,
+                'supplier_email': supplier_email,
+                'lines': [],
+                'total_cost': Decimal('0.00'),
+            })
+            supplier['lines'].append(line)
+            if line['line_cost'] is not None:
+                supplier['total_cost'] += line['line_cost']
+
+    return {
+        'generated_at': now,
+        'suppliers': sorted(suppliers.values(), key=lambda s: (s['supplier_name'] == '', s['supplier_name'].lower())),
+    }
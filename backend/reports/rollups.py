@@ -0,0 +1,114 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from item_requests.models import ItemRequestItem
+from reports.models import DepartmentCostRollup
+
+
+# Requests in these statuses have had stock deducted and count towards
+# department spend. Drafts haven't been submitted and cancelled requests
+# have had their stock returned.
+COUNTED_STATUSES = ['pending', 'in_preparation', 'ready', 'completed']
+
+
+# Units a line accounts for — the confirmed quantity once the preparation
+# team has set one (even if that is 0), otherwise the requested quantity.
+# Matches what has actually been deducted from stock.
+def line_units(item):
+    if item.quantity_confirmed is not None:
+        return item.quantity_confirmed
+    return item.quantity_requested
+
+
+# Adds unit and cost deltas to the rollup rows for one request.
+# deltas maps item_type -> (units, cost). Each row is created on first use
+# and incremented with an F() update so concurrent submissions for the same
+# department and month don't overwrite each other.
+def _apply(item_request, deltas):
+    month = item_request.date_needed.replace(day=1)
+    with transaction.atomic():
+        for item_type, (units, cost) in deltas.items():
+            if not units and not cost:
+                continue
+            row, _ = DepartmentCostRollup.objects.get_or_create(
+                department_id=item_request.department_id,
+                month=month,
+                item_type=item_type,
+                reason_id=item_request.reason_id,
+            )
+            DepartmentCostRollup.objects.filter(pk=row.pk).update(
+                units=F('units') + units,
+                cost=F('cost') + cost,
+            )
+
+
+# Adds (sign=1) or removes (sign=-1) every line of a request.
+# Called when a request is submitted or cancelled.
+def record_request(item_request, sign=1):
+    deltas = defaultdict(lambda: [0, Decimal('0.00')])
+    for item in item_request.items.all():
+        units = line_units(item)
+        deltas[item.item_type][0] += sign * units
+        deltas[item.item_type][1] += sign * units * item.unit_price
+    _apply(item_request, deltas)
+
+
+# Adds (sign=1) or removes (sign=-1) a single line, if its request is
+# counted. Called when a line is added, edited or deleted directly.
+def record_line(item, sign=1):
+    if item.request.status not in COUNTED_STATUSES:
+        return
+    units = sign * line_units(item)
+    _apply(item.request, {item.item_type: (units, units * item.unit_price)})
+
+
+# Adjusts the rollup after a line's quantity changes on a counted request.
+# Called from confirm_request_item with the quantity before and after.
+def record_line_change(item, old_units, new_units):
+    item_request = item.request
+    if item_request.status not in COUNTED_STATUSES or old_units == new_units:
+        return
+    units = new_units - old_units
+    _apply(item_request, {item.item_type: (units, units * item.unit_price)})
+
+
+# Recalculates the whole rollup table from request lines in one grouped
+# query, replacing the existing rows atomically.
+# Returns the number of rollup rows written.
+def rebuild_department_costs():
+    units = Coalesce('quantity_confirmed', 'quantity_requested')
+    totals = (
+        ItemRequestItem.objects
+        .filter(request__status__in=COUNTED_STATUSES)
+        .annotate(month=TruncMonth('request__date_needed'))
+        .values('request__department_id', 'month', 'item_type', 'request__reason_id')
+        .annotate(
+            total_units=Sum(units),
+            total_cost=Sum(ExpressionWrapper(
+                units * F('unit_price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            )),
+        )
+        .order_by()
+    )
+
+    rows = [
+        DepartmentCostRollup(
+            department_id=row['request__department_id'],
+            month=row['month'],
+            item_type=row['item_type'],
+            reason_id=row['request__reason_id'],
+            units=row['total_units'],
+            cost=row['total_cost'] or 0,
+        )
+        for row in totals
+    ]
+
+    with transaction.atomic():
+        DepartmentCostRollup.objects.all().delete()
+        DepartmentCostRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
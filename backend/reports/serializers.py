@@ -0,0 +1,42 @@
+from rest_framework import serializers
+
+from reports.models import StockSnapshot, ConsumptionForecast, DepartmentCostRollup
+
+
+# StockSnapshotSerializer is read-only — snapshots are only ever written in
+# bulk by the snapshot_stock management command.
+class StockSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockSnapshot
+        fields = ['id', 'snapshot_date', 'item_type', 'item_id', 'qty_stock', 'unit_price']
+        read_only_fields = fields
+
+
+# ConsumptionForecastSerializer is read-only — forecasts are computed by the
+# refresh_consumption_forecasts command, never written through the API.
+class ConsumptionForecastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConsumptionForecast
+        fields = [
+            'id', 'item_type', 'item_id', 'qty_stock',
+            'consumed_7d', 'consumed_28d', 'consumed_90d',
+            'avg_daily_consumption', 'avg_weekly_consumption', 'event_uplift',
+            'days_of_cover', 'computed_at',
+        ]
+        read_only_fields = fields
+
+
+# DepartmentCostRollupSerializer is read-only — rollup rows are maintained by
+# the request workflow (reports/rollups.py), never written through the API.
+# Department and reason names are included so dashboards don't need extra lookups.
+class DepartmentCostRollupSerializer(serializers.ModelSerializer):
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    reason_name = serializers.CharField(source='reason.reason_name', read_only=True)
+
+    class Meta:
+        model = DepartmentCostRollup
+        fields = [
+            'id', 'department', 'department_name', 'month', 'item_type',
+            'reason', 'reason_name', 'units', 'cost',
+        ]
+        read_only_fields = fields
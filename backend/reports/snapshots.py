@@ -0,0 +1,70 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.inventory import INVENTORY_TYPES
+from reports.models import StockSnapshot
+
+
+# Builds the SELECT half of the INSERT ... SELECT for one inventory type.
+# Returns (from_sql, price_sql) where the stock table is aliased as "t".
+# When the unit price lives on a related model (apparel variants read it
+# from their product) the related table is joined in as "r".
+def _price_source(config):
+    qn = connection.ops.quote_name
+    model = config['model']
+    table = qn(model._meta.db_table)
+    price_path = config['unit_price'].split('__')
+
+    if len(price_path) == 1:
+        price_column = model._meta.get_field(price_path[0]).column
+        return f"{table} t", f"t.{qn(price_column)}"
+
+    fk = model._meta.get_field(price_path[0])
+    related = fk.related_model
+    price_column = related._meta.get_field(price_path[1]).column
+    from_sql = (
+        f"{table} t JOIN {qn(related._meta.db_table)} r "
+        f"ON r.{qn(related._meta.pk.column)} = t.{qn(fk.column)}"
+    )
+    return from_sql, f"r.{qn(price_column)}"
+
+
+# Captures the current stock of every item in all five inventories for
+# snapshot_date (defaults to today).
+#
+# Each inventory is copied with a single INSERT ... SELECT so the rows never
+# pass through Python, however large the catalog gets. The whole snapshot
+# runs in one transaction and replaces any rows already stored for that day,
+# so re-running the job on the same day is safe and simply refreshes the
+# figures.
+#
+# Returns a dict of item_type -> number of rows written.
+def take_stock_snapshot(snapshot_date=None):
+    snapshot_date = snapshot_date or timezone.localdate()
+    qn = connection.ops.quote_name
+    snapshot_table = qn(StockSnapshot._meta.db_table)
+    columns = ", ".join(
+        qn(StockSnapshot._meta.get_field(name).column)
+        for name in ['snapshot_date', 'item_type', 'item_id', 'qty_stock', 'unit_price', 'created_at']
+    )
+    date_value = connection.ops.adapt_datefield_value(snapshot_date)
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    counts = {}
+    with transaction.atomic():
+        StockSnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+
+        with connection.cursor() as cursor:
+            for item_type, config in INVENTORY_TYPES.items():
+                model = config['model']
+                from_sql, price_sql = _price_source(config)
+                cursor.execute(
+                    f"INSERT INTO {snapshot_table} ({columns}) "
+                    f"SELECT %s, %s, t.{qn(model._meta.pk.column)}, "
+                    f"t.{qn(model._meta.get_field('qty_stock').column)}, {price_sql}, %s "
+                    f"FROM {from_sql}",
+                    [date_value, item_type, created_at],
+                )
+                counts[item_type] = cursor.rowcount
+
+    return counts
@@ -0,0 +1,320 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from accounts.tokens import tokens_for
+from apparel.models import ApparelCategory, ApparelColor, ApparelProduct, ApparelSize, ApparelVariant
+from core.models import Department, StockAdjustmentReason, TakeReason
+from gifts.models import Gift, GiftCategory, InventoryTransaction
+from item_requests.models import ItemRequest, ItemRequestItem
+from reports.analytics import MAX_DAYS_OF_COVER, refresh_consumption_forecasts
+from reports.models import ConsumptionForecast, DepartmentCostRollup, StockSnapshot
+from reports.rollups import rebuild_department_costs
+from reports.reorder import HISTORY_WEEKS, _demand_stats, _history_window
+
+
+# Malformed query parameters on the report lists are answered with 400 and
+# an error message, never passed on to the database.
+class ReportFilterValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('reports', password='reports-password')
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def assertRejected(self, path, params):
+        response = self.client.get(path, params, **self.auth)
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('error', response.json())
+
+    def test_stock_snapshots(self):
+        path = '/api/reports/stock-snapshots/'
+        for params in ({'item_id': 'abc'}, {'date_from': 'xx'}, {'date_to': '2026-13-01'}):
+            with self.subTest(params=params):
+                self.assertRejected(path, params)
+        response = self.client.get(path, {'item_type': 'gift', 'item_id': '5', 'date_from': '2026-01-01'}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_consumption_forecasts(self):
+        path = '/api/reports/consumption-forecasts/'
+        for value in ('abc', 'nan', 'inf'):
+            with self.subTest(max_days_of_cover=value):
+                self.assertRejected(path, {'max_days_of_cover': value})
+        response = self.client.get(path, {'max_days_of_cover': '7.5'}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_department_costs(self):
+        path = '/api/reports/department-costs/'
+        for params in ({'department': 'abc'}, {'reason': '1.5'}, {'month_from': 'zz'}, {'month_to': '2026-13'}):
+            with self.subTest(params=params):
+                self.assertRejected(path, params)
+        response = self.client.get(path, {'department': '3', 'month_from': '2026-01', 'month_to': '2026-06'}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+
+class ConsumptionForecastTests(TestCase):
+    def test_days_of_cover_is_capped(self):
+        gift = Gift.objects.create(
+            product_name='Pallet of pens', category=GiftCategory.objects.create(name='Pens'), qty_stock=2_000_000_000, unit_price=1,
+        )
+        InventoryTransaction.objects.create(
+            gift=gift, transaction_type='take', quantity=1,
+            reason=StockAdjustmentReason.objects.create(name='Event'),
+            stock_before=2_000_000_001, stock_after=2_000_000_000,
+        )
+
+        refresh_consumption_forecasts()
+
+        forecast = ConsumptionForecast.objects.get(item_type='gift', item_id=gift.pk)
+        self.assertEqual(forecast.days_of_cover, MAX_DAYS_OF_COVER)
+
+
+class ReorderDemandTests(TestCase):
+    def test_demand_is_averaged_over_whole_weeks(self):
+        gift = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=100, unit_price=1,
+        )
+        reason = StockAdjustmentReason.objects.create(name='Event')
+        start, end = _history_window()
+        # 7 units in the middle of every week of the window, plus takes just
+        # before it and in the week in progress that must not be counted.
+        times = [start + timedelta(weeks=week, days=3) for week in range(HISTORY_WEEKS)]
+        times += [start - timedelta(hours=1), max(end, timezone.now())]
+        for created_at in times:
+            take = InventoryTransaction.objects.create(
+                gift=gift, transaction_type='take', quantity=7, reason=reason, stock_before=107, stock_after=100,
+            )
+            InventoryTransaction.objects.filter(pk=take.pk).update(created_at=created_at)
+
+        mean_daily, deviation_daily = _demand_stats(InventoryTransaction, 'gift_id', (start, end))[gift.pk]
+
+        self.assertAlmostEqual(mean_daily, 1.0)
+        self.assertAlmostEqual(deviation_daily, 0.0)
+
+
+class StockSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mug = Gift.objects.create(
+            product_name='Mug', category=GiftCategory.objects.create(name='Mugs'), qty_stock=7, unit_price='2.50',
+        )
+        cls.polo = ApparelVariant.objects.create(
+            product=ApparelProduct.objects.create(
+                product_name='Polo', category=ApparelCategory.objects.create(name='Polos'), unit_price='12.00',
+            ),
+            size=ApparelSize.objects.create(size_value='M', size_type='clothing'),
+            color=ApparelColor.objects.create(color_name='Navy'),
+            qty_stock=3,
+        )
+
+    def snapshot(self, *args):
+        call_command('snapshot_stock', *args, stdout=StringIO())
+
+    def rows(self):
+        return set(StockSnapshot.objects.values_list('snapshot_date', 'item_type', 'item_id', 'qty_stock', 'unit_price'))
+
+    def test_rerun_on_the_same_day_replaces_the_rows(self):
+        today = timezone.localdate()
+        self.snapshot()
+        Gift.objects.filter(pk=self.mug.pk).update(qty_stock=5)
+        self.snapshot()
+
+        self.assertEqual(self.rows(), {
+            (today, 'gift', self.mug.pk, 5, Decimal('2.50')),
+            (today, 'apparel', self.polo.pk, 3, Decimal('12.00')),
+        })
+
+    def test_each_day_keeps_its_own_rows(self):
+        self.snapshot('--date', '2026-10-01')
+        self.snapshot('--date', '2026-10-02')
+        self.assertEqual(StockSnapshot.objects.filter(snapshot_date=date(2026, 10, 1)).count(), 2)
+        self.assertEqual(StockSnapshot.objects.count(), 4)
+
+        with self.assertRaises(CommandError):
+            self.snapshot('--date', '01/10/2026')
+
+
+class LedgerVerificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = GiftCategory.objects.create(name='Mugs')
+        cls.mug = Gift.objects.create(product_name='Mug', category=category, qty_stock=6, unit_price=1)
+        cls.pin = Gift.objects.create(product_name='Pin', category=category, qty_stock=4, unit_price=1)
+        StockAdjustmentReason.objects.create(name='Stock Correction')
+
+    # Writes ledger rows for an item from (type, quantity, stock_before, stock_after).
+    def ledger(self, gift, *rows):
+        for transaction_type, quantity, before, after in rows:
+            InventoryTransaction.objects.create(
+                gift=gift, transaction_type=transaction_type, quantity=quantity, stock_before=before, stock_after=after,
+            )
+
+    # Runs the command and returns (report, CommandError or None).
+    def verify(self, *args):
+        stdout = StringIO()
+        try:
+            call_command('verify_ledgers', *args, stdout=stdout, stderr=StringIO())
+        except CommandError as error:
+            return json.loads(stdout.getvalue()), error
+        return json.loads(stdout.getvalue()), None
+
+    def test_consistent_ledgers_pass(self):
+        self.ledger(self.mug, ('return', 10, 0, 10), ('take', 4, 10, 6))
+        self.ledger(self.pin, ('return', 4, 0, 4))
+
+        report, error = self.verify()
+
+        self.assertIsNone(error)
+        self.assertEqual(report['summary']['gift'], {'items_checked': 2, 'discrepancies': 0})
+
+    def test_every_kind_of_break_is_reported(self):
+        self.ledger(self.mug, ('return', 10, 0, 10), ('take', 4, 9, 5), ('take', 1, 5, 3))
+        self.ledger(self.pin, ('return', 5, 0, 5))
+
+        report, error = self.verify()
+
+        self.assertIsNotNone(error)
+        self.assertEqual(
+            sorted((found['check'], found['item_id']) for found in report['discrepancies']),
+            sorted([('chain', self.mug.pk), ('arithmetic', self.mug.pk), ('balance', self.mug.pk), ('balance', self.pin.pk)]),
+        )
+
+    def test_repair_aligns_balances(self):
+        self.ledger(self.pin, ('return', 5, 0, 5))
+
+        report, error = self.verify('--repair')
+
+        self.assertIsNone(error)
+        self.assertEqual(
+            [(fix['item_id'], fix['transaction_type'], fix['quantity']) for fix in report['repaired']],
+            [(self.pin.pk, 'take', 1)],
+        )
+        report, error = self.verify()
+        self.assertIsNone(error)
+        self.assertEqual(report['discrepancies'], [])
+
+    def test_repair_still_fails_on_chain_breaks(self):
+        self.ledger(self.mug, ('return', 10, 0, 10), ('take', 4, 9, 5))
+
+        report, error = self.verify('--repair')
+
+        self.assertIn('cannot be repaired', str(error))
+        self.assertEqual([fix['item_id'] for fix in report['repaired']], [self.mug.pk])
+        self.assertEqual([found['check'] for found in self.verify()[0]['discrepancies']], ['chain'])
+
+
+# The request-level statement timeout must not cancel the nightly commands.
+class BatchStatementTimeoutTests(TestCase):
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('statement_timeout is PostgreSQL only')
+        self.addCleanup(connection_created.disconnect, dispatch_uid='core.db.disable_statement_timeout')
+
+    def statement_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            return cursor.fetchone()[0]
+
+    def test_commands_run_without_the_timeout(self):
+        for command in ('snapshot_stock', 'verify_ledgers', 'refresh_consumption_forecasts', 'rebuild_department_costs'):
+            with self.subTest(command=command):
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = 30000')
+                call_command(command, stdout=StringIO())
+                self.assertEqual(self.statement_timeout(), '0')
+
+
+# The department cost rollup is kept up to date incrementally; after any
+# sequence of request changes it must hold what a rebuild from the request
+# lines would write.
+class DepartmentCostRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('requests')
+        cls.events = Department.objects.create(name='Events')
+        cls.media = Department.objects.create(name='Media')
+        cls.reason = TakeReason.objects.create(reason_name='Gift')
+        category = GiftCategory.objects.create(name='Mugs')
+        cls.mug = Gift.objects.create(product_name='Mug', category=category, qty_stock=100, unit_price=1)
+        cls.pin = Gift.objects.create(product_name='Pin', category=category, qty_stock=100, unit_price=1)
+
+    def setUp(self):
+        self.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for(self.user).access_token}'}
+
+    def send(self, method, path, data=None):
+        response = getattr(self.client, method)(
+            f'/api/requests/{path}', data, content_type='application/json', **self.auth,
+        )
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def new_request(self, **lines):
+        item_request = ItemRequest.objects.create(
+            requested_by=self.user, department=self.events, reason=self.reason, date_needed=date(2026, 11, 20),
+        )
+        for gift, quantity in lines.items():
+            ItemRequestItem.objects.create(
+                request=item_request, item_type='gift', item_id=getattr(self, gift).pk,
+                quantity_requested=quantity, unit_price='2.50',
+            )
+        return item_request
+
+    def rollup(self):
+        return {
+            (row.department_id, row.month, row.item_type, row.reason_id): (row.units, row.cost)
+            for row in DepartmentCostRollup.objects.all()
+            if row.units or row.cost
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup()
+        rebuild_department_costs()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_every_change_keeps_the_rollup_in_step(self):
+        kept = self.new_request(mug=3)
+        dropped = self.new_request(mug=1, pin=2)
+        line = kept.items.get()
+        changes = [
+            ('submit', lambda: self.send('patch', f'{kept.pk}/submit/')),
+            ('submit another', lambda: self.send('patch', f'{dropped.pk}/submit/')),
+            ('add a line', lambda: self.send('post', f'{kept.pk}/items/add/', {
+                'item_type': 'gift', 'item_id': self.pin.pk, 'quantity_requested': 4, 'unit_price': '1.25',
+            })),
+            ('edit a line', lambda: self.send('patch', f'{kept.pk}/items/{line.pk}/', {
+                'quantity_requested': 5, 'unit_price': '3.00',
+            })),
+            ('confirm a line', lambda: self.send('patch', f'{kept.pk}/items/{line.pk}/confirm/', {
+                'quantity_confirmed': 2,
+            })),
+            ('delete a line', lambda: self.send('delete', f'{dropped.pk}/items/{dropped.items.first().pk}/')),
+            ('move department and month', lambda: self.send('patch', f'{kept.pk}/', {
+                'department_id': self.media.pk, 'date_needed': '2026-12-05',
+            })),
+            ('status override', lambda: self.send('patch', f'{kept.pk}/status/', {'status': 'ready'})),
+            ('cancel', lambda: self.send('patch', f'{dropped.pk}/cancel/')),
+            ('edit a cancelled request', lambda: self.send('post', f'{dropped.pk}/items/add/', {
+                'item_type': 'gift', 'item_id': self.mug.pk, 'quantity_requested': 1,
+            })),
+            ('reopen', lambda: self.send('patch', f'{dropped.pk}/status/', {'status': 'pending'})),
+            ('delete a request', lambda: self.send('delete', f'{dropped.pk}/')),
+        ]
+        for change, apply in changes:
+            with self.subTest(change=change):
+                apply()
+                self.assertMatchesRebuild()
+        self.assertEqual(self.rollup(), {
+            (self.media.pk, date(2026, 12, 1), 'gift', self.reason.pk): (6, Decimal('11.00')),
+        })
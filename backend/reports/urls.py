@@ -0,0 +1,19 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # GET daily stock snapshots — supports ?item_type=&item_id= and ?date_from=&date_to= filters
+    path("stock-snapshots/", views.StockSnapshotList.as_view(), name="stock-snapshot-list"),
+
+    # GET units and stock value per inventory for one snapshot day (?date=, defaults to latest)
+    path("stock-valuation/", views.stock_valuation, name="stock-valuation"),
+
+    # GET precomputed burn rate / days-of-cover per item — supports ?item_type= and ?max_days_of_cover=
+    path("consumption-forecasts/", views.ConsumptionForecastList.as_view(), name="consumption-forecast-list"),
+
+    # GET items at or below their reorder point with suggested order quantities, grouped by supplier (?item_type=)
+    path("reorder-recommendations/", views.reorder_recommendations, name="reorder-recommendations"),
+
+    # GET department spend by month / inventory / reason — supports ?department=, ?item_type=, ?reason=, ?month_from=&month_to=
+    path("department-costs/", views.DepartmentCostRollupList.as_view(), name="department-cost-list"),
+]
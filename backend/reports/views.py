@@ -0,0 +1,304 @@
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from accounts.permissions import HasDashboardAccess
+from core.inventory import INVENTORY_TYPES
+from core.replicas import ReplicaReadMixin, read_from_replica
+from reports.models import StockSnapshot, ConsumptionForecast, DepartmentCostRollup
+from reports.reorder import build_purchase_lists
+from reports.serializers import (
+    StockSnapshotSerializer, ConsumptionForecastSerializer, DepartmentCostRollupSerializer,
+)
+
+
+# Parses an optional YYYY-MM-DD query parameter.
+# Returns (value, error_response); value is None when the parameter is absent.
+def _parse_date_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None, None
+    try:
+        return date.fromisoformat(raw), None
+    except ValueError:
+        return None, Response(
+            {"error": f"Invalid {name}. Use YYYY-MM-DD."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+# Parses an optional whole-number query parameter (an item or record id).
+def _parse_int_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None, None
+    try:
+        return int(raw), None
+    except ValueError:
+        return None, Response(
+            {"error": f"Invalid {name}. Must be a whole number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+# Parses an optional decimal query parameter, e.g. 30 or 7.5.
+def _parse_number_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None, None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite():
+        return None, Response(
+            {"error": f"Invalid {name}. Must be a number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return value, None
+
+
+# Parses an optional YYYY-MM query parameter into the first day of that month.
+def _parse_month_param(request, name):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None, None
+    try:
+        if not re.fullmatch(r'\d{4}-\d{2}', raw):
+            raise ValueError
+        return date(int(raw[:4]), int(raw[5:]), 1), None
+    except ValueError:
+        return None, Response(
+            {"error": f"Invalid {name}. Use YYYY-MM."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+# Parses several optional query parameters, e.g. {'item_id': _parse_int_param}.
+# Returns (values, error_response) with the error for the first invalid one.
+def _parse_params(request, parsers):
+    values = {}
+    for name, parse in parsers.items():
+        values[name], error = parse(request, name)
+        if error:
+            return None, error
+    return values, None
+
+
+# ============================================
+# STOCK SNAPSHOT VIEWS
+# ============================================
+
+# Returns stored daily stock snapshots, newest first.
+# GET /api/reports/stock-snapshots/
+#
+# Supports optional query filters:
+#   ?item_type=gift&item_id=5          - history for a single item (stock trend)
+#   ?date_from=2026-01-01&date_to=...  - restrict to a date range
+# Malformed ids or dates return 400.
+# Reads only the snapshot table; the transaction ledgers are never touched.
+class StockSnapshotList(ReplicaReadMixin, generics.ListAPIView):
+    serializer_class = StockSnapshotSerializer
+    permission_classes = [HasDashboardAccess]
+
+    def list(self, request, *args, **kwargs):
+        self.params, error = _parse_params(request, {
+            'item_id': _parse_int_param,
+            'date_from': _parse_date_param,
+            'date_to': _parse_date_param,
+        })
+        if error:
+            return error
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = StockSnapshot.objects.all()
+
+        item_type = self.request.query_params.get('item_type')
+        if item_type:
+            queryset = queryset.filter(item_type=item_type)
+
+        if self.params['item_id'] is not None:
+            queryset = queryset.filter(item_id=self.params['item_id'])
+
+        if self.params['date_from']:
+            queryset = queryset.filter(snapshot_date__gte=self.params['date_from'])
+
+        if self.params['date_to']:
+            queryset = queryset.filter(snapshot_date__lte=self.params['date_to'])
+
+        return queryset
+
+
+# Returns total units and stock value per inventory for one snapshot day.
+# GET /api/reports/stock-valuation/
+# GET /api/reports/stock-valuation/?date=2026-03-31
+#
+# Defaults to the most recent snapshot. Items without a unit price count
+# towards units but not towards value.
+@api_view(['GET'])
+@permission_classes([HasDashboardAccess])
+@read_from_replica
+def stock_valuation(request):
+    snapshot_date, error = _parse_date_param(request, 'date')
+    if error:
+        return error
+
+    if snapshot_date is None:
+        snapshot_date = StockSnapshot.objects.aggregate(latest=Max('snapshot_date'))['latest']
+        if snapshot_date is None:
+            return Response(
+                {"error": "No stock snapshots have been recorded yet."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+    totals = (
+        StockSnapshot.objects
+        .filter(snapshot_date=snapshot_date)
+        .values('item_type')
+        .annotate(
+            total_units=Sum('qty_stock'),
+            total_value=Sum(ExpressionWrapper(
+                F('qty_stock') * F('unit_price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            )),
+        )
+        .order_by('item_type')
+    )
+
+    return Response({
+        "date": snapshot_date,
+        "inventories": [
+            {
+                "item_type": row['item_type'],
+                "label": INVENTORY_TYPES[row['item_type']]['label'],
+                "total_units": row['total_units'],
+                "total_value": row['total_value'] or 0,
+            }
+            for row in totals
+        ],
+    }, status=status.HTTP_200_OK)
+
+
+# ============================================
+# CONSUMPTION FORECAST VIEWS
+# ============================================
+
+# Returns precomputed burn rate and days-of-cover figures, items running out
+# soonest first (items with no consumption come last).
+# GET /api/reports/consumption-forecasts/
+#
+# Supports optional query filters:
+#   ?item_type=gift              - one inventory only
+#   ?max_days_of_cover=30        - only items that will run out within 30 days
+# A max_days_of_cover that isn't a number returns 400.
+# Figures are refreshed by the refresh_consumption_forecasts command; this
+# view is a single read of the forecast table.
+class ConsumptionForecastList(ReplicaReadMixin, generics.ListAPIView):
+    serializer_class = ConsumptionForecastSerializer
+    permission_classes = [HasDashboardAccess]
+
+    def list(self, request, *args, **kwargs):
+        self.params, error = _parse_params(request, {'max_days_of_cover': _parse_number_param})
+        if error:
+            return error
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = ConsumptionForecast.objects.order_by(
+            F('days_of_cover').asc(nulls_last=True), 'item_type', 'item_id'
+        )
+
+        item_type = self.request.query_params.get('item_type')
+        if item_type:
+            queryset = queryset.filter(item_type=item_type)
+
+        if self.params['max_days_of_cover'] is not None:
+            queryset = queryset.filter(days_of_cover__lte=self.params['max_days_of_cover'])
+
+        return queryset
+
+
+# ============================================
+# REORDER VIEWS
+# ============================================
+
+# Returns purchase lists: every item at or below its reorder point with a
+# suggested order quantity, grouped by supplier.
+# GET /api/reports/reorder-recommendations/
+# GET /api/reports/reorder-recommendations/?item_type=apparel
+#
+# Reorder points come from the last 12 whole weeks of takes, not counting
+# the week in progress (average demand plus safety stock for its
+# variability over the supplier's lead time). Apparel quantities follow
+# each product's size curve. Lead times are set per
+# supplier in the admin (SupplierLeadTime).
+@api_view(['GET'])
+@permission_classes([HasDashboardAccess])
+@read_from_replica
+def reorder_recommendations(request):
+    item_type = request.query_params.get('item_type')
+    if item_type and item_type not in INVENTORY_TYPES:
+        return Response(
+            {"error": f"Invalid item_type. Choose from: {', '.join(INVENTORY_TYPES)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    purchase_lists = build_purchase_lists([item_type] if item_type else None)
+    return Response(purchase_lists, status=status.HTTP_200_OK)
+
+
+# ============================================
+# DEPARTMENT COST VIEWS
+# ============================================
+
+# Returns department spend by month, inventory and reason.
+# GET /api/reports/department-costs/
+#
+# Supports optional query filters:
+#   ?department=3                          - one department
+#   ?item_type=gift  ?reason=2             - one inventory / reason
+#   ?month_from=2026-01&month_to=2026-06   - restrict to a range of months
+# Ids that aren't whole numbers and months not in YYYY-MM form return 400.
+# Reads only the rollup table, so cost grows with the number of rollup rows,
+# not with the number of request lines.
+class DepartmentCostRollupList(ReplicaReadMixin, generics.ListAPIView):
+    serializer_class = DepartmentCostRollupSerializer
+    permission_classes = [HasDashboardAccess]
+
+    def list(self, request, *args, **kwargs):
+        self.params, error = _parse_params(request, {
+            'department': _parse_int_param,
+            'reason': _parse_int_param,
+            'month_from': _parse_month_param,
+            'month_to': _parse_month_param,
+        })
+        if error:
+            return error
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = DepartmentCostRollup.objects.select_related('department', 'reason')
+
+        if self.params['department'] is not None:
+            queryset = queryset.filter(department_id=self.params['department'])
+
+        item_type = self.request.query_params.get('item_type')
+        if item_type:
+            queryset = queryset.filter(item_type=item_type)
+
+        if self.params['reason'] is not None:
+            queryset = queryset.filter(reason_id=self.params['reason'])
+
+        if self.params['month_from']:
+            queryset = queryset.filter(month__gte=self.params['month_from'])
+
+        if self.params['month_to']:
+            queryset = queryset.filter(month__lte=self.params['month_to'])
+
+        return queryset
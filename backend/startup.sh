@@ -1,4 +1,7 @@
 #!/bin/bash
-python manage.py migrate --noinput
+DB_STATEMENT_TIMEOUT_MS=0 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
+# Background task worker (image normalisation, document previews and text
+# extraction). Runs in this container so it can read IMAGE_SPOOL_DIR.
+python manage.py db_worker &
 gunicorn --bind=0.0.0.0 --timeout 600 config.wsgi
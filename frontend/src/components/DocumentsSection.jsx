@@ -99,9 +99,20 @@ function DocumentsSection({ contentType, objectId, canManage = false }) {
                                 href={doc.file.replace("http://localhost:8000", "")}
                                 target="_blank"
                                 rel="noopener noreferrer"
-                                className="text-sm text-wa-blue hover:text-wa-ocean font-medium truncate"
+                                className="flex items-center gap-2 text-sm text-wa-blue hover:text-wa-ocean font-medium truncate"
                             >
-                                📄 {doc.original_filename}
+                                {/* First-page preview, rendered by the backend after upload */}
+                                {doc.preview ? (
+                                    <img
+                                        src={doc.preview.replace("http://localhost:8000", "")}
+                                        alt=""
+                                        loading="lazy"
+                                        className="w-10 h-14 object-cover object-top rounded border border-gray-200 bg-white shrink-0"
+                                    />
+                                ) : (
+                                    <span>📄</span>
+                                )}
+                                <span className="truncate">{doc.original_filename}</span>
                             </a>
                             {canManage && (
                                 <button